@@ -17,11 +17,36 @@ Agent Monitor Plugin - 通用 Agent 监控插件
 
 __version__ = "0.1.0"
 
-from transports.direct import DirectTransport, create_transport
-from plugins.crewai_plugin import CrewAIPlugin
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.registry import create_transport, register_transport
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.batching import BatchingTransport
+from agent_monitor.transports.pooled import PooledTransport
+from agent_monitor.transports.async_transport import AsyncTransport
+from agent_monitor.transports.tcp import TcpTransport
+from agent_monitor.transports.datagram import DatagramTransport
+from agent_monitor.transports.unix import UnixSocketTransport
+from agent_monitor.transports.shm import ShmRingBuffer, ShmTransport
+from agent_monitor.transports.fanout import FanoutTransport
+from agent_monitor.transports.file import FileTransport
+from agent_monitor.transports.memory import MemoryTransport
+from agent_monitor.plugins.crewai_plugin import CrewAIPlugin
 
 __all__ = [
+    "BaseTransport",
     "DirectTransport",
+    "BatchingTransport",
+    "PooledTransport",
+    "AsyncTransport",
+    "TcpTransport",
+    "DatagramTransport",
+    "UnixSocketTransport",
+    "ShmRingBuffer",
+    "ShmTransport",
+    "FanoutTransport",
+    "FileTransport",
+    "MemoryTransport",
     "create_transport",
+    "register_transport",
     "CrewAIPlugin",
 ]
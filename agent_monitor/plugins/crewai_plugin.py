@@ -4,18 +4,22 @@ CrewAI Monitoring Plugin
 Listens to CrewAI events and sends them to monitoring server
 """
 
+import atexit
 import os
+import signal
 import socket
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Union
 import logging
 
-from agent_monitor.transports.direct import DirectTransport
-from agent_monitor.protocol.unified_event import (
-    MonitorEvent,
-    EventSource,
-    EventMetadata,
-    Language,
-)
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.priority import DEFAULT_EVENT_PRIORITIES, PRIORITY_HIGH
+from agent_monitor.transports.registry import create_transport
+from agent_monitor.utils.identity import Identity, ProcessIdentity
+from agent_monitor.utils.ratelimit import RateLimiter
+from agent_monitor.protocol.record import EventEnvelope, EventRecord
+from agent_monitor.protocol.unified_event import Language
 
 logger = logging.getLogger(__name__)
 
@@ -41,31 +45,79 @@ class CrewAIPlugin:
     def __init__(
         self,
         monitor_url: Optional[str] = None,
-        transport: Optional[DirectTransport] = None,
-        debug: bool = False
+        transport: Optional[BaseTransport] = None,
+        debug: bool = False,
+        shutdown_timeout: Optional[float] = None,
+        rate_limit: Optional[Union[str, RateLimiter]] = None,
+        summary_interval: float = 10.0,
+        strict: Optional[bool] = None
     ):
         """
         Initialize CrewAI Plugin
 
         Args:
-            monitor_url: Monitoring server URL
+            monitor_url: Monitoring server URL; the scheme selects the transport
+                (http(s)://, tcp://, unix://, udp://, file://, memory://, ...)
             transport: Transport instance (optional)
             debug: Enable debug logging and sync send
+            shutdown_timeout: Seconds to wait for queued events at interpreter
+                exit / SIGTERM (default: AGENT_MONITOR_SHUTDOWN_TIMEOUT or 5)
+            rate_limit: Token-bucket limits per (agent_id, event type), either a
+                RateLimiter or a spec such as "20:100,tool_usage_started=5:20"
+                (default: AGENT_MONITOR_RATE_LIMIT, unset means no limit).
+                Lifecycle events are never limited.
+            summary_interval: Seconds between "events_suppressed" summary records
+            strict: Validate every event with the pydantic MonitorEvent model
+                before sending (default: AGENT_MONITOR_STRICT). Off by default,
+                events are built as lightweight EventRecords.
         """
         self.server_id = self._get_server_id()
         self.debug = debug
+        if strict is None:
+            strict = os.getenv("AGENT_MONITOR_STRICT", "false").lower() == "true"
+        self.strict = strict
+        self.identity = ProcessIdentity()
+        self._envelope: Optional[EventEnvelope] = None
+        self._envelope_identity: Optional[Identity] = None
+        if shutdown_timeout is None:
+            shutdown_timeout = float(os.getenv("AGENT_MONITOR_SHUTDOWN_TIMEOUT", "5"))
+        self.shutdown_timeout = shutdown_timeout
 
         if transport:
             self.transport = transport
         else:
             url = monitor_url or os.getenv("AGENT_MONITOR_URL")
             logger.info(f"初始化插件，监控服务器: {url}")
-            self.transport = DirectTransport(
+            self.transport = create_transport(
                 url,
                 silent_fail=not debug  # 调试模式显示错误
             )
 
+        if rate_limit is None:
+            rate_limit = os.getenv("AGENT_MONITOR_RATE_LIMIT") or None
+        # High-priority lifecycle events (agent_error, crew_completed, ...) always go through
+        lifecycle = [t for t, p in DEFAULT_EVENT_PRIORITIES.items() if p == PRIORITY_HIGH]
+        if isinstance(rate_limit, str):
+            rate_limit = RateLimiter.from_spec(rate_limit, exempt=lifecycle)
+        elif rate_limit is not None:
+            rate_limit.exempt = rate_limit.exempt | frozenset(lifecycle)
+        self.rate_limiter: Optional[RateLimiter] = rate_limit
+        self.summary_interval = summary_interval
+        self._last_summary = time.monotonic()
+        self._summary_stop = threading.Event()
+        if self.rate_limiter is not None:
+            threading.Thread(
+                target=self._run_summaries,
+                name="agent-monitor-ratelimit",
+                daemon=True
+            ).start()
+
         self._installed = False
+        self._shutdown_lock = threading.Lock()
+        self._shutdown_result: Optional[int] = None
+        # Thread currently running shutdown(), and a SIGTERM that arrived during it
+        self._shutdown_thread: Optional[int] = None
+        self._sigterm_pending = False
         logger.info(f"CrewAI Plugin initialized (server_id: {self.server_id}, debug={debug})")
 
     def install(self):
@@ -87,10 +139,84 @@ class CrewAIPlugin:
         self._setup_task_monitoring()
         self._setup_tool_monitoring()
         self._setup_relationship_monitoring()
+        self._register_shutdown_hooks()
 
         self._installed = True
         logger.info("CrewAI monitoring plugin installed successfully")
 
+    def shutdown(self, timeout: Optional[float] = None) -> int:
+        """
+        Stop accepting events and flush queued events within a deadline
+
+        Called automatically at interpreter exit and on SIGTERM once the
+        plugin is installed; safe to call more than once.
+
+        Args:
+            timeout: Seconds to wait for queued events (default: shutdown_timeout)
+
+        Returns:
+            Number of events abandoned because the deadline passed
+        """
+        with self._shutdown_lock:
+            if self._shutdown_result is not None:
+                return self._shutdown_result
+
+            if timeout is None:
+                timeout = self.shutdown_timeout
+            self._shutdown_thread = threading.get_ident()
+            try:
+                self._summary_stop.set()
+                self._flush_suppressed()
+                try:
+                    abandoned = self.transport.close(flush=True, timeout=timeout) or 0
+                except Exception as e:
+                    logger.warning(f"Monitoring transport shutdown failed: {e}")
+                    abandoned = 0
+            finally:
+                self._shutdown_thread = None
+
+            if abandoned:
+                logger.warning(f"Monitoring shutdown abandoned {abandoned} events after {timeout}s")
+            else:
+                logger.debug("Monitoring shutdown flushed all events")
+            self._shutdown_result = abandoned
+
+        if self._sigterm_pending:
+            # SIGTERM arrived while this thread was flushing; honour it now
+            self._terminate()
+        return abandoned
+
+    def _register_shutdown_hooks(self):
+        """Flush on interpreter exit, and on SIGTERM when no handler is installed"""
+        atexit.register(self.shutdown)
+
+        # SIGTERM kills the process without running atexit; only take it over
+        # when the application has not installed its own handler
+        if threading.current_thread() is not threading.main_thread():
+            return
+        try:
+            if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+                return
+            signal.signal(signal.SIGTERM, self._on_sigterm)
+        except (ValueError, OSError, AttributeError):
+            pass
+
+    def _on_sigterm(self, signum, frame):
+        """Flush, then terminate with the default SIGTERM behaviour"""
+        if self._shutdown_thread == threading.get_ident():
+            # The signal interrupted shutdown() on this same thread (e.g. during
+            # atexit); re-entering would deadlock on _shutdown_lock, so let the
+            # running shutdown finish and terminate afterwards
+            self._sigterm_pending = True
+            return
+        self.shutdown()
+        self._terminate()
+
+    def _terminate(self):
+        """Re-deliver SIGTERM with the default handler"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
+
     def _setup_crew_monitoring(self):
         """Monitor Crew lifecycle"""
         from crewai.events import crewai_event_bus
@@ -115,32 +241,19 @@ class CrewAIPlugin:
                 if not agent_id:
                     agent_id = f"crew_{event.crew_name or 'unknown'}"
 
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "crew_started",
-                        "data": {
-                            "crew_name": event.crew_name,
-                            "inputs": event.inputs,
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
+                monitor_event = self._build_event(agent_id, {
+                    "type": "crew_started",
+                    "data": {
+                        "crew_name": event.crew_name,
+                        "inputs": event.inputs,
+                    }
+                })
 
                 if self.debug:
-                    success = self.transport.send_sync(monitor_event.to_dict())
+                    success = self._send(monitor_event, sync=True)
                     logger.info(f"[Crew开始] 发送{'成功' if success else '失败'}")
                 else:
-                    self.transport.send(monitor_event.to_dict())
+                    self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[Crew开始] 处理失败: {e}", exc_info=True)
 
@@ -160,29 +273,16 @@ class CrewAIPlugin:
                 if not agent_id:
                     agent_id = f"crew_{event.crew_name or 'unknown'}"
 
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "crew_completed",
-                        "data": {
-                            "crew_name": event.crew_name,
-                            "result": str(event.output)[:500] if event.output else None,
-                            "total_tokens": event.total_tokens,
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
-
-                self.transport.send(monitor_event.to_dict())
+                monitor_event = self._build_event(agent_id, {
+                    "type": "crew_completed",
+                    "data": {
+                        "crew_name": event.crew_name,
+                        "result": str(event.output)[:500] if event.output else None,
+                        "total_tokens": event.total_tokens,
+                    }
+                })
+
+                self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[Crew完成] 处理失败: {e}", exc_info=True)
 
@@ -211,34 +311,21 @@ class CrewAIPlugin:
                     agent_id = f"agent_{event.agent.role}"
 
                 logger.info(f"[Agent上线] {event.agent.role} (ID: {agent_id})")
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "agent_online",
-                        "data": {
-                            "role": event.agent.role,
-                            "goal": getattr(event.agent, 'goal', ''),
-                            "backstory": getattr(event.agent, 'backstory', ''),
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
+                monitor_event = self._build_event(agent_id, {
+                    "type": "agent_online",
+                    "data": {
+                        "role": event.agent.role,
+                        "goal": getattr(event.agent, 'goal', ''),
+                        "backstory": getattr(event.agent, 'backstory', ''),
+                    }
+                })
 
                 if self.debug:
                     # 调试模式使用同步发送，便于调试
-                    success = self.transport.send_sync(monitor_event.to_dict())
+                    success = self._send(monitor_event, sync=True)
                     logger.info(f"[Agent上线] 发送{'成功' if success else '失败'}")
                 else:
-                    self.transport.send(monitor_event.to_dict())
+                    self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[Agent上线] 处理失败: {e}", exc_info=True)
 
@@ -256,30 +343,17 @@ class CrewAIPlugin:
             if not agent_id:
                 agent_id = f"agent_{event.agent.role}"
 
-            monitor_event = MonitorEvent(
-                source=EventSource(
-                    server_id=self.server_id,
-                    agent_id=agent_id,
-                    framework="crewai",
-                    language=Language.python,
-                    process_id=os.getpid(),
-                ),
-                event={
-                    "type": "agent_offline",
-                    "data": {
-                        "role": event.agent.role,
-                        "result": str(event.output.raw)[:1000]
-                        if event.output
-                        else None,
-                    }
-                },
-                metadata=EventMetadata(
-                    hostname=socket.gethostname(),
-                    ip_address=self._get_local_ip(),
-                ),
-            )
+            monitor_event = self._build_event(agent_id, {
+                "type": "agent_offline",
+                "data": {
+                    "role": event.agent.role,
+                    "result": str(event.output.raw)[:1000]
+                    if event.output
+                    else None,
+                }
+            })
 
-            self.transport.send(monitor_event.to_dict())
+            self._send(monitor_event)
 
         @crewai_event_bus.on(AgentExecutionErrorEvent)
         def on_agent_error(source, event):
@@ -295,28 +369,15 @@ class CrewAIPlugin:
             if not agent_id:
                 agent_id = f"agent_{event.agent.role}"
 
-            monitor_event = MonitorEvent(
-                source=EventSource(
-                    server_id=self.server_id,
-                    agent_id=agent_id,
-                    framework="crewai",
-                    language=Language.python,
-                    process_id=os.getpid(),
-                ),
-                event={
-                    "type": "agent_error",
-                    "data": {
-                        "role": event.agent.role,
-                        "error": str(event.error),
-                    }
-                },
-                metadata=EventMetadata(
-                    hostname=socket.gethostname(),
-                    ip_address=self._get_local_ip(),
-                ),
-            )
+            monitor_event = self._build_event(agent_id, {
+                "type": "agent_error",
+                "data": {
+                    "role": event.agent.role,
+                    "error": str(event.error),
+                }
+            })
 
-            self.transport.send(monitor_event.to_dict())
+            self._send(monitor_event)
 
     def _setup_llm_monitoring(self):
         """Monitor LLM calls (thinking state)"""
@@ -329,32 +390,19 @@ class CrewAIPlugin:
             try:
                 agent_id = event.agent_id or event.agent_role or "unknown"
                 logger.info(f"[Agent思考] {agent_id} 开始调用 LLM")
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "agent_thinking",
-                        "data": {
-                            "action": "thinking",
-                            "model": event.model or 'unknown',
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
+                monitor_event = self._build_event(agent_id, {
+                    "type": "agent_thinking",
+                    "data": {
+                        "action": "thinking",
+                        "model": event.model or 'unknown',
+                    }
+                })
 
                 if self.debug:
-                    success = self.transport.send_sync(monitor_event.to_dict())
+                    success = self._send(monitor_event, sync=True)
                     logger.info(f"[Agent思考] 发送{'成功' if success else '失败'}")
                 else:
-                    self.transport.send(monitor_event.to_dict())
+                    self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[Agent思考] 处理失败: {e}", exc_info=True)
 
@@ -364,27 +412,14 @@ class CrewAIPlugin:
             try:
                 agent_id = event.agent_id or event.agent_role or "unknown"
                 logger.info(f"[Agent思考完成] {agent_id}")
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "agent_thinking",
-                        "data": {
-                            "action": "completed",
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
-
-                self.transport.send(monitor_event.to_dict())
+                monitor_event = self._build_event(agent_id, {
+                    "type": "agent_thinking",
+                    "data": {
+                        "action": "completed",
+                    }
+                })
+
+                self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[Agent思考完成] 处理失败: {e}", exc_info=True)
 
@@ -411,33 +446,19 @@ class CrewAIPlugin:
                     agent_id = "agent_unknown"
 
                 logger.info(f"[Agent工作] {event.task.agent.role if event.task.agent else 'Unknown'} - {event.task.description[:50] if hasattr(event.task, 'description') else ''}...")
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "agent_working",
-                        "data": {
-                            "task": event.task.description,
-                            "expected_output": event.task.expected_output,
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                        tags={}
-                    ),
-                )
+                monitor_event = self._build_event(agent_id, {
+                    "type": "agent_working",
+                    "data": {
+                        "task": event.task.description,
+                        "expected_output": event.task.expected_output,
+                    }
+                })
 
                 if self.debug:
-                    success = self.transport.send_sync(monitor_event.to_dict())
+                    success = self._send(monitor_event, sync=True)
                     logger.info(f"[Agent工作] 发送{'成功' if success else '失败'}")
                 else:
-                    self.transport.send(monitor_event.to_dict())
+                    self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[Agent工作] 处理失败: {e}", exc_info=True)
 
@@ -452,28 +473,15 @@ class CrewAIPlugin:
             try:
                 agent_id = event.agent_id or event.agent_role or "unknown"
                 logger.info(f"[工具使用] {agent_id} 使用 {event.tool_name}")
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "tool_usage_started",
-                        "data": {
-                            "tool_name": event.tool_name,
-                            "tool_args": str(event.tool_args)[:500],
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
-
-                self.transport.send(monitor_event.to_dict())
+                monitor_event = self._build_event(agent_id, {
+                    "type": "tool_usage_started",
+                    "data": {
+                        "tool_name": event.tool_name,
+                        "tool_args": str(event.tool_args)[:500],
+                    }
+                })
+
+                self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[工具使用] 处理失败: {e}", exc_info=True)
 
@@ -483,28 +491,15 @@ class CrewAIPlugin:
             try:
                 agent_id = event.agent_id or event.agent_role or "unknown"
                 logger.info(f"[工具完成] {agent_id} 完成 {event.tool_name}")
-                monitor_event = MonitorEvent(
-                    source=EventSource(
-                        server_id=self.server_id,
-                        agent_id=agent_id,
-                        framework="crewai",
-                        language=Language.python,
-                        process_id=os.getpid(),
-                    ),
-                    event={
-                        "type": "tool_usage_finished",
-                        "data": {
-                            "tool_name": event.tool_name,
-                            "result": str(event.output)[:500] if event.output else '',
-                        }
-                    },
-                    metadata=EventMetadata(
-                        hostname=socket.gethostname(),
-                        ip_address=self._get_local_ip(),
-                    ),
-                )
-
-                self.transport.send(monitor_event.to_dict())
+                monitor_event = self._build_event(agent_id, {
+                    "type": "tool_usage_finished",
+                    "data": {
+                        "tool_name": event.tool_name,
+                        "result": str(event.output)[:500] if event.output else '',
+                    }
+                })
+
+                self._send(monitor_event)
             except Exception as e:
                 logger.error(f"[工具完成] 处理失败: {e}", exc_info=True)
 
@@ -516,44 +511,104 @@ class CrewAIPlugin:
         @crewai_event_bus.on(A2ADelegationStartedEvent)
         def on_delegation(source, event):
             """Agent delegates task"""
-            monitor_event = MonitorEvent(
-                source=EventSource(
-                    server_id=self.server_id,
-                    agent_id=event.agent_id or "unknown",
-                    framework="crewai",
-                    language=Language.python,
-                    process_id=os.getpid(),
-                ),
-                event={
-                    "type": "agent_relationship",
-                    "data": {
-                        "relationship_type": "delegate",
-                        "from_agent": event.agent_id or "unknown",
-                        "to_agent": event.a2a_agent_name or "unknown",
-                    }
-                },
-                metadata=EventMetadata(
-                    hostname=socket.gethostname(),
-                    ip_address=self._get_local_ip(),
-                ),
+            monitor_event = self._build_event(event.agent_id or "unknown", {
+                "type": "agent_relationship",
+                "data": {
+                    "relationship_type": "delegate",
+                    "from_agent": event.agent_id or "unknown",
+                    "to_agent": event.a2a_agent_name or "unknown",
+                }
+            })
+
+            self._send(monitor_event)
+
+    def _send(self, record: EventRecord, sync: bool = False) -> bool:
+        """Send an event unless its (agent_id, event type) bucket is out of tokens"""
+        if self.rate_limiter is not None and not self.rate_limiter.allow(
+            record.agent_id, record.event.get("type", "")
+        ):
+            return False
+
+        event = self._serialize(record)
+        if sync:
+            return self.transport.send_sync(event)
+        return self.transport.send(event)
+
+    def _run_summaries(self):
+        """Background thread: periodically report suppressed events"""
+        while not self._summary_stop.wait(self.summary_interval):
+            try:
+                self._flush_suppressed()
+            except Exception as e:
+                logger.error(f"[限流] 汇总失败: {e}", exc_info=True)
+
+    def _flush_suppressed(self) -> int:
+        """
+        Send one "events_suppressed" record per throttled (agent_id, event type)
+
+        Returns:
+            Number of events suppressed since the previous summary
+        """
+        if self.rate_limiter is None:
+            return 0
+
+        suppressed = self.rate_limiter.drain_suppressed()
+        now = time.monotonic()
+        window = now - self._last_summary
+        self._last_summary = now
+
+        for (agent_id, event_type), count in suppressed.items():
+            self.transport.send(self._serialize(self._build_event(agent_id, {
+                "type": "events_suppressed",
+                "data": {
+                    "event_type": event_type,
+                    "count": count,
+                    "window_seconds": round(window, 3),
+                }
+            })))
+
+        total = sum(suppressed.values())
+        if total:
+            logger.warning(f"[限流] {window:.1f} 秒内抑制了 {total} 个事件 ({len(suppressed)} 个 agent/事件类型)")
+        return total
+
+    def _build_event(self, agent_id: str, event: Dict[str, Any]) -> EventRecord:
+        """Build a monitor event originating from this process"""
+        return self._get_envelope().record(agent_id, event)
+
+    def _get_envelope(self) -> EventEnvelope:
+        """Static source/metadata fields, rebuilt when the cached process identity changes"""
+        identity = self.identity.get()
+        if identity is not self._envelope_identity:
+            self._envelope = EventEnvelope(
+                server_id=self.server_id,
+                framework="crewai",
+                language=Language.python,
+                process_id=identity.process_id,
+                hostname=identity.hostname,
+                ip_address=identity.ip_address,
             )
+            self._envelope_identity = identity
+        return self._envelope
 
-            self.transport.send(monitor_event.to_dict())
+    def _serialize(self, record: EventRecord) -> Dict[str, Any]:
+        """
+        Convert a record to its wire dict, validating it first in strict mode
+
+        Transports that set deferred_timestamps receive the raw nanoseconds and
+        format the timestamp on their sender thread instead of the agent thread.
+        """
+        if self.strict:
+            return record.to_model().to_dict()
+        return record.to_dict(deferred=getattr(self.transport, "deferred_timestamps", False))
 
     def _get_server_id(self) -> str:
         """Get unique server identifier"""
         return os.getenv("AGENT_SERVER_ID", socket.gethostname())
 
     def _get_local_ip(self) -> Optional[str]:
-        """Get local IP address"""
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
-            return None
+        """Get local IP address (cached, see ProcessIdentity)"""
+        return self.identity.get().ip_address
 
 
 # Auto-install if environment variables are set
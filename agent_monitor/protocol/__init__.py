@@ -0,0 +1 @@
+# Protocol module
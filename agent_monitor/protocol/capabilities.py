@@ -0,0 +1,28 @@
+"""
+服务器能力协商
+
+服务器在 GET /api/health 的 JSON 响应体中声明支持的可选功能：
+
+    {"status": "ok", "features": ["dictionary", "epoch_ns", "wire_v2"]}
+
+也接受 {"dictionary": true} 这样的单独字段。各功能的名称见对应模块的 FEATURE
+（dictionary / timestamps / compact），压缩编码单独协商（见 agent_monitor.utils.compression）
+"""
+
+from typing import Any
+
+
+def server_supports(body: Any, feature: str) -> bool:
+    """
+    从健康检查的 JSON 响应体判断服务器是否支持某个功能
+
+    Args:
+        body: 已解析的 JSON 响应体，解析失败时为 None
+        feature: 功能名称
+    """
+    if not isinstance(body, dict):
+        return False
+    features = body.get("features") or []
+    if isinstance(features, str):
+        features = [features]
+    return feature in features or body.get(feature) is True
@@ -0,0 +1,219 @@
+"""
+紧凑线格式 v2 - 短字段名和整数编码
+
+v1（默认）每个事件都带完整的字段名和字符串值。v2 把事件展平为一层短字段：
+
+    {"v": "2.0", "ts": 1792209051205731018, "sv": "host-1", "ag": "researcher",
+     "fw": 1, "lg": 1, "pid": 4242, "et": 17, "d": {...}, "hn": "host-1", "ip": "10.0.0.5"}
+
+- 时间戳为整数纳秒（UTC）
+- 事件类型、语言、框架使用整数编码（见 EVENT_TYPE_CODES 等），
+  编码表中没有的值原样以字符串发送，解码时两种形式都接受
+- 值为 None 的可选字段（pid / ip）和空的 tags（tg）省略，解码时 tags 默认为 {}
+- event 中 type / data 以外的字段放在 "x" 中
+
+服务器通过 /api/health 声明支持: {"features": ["wire_v2"]}（见 agent_monitor.protocol.capabilities），客户端第一次使用 v2 前
+把 schema_descriptor() 发送到 POST /api/schema，之后的请求带 X-Schema-Id，
+服务器据此选择对应的编码表解码。编码表只能追加，不能修改已有的编码
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from agent_monitor.protocol.serializer import epoch_timestamp
+from agent_monitor.protocol.timestamps import format_ns
+from agent_monitor.protocol.unified_event import EventType, Language
+
+VERSION = "2.0"
+PROTOCOL = "agent-monitor"
+
+# 服务器声明的能力名称
+FEATURE = "wire_v2"
+
+# HTTP 批量请求的内容类型
+CONTENT_TYPE = "application/vnd.agent-monitor.v2+json"
+
+# 请求头：本次请求使用的编码表
+SCHEMA_HEADER = "X-Schema-Id"
+
+# 编码表（只能追加）
+EVENT_TYPE_CODES: Dict[str, int] = {
+    EventType.agent_online.value: 1,
+    EventType.agent_offline.value: 2,
+    EventType.agent_error.value: 3,
+    EventType.agent_working.value: 4,
+    EventType.agent_thinking.value: 5,
+    EventType.agent_using_tool.value: 6,
+    EventType.agent_relationship.value: 7,
+    EventType.method_call.value: 8,
+    EventType.method_return.value: 9,
+    EventType.method_error.value: 10,
+    EventType.llm_call_start.value: 11,
+    EventType.llm_call_end.value: 12,
+    EventType.llm_stream_chunk.value: 13,
+    EventType.events_suppressed.value: 14,
+    EventType.crew_started.value: 15,
+    EventType.crew_completed.value: 16,
+    EventType.tool_usage_started.value: 17,
+    EventType.tool_usage_finished.value: 18,
+}
+
+LANGUAGE_CODES: Dict[str, int] = {
+    Language.python.value: 1,
+    Language.typescript.value: 2,
+    Language.javascript.value: 3,
+    Language.rust.value: 4,
+    Language.go.value: 5,
+    Language.java.value: 6,
+}
+
+FRAMEWORK_CODES: Dict[str, int] = {
+    "crewai": 1,
+    "langgraph": 2,
+    "autogen": 3,
+    "openclaw": 4,
+}
+
+# 短字段名 -> v1 字段路径
+FIELDS: Dict[str, str] = {
+    "v": "version",
+    "p": "protocol",
+    "ts": "timestamp",
+    "sv": "source.server_id",
+    "ag": "source.agent_id",
+    "fw": "source.framework",
+    "lg": "source.language",
+    "pid": "source.process_id",
+    "et": "event.type",
+    "d": "event.data",
+    "x": "event.*",
+    "hn": "metadata.hostname",
+    "ip": "metadata.ip_address",
+    "tg": "metadata.tags",
+}
+
+_EVENT_TYPES = {code: name for name, code in EVENT_TYPE_CODES.items()}
+_LANGUAGES = {code: name for name, code in LANGUAGE_CODES.items()}
+_FRAMEWORKS = {code: name for name, code in FRAMEWORK_CODES.items()}
+
+
+class CompactError(ValueError):
+    """v2 事件格式错误"""
+
+
+def schema_descriptor() -> Dict[str, Any]:
+    """编码表描述（发送到服务器的 /api/schema）"""
+    return {
+        "protocol": PROTOCOL,
+        "version": VERSION,
+        "timestamp": "epoch_ns",
+        "fields": dict(FIELDS),
+        "codes": {
+            "event_type": {str(code): name for code, name in _EVENT_TYPES.items()},
+            "language": {str(code): name for code, name in _LANGUAGES.items()},
+            "framework": {str(code): name for code, name in _FRAMEWORKS.items()},
+        },
+    }
+
+
+def _schema_id() -> str:
+    canonical = json.dumps(schema_descriptor(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+SCHEMA_ID = _schema_id()
+
+
+def encode_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    v1 事件字典 -> v2 紧凑字典
+
+    Args:
+        event: v1 事件（EventRecord.to_dict() / MonitorEvent.to_dict() 的输出）
+    """
+    source = event.get("source") or {}
+    body = event.get("event") or {}
+    metadata = event.get("metadata") or {}
+
+    event_type = body.get("type")
+    framework = source.get("framework")
+    language = source.get("language")
+
+    compact: Dict[str, Any] = {
+        "v": VERSION,
+        "ts": epoch_timestamp(event),
+        "sv": source.get("server_id"),
+        "ag": source.get("agent_id"),
+        "fw": FRAMEWORK_CODES.get(framework, framework),
+        "lg": LANGUAGE_CODES.get(language, language),
+        "et": EVENT_TYPE_CODES.get(event_type, event_type),
+        "d": body.get("data"),
+        "hn": metadata.get("hostname"),
+    }
+    protocol = event.get("protocol", PROTOCOL)
+    if protocol != PROTOCOL:
+        compact["p"] = protocol
+    if source.get("process_id") is not None:
+        compact["pid"] = source["process_id"]
+    if metadata.get("ip_address") is not None:
+        compact["ip"] = metadata["ip_address"]
+    if metadata.get("tags"):
+        compact["tg"] = metadata["tags"]
+    extra = {key: value for key, value in body.items() if key not in ("type", "data")}
+    if extra:
+        compact["x"] = extra
+    return compact
+
+
+def encode_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """编码事件列表"""
+    return [encode_event(event) for event in events]
+
+
+def decode_event(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    v2 紧凑字典 -> v1 事件字典（timestamp 为 ISO-8601 字符串）
+
+    Raises:
+        CompactError: 版本不是 2.0
+    """
+    if compact.get("v") != VERSION:
+        raise CompactError(f"不支持的线格式版本: {compact.get('v')}")
+
+    def lookup(table: Dict[int, str], value: Any) -> Any:
+        if isinstance(value, int):
+            if value not in table:
+                raise CompactError(f"未知的编码: {value}")
+            return table[value]
+        return value
+
+    timestamp = compact.get("ts")
+    body: Dict[str, Any] = {"type": lookup(_EVENT_TYPES, compact.get("et"))}
+    if "d" in compact:
+        body["data"] = compact["d"]
+    body.update(compact.get("x") or {})
+
+    return {
+        "protocol": compact.get("p", PROTOCOL),
+        "version": "1.0",
+        "timestamp": format_ns(timestamp) if isinstance(timestamp, int) else timestamp,
+        "source": {
+            "server_id": compact.get("sv"),
+            "agent_id": compact.get("ag"),
+            "framework": lookup(_FRAMEWORKS, compact.get("fw")),
+            "language": lookup(_LANGUAGES, compact.get("lg")),
+            "process_id": compact.get("pid"),
+        },
+        "event": body,
+        "metadata": {
+            "hostname": compact.get("hn"),
+            "ip_address": compact.get("ip"),
+            "tags": compact.get("tg", {}),
+        },
+    }
+
+
+def decode_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """解码事件列表"""
+    return [decode_event(event) for event in events]
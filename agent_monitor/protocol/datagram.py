@@ -0,0 +1,127 @@
+"""
+数据报协议 - 用于 udp:// 和 unixgram:// 传输
+
+每个数据报携带一个事件（或一个事件的分片）:
+    +--------+---------+----------+-------------+-----------+-----------+---------+
+    | "AM"   | ver u8  | codec u8 | msg_id u64  | index u16 | count u16 | payload |
+    +--------+---------+----------+-------------+-----------+-----------+---------+
+
+- 未超出单个数据报大小的事件 count 为 1
+- 超出的事件按 payload 切片，接收方按 msg_id 重组，任一分片丢失则整条丢弃
+- codec 与 agent_monitor.protocol.framing 相同（MessagePack / JSON）
+"""
+
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from agent_monitor.protocol import framing
+
+HEADER = struct.Struct(">2sBBQHH")
+MAGIC = b"AM"
+VERSION = 1
+
+
+def encode_datagrams(
+    payload: bytes,
+    msg_id: int,
+    codec: int,
+    max_size: int,
+    max_chunks: int
+) -> Optional[List[bytes]]:
+    """
+    将编码后的事件切分为数据报
+
+    Args:
+        payload: 已编码的事件
+        msg_id: 消息 ID（进程内唯一）
+        codec: payload 编码
+        max_size: 单个数据报最大字节数（含头部）
+        max_chunks: 最多分片数
+
+    Returns:
+        数据报列表，超出分片上限时返回 None
+    """
+    chunk_size = max_size - HEADER.size
+    if chunk_size <= 0:
+        raise ValueError(f"数据报大小过小: {max_size}")
+
+    count = max(1, -(-len(payload) // chunk_size))
+    if count > max_chunks:
+        return None
+
+    msg_id &= 0xFFFFFFFFFFFFFFFF
+    return [
+        HEADER.pack(MAGIC, VERSION, codec, msg_id, index, count)
+        + payload[index * chunk_size:(index + 1) * chunk_size]
+        for index in range(count)
+    ]
+
+
+def decode_datagram(data: bytes) -> Tuple[int, int, int, int, bytes]:
+    """
+    解析数据报
+
+    Returns:
+        (codec, msg_id, index, count, payload 分片)
+    """
+    if len(data) < HEADER.size:
+        raise framing.FrameError("数据报过短")
+    magic, version, codec, msg_id, index, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise framing.FrameError("无效的数据报头")
+    return codec, msg_id, index, count, data[HEADER.size:]
+
+
+class Reassembler:
+    """
+    接收端分片重组
+
+    分片可以乱序到达；未完成的消息超过 ttl 秒后丢弃并计入 expired
+    （分片丢失时不会无限占用内存）
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self.expired = 0
+        self._partial: Dict[Tuple[Any, int], Tuple[float, List[Optional[bytes]]]] = {}
+
+    def feed(self, data: bytes, sender: Any = None) -> Optional[Any]:
+        """
+        输入一个数据报
+
+        Args:
+            data: 数据报字节
+            sender: 发送方地址（不同发送方的 msg_id 可能重复）
+
+        Returns:
+            完整事件，尚未收齐时返回 None
+        """
+        codec, msg_id, index, count, chunk = decode_datagram(data)
+        if index >= count:
+            raise framing.FrameError(f"无效的分片序号: {index}/{count}")
+        if count == 1:
+            return framing.decode_payload(chunk, codec)
+
+        now = time.monotonic()
+        self._expire(now)
+
+        key = (sender, msg_id)
+        started, chunks = self._partial.setdefault(key, (now, [None] * count))
+        if len(chunks) != count:
+            raise framing.FrameError(f"分片数不一致: {count} != {len(chunks)}")
+        chunks[index] = chunk
+
+        if any(part is None for part in chunks):
+            return None
+        del self._partial[key]
+        return framing.decode_payload(b"".join(chunks), codec)
+
+    def _expire(self, now: float):
+        expired = [
+            key for key, (started, _) in self._partial.items()
+            if now - started > self.ttl
+        ]
+        for key in expired:
+            del self._partial[key]
+        self.expired += len(expired)
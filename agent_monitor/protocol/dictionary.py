@@ -0,0 +1,189 @@
+"""
+字典编码 - 重复的 source / metadata 块只发送一次
+
+同一进程发出的事件，除 source.agent_id、timestamp 和 event 外几乎完全相同
+（protocol、version、server_id、framework、language、process_id、hostname、ip_address）。
+字典编码把这部分公共块提取出来，用一个短句柄代替：
+
+    {
+        "blocks": {"1": {"protocol": ..., "version": ..., "source": {...}, "metadata": {...}}},
+        "events": [{"h": 1, "agent_id": "...", "timestamp": "...", "event": {...}}, ...]
+    }
+
+- 按连接编码（tcp:// / unix://）：BlockEncoder / BlockDecoder 在连接的生命周期内
+  保留句柄表，每个块只在该连接上第一次出现时发送，断线重连后重新开始
+- 按批次编码（HTTP 批量接口）：encode_batch() 每个批次独立，只在批次内去重
+- 无法提取公共块的事件（缺少 source.agent_id）原样放入 events，不带 "h"
+- 句柄表超过上限时编码器先清空再编码，该批次带 "reset": true，接收方同步清空
+
+服务器通过 /api/health 声明支持: {"dictionary": true} 或 {"features": ["dictionary"]}
+（见 agent_monitor.protocol.capabilities）
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 服务器声明的能力名称
+FEATURE = "dictionary"
+
+# 每个事件自己携带的顶层字段，其余顶层字段都属于公共块
+_EVENT_FIELDS = ("timestamp", "event")
+
+# 紧凑事件中的句柄字段
+HANDLE = "h"
+
+# 按连接编码时句柄表的默认上限
+DEFAULT_MAX_BLOCKS = 1024
+
+# HTTP 批量请求的内容类型
+CONTENT_TYPE = "application/vnd.agent-monitor.dict+json"
+
+
+class DictionaryError(ValueError):
+    """引用了未定义的句柄"""
+
+
+def split_event(event: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """
+    把事件拆分为公共块和 agent_id
+
+    Returns:
+        (公共块, agent_id)，无法拆分时返回 (None, None)
+    """
+    source = event.get("source")
+    if not isinstance(source, dict) or "agent_id" not in source:
+        return None, None
+
+    block = {key: value for key, value in event.items() if key not in _EVENT_FIELDS}
+    block["source"] = {key: value for key, value in source.items() if key != "agent_id"}
+    return block, source["agent_id"]
+
+
+def _block_key(block: Dict[str, Any]) -> str:
+    return json.dumps(block, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class BlockEncoder:
+    """
+    字典编码器
+
+    同一个编码器的输出必须按顺序交给同一个 BlockDecoder（同一连接），
+    连接断开后调用 reset()
+    """
+
+    def __init__(self, max_blocks: int = DEFAULT_MAX_BLOCKS):
+        """
+        初始化编码器
+
+        Args:
+            max_blocks: 句柄表上限，达到后在下一个批次前清空
+        """
+        self.max_blocks = max_blocks
+        self._handles: Dict[str, int] = {}
+
+    def reset(self):
+        """清空句柄表（连接断开时调用，新连接上的块会重新发送）"""
+        self._handles = {}
+
+    def encode(
+        self,
+        events: List[Dict[str, Any]],
+        timestamp: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        编码一个批次
+
+        Args:
+            events: 完整事件列表
+            timestamp: 从事件取得输出中 timestamp 的函数（如 serializer.epoch_timestamp），
+                默认原样使用事件的 timestamp
+
+        Returns:
+            {"blocks": 本批次新定义的块, "events": 紧凑事件列表}，
+            句柄表被清空时带 "reset": true
+        """
+        payload: Dict[str, Any] = {}
+        if len(self._handles) >= self.max_blocks:
+            # 公共块不断变化（如 tags 中带有请求 ID），清空后重新编号
+            self._handles = {}
+            payload["reset"] = True
+
+        blocks: Dict[str, Any] = {}
+        compact = []
+        for event in events:
+            block, agent_id = split_event(event)
+            if block is None:
+                compact.append(event if timestamp is None else dict(event, timestamp=timestamp(event)))
+                continue
+
+            key = _block_key(block)
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = len(self._handles) + 1
+                self._handles[key] = handle
+                blocks[str(handle)] = block
+
+            compact.append({
+                HANDLE: handle,
+                "agent_id": agent_id,
+                "timestamp": event.get("timestamp") if timestamp is None else timestamp(event),
+                "event": event.get("event"),
+            })
+
+        payload["blocks"] = blocks
+        payload["events"] = compact
+        return payload
+
+
+class BlockDecoder:
+    """字典解码器（每个连接一个）"""
+
+    def __init__(self):
+        self._blocks: Dict[str, Dict[str, Any]] = {}
+
+    def decode(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        解码一个批次，登记其中新定义的块
+
+        Args:
+            payload: BlockEncoder.encode() 的输出
+
+        Returns:
+            完整事件列表
+
+        Raises:
+            DictionaryError: 引用了未定义的句柄
+        """
+        if payload.get("reset"):
+            self._blocks = {}
+        self._blocks.update(payload.get("blocks") or {})
+
+        events = []
+        for item in payload.get("events") or []:
+            if HANDLE not in item:
+                events.append(item)
+                continue
+
+            block = self._blocks.get(str(item[HANDLE]))
+            if block is None:
+                raise DictionaryError(f"未定义的句柄: {item[HANDLE]}")
+
+            event = dict(block)
+            event["source"] = dict(block.get("source") or {}, agent_id=item.get("agent_id"))
+            event["timestamp"] = item.get("timestamp")
+            event["event"] = item.get("event")
+            events.append(event)
+        return events
+
+
+def encode_batch(
+    events: List[Dict[str, Any]],
+    timestamp: Optional[Callable[[Dict[str, Any]], Any]] = None
+) -> Dict[str, Any]:
+    """按批次编码（无连接状态，块在批次内去重），timestamp 同 BlockEncoder.encode()"""
+    return BlockEncoder(max_blocks=len(events) + 1).encode(events, timestamp)
+
+
+def decode_batch(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """解码 encode_batch() 的输出"""
+    return BlockDecoder().decode(payload)
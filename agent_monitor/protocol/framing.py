@@ -0,0 +1,145 @@
+"""
+二进制帧协议 - 用于 tcp:// 等流式传输
+
+帧格式（大端）:
+    +----------------+---------+----------+-------------+-----------+
+    | length (u32)   | type u8 | codec u8 | seq (u32)   | payload   |
+    +----------------+---------+----------+-------------+-----------+
+
+- length: payload 字节数（不含头部）
+- type: 帧类型，BATCH 为事件批次，DICT_BATCH 为字典编码的事件批次
+  （见 agent_monitor.protocol.dictionary，句柄表按连接保存），V2_BATCH 为紧凑线格式 v2
+  的事件批次（见 agent_monitor.protocol.compact），ACK 为接收方确认
+- codec: payload 编码，MessagePack（安装 msgpack 时）或紧凑 JSON
+- seq: 批次序号，接收方以相同 seq 回复 ACK（payload 为空）
+
+发送方在收到 ACK 之前保留批次，断线重连后重发，保证至少一次投递
+"""
+
+import json
+import struct
+from typing import Any, List, Tuple
+
+from agent_monitor.protocol import serializer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+HEADER = struct.Struct(">IBBI")
+
+# 帧类型
+FRAME_BATCH = 1
+FRAME_ACK = 2
+FRAME_DICT_BATCH = 3
+FRAME_V2_BATCH = 4
+
+# payload 编码
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+# 单帧最大 payload（字节），防止异常长度导致内存耗尽
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+
+class FrameError(ValueError):
+    """帧格式错误"""
+
+
+def default_codec() -> int:
+    """优先使用 MessagePack，未安装时回退到 JSON"""
+    return CODEC_MSGPACK if msgpack is not None else CODEC_JSON
+
+
+def encode_payload(obj: Any, codec: int) -> bytes:
+    """按编码序列化 payload"""
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise FrameError("MessagePack 编码需要安装 msgpack")
+        if isinstance(obj, list):
+            obj = [serializer.resolve(item) for item in obj]
+        else:
+            obj = serializer.resolve(obj)
+        return msgpack.packb(obj, default=str, use_bin_type=True)
+    if codec == CODEC_JSON:
+        if isinstance(obj, list):
+            return serializer.encode_events(obj)
+        return serializer.encode_event(obj)
+    raise FrameError(f"未知的编码: {codec}")
+
+
+def decode_payload(payload: bytes, codec: int) -> Any:
+    """按编码反序列化 payload"""
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise FrameError("MessagePack 解码需要安装 msgpack")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(payload)
+    raise FrameError(f"未知的编码: {codec}")
+
+
+def encode_frame(frame_type: int, codec: int, seq: int, payload: bytes = b"") -> bytes:
+    """构造一个完整的帧"""
+    if len(payload) > MAX_PAYLOAD:
+        raise FrameError(f"帧过大: {len(payload)} 字节")
+    return HEADER.pack(len(payload), frame_type, codec, seq) + payload
+
+
+def encode_batch(events: List[dict], seq: int, codec: int) -> bytes:
+    """构造事件批次帧"""
+    return encode_frame(FRAME_BATCH, codec, seq, encode_payload(events, codec))
+
+
+def encode_dict_batch(payload: dict, seq: int, codec: int) -> bytes:
+    """构造字典编码的事件批次帧（payload 为 BlockEncoder.encode() 的输出）"""
+    return encode_frame(FRAME_DICT_BATCH, codec, seq, encode_payload(payload, codec))
+
+
+def encode_v2_batch(events: List[dict], seq: int, codec: int) -> bytes:
+    """构造紧凑线格式 v2 的事件批次帧（events 为 compact.encode_events() 的输出）"""
+    return encode_frame(FRAME_V2_BATCH, codec, seq, encode_payload(events, codec))
+
+
+def encode_ack(seq: int) -> bytes:
+    """构造确认帧"""
+    return encode_frame(FRAME_ACK, CODEC_JSON, seq)
+
+
+def decode_header(header: bytes) -> Tuple[int, int, int, int]:
+    """
+    解析帧头
+
+    Returns:
+        (payload 长度, 帧类型, 编码, 序号)
+    """
+    length, frame_type, codec, seq = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise FrameError(f"帧过大: {length} 字节")
+    return length, frame_type, codec, seq
+
+
+def recv_exactly(sock, size: int) -> bytes:
+    """从阻塞 socket 读取指定字节数，连接关闭时抛出 ConnectionError"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            raise ConnectionError("连接已关闭")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock) -> Tuple[int, int, int, bytes]:
+    """
+    从阻塞 socket 读取一个帧
+
+    Returns:
+        (帧类型, 编码, 序号, payload)
+    """
+    length, frame_type, codec, seq = decode_header(recv_exactly(sock, HEADER.size))
+    payload = recv_exactly(sock, length) if length else b""
+    return frame_type, codec, seq, payload
@@ -0,0 +1,176 @@
+"""
+轻量事件记录 - 热路径上代替 pydantic MonitorEvent
+
+每个 CrewAI 回调原本要构造三个 pydantic 模型（MonitorEvent / EventSource / EventMetadata），
+再由 to_dict() 调用两次 model_dump()，这些开销都在 Agent 线程上。
+
+同一进程发出的事件中，除 agent_id、timestamp 和 event 外的字段都不变：
+- EventEnvelope 保存这些不变字段，并预先生成序列化函数
+- EventRecord 使用 __slots__，只保存 envelope、agent_id、event 和纳秒时间戳
+  （见 agent_monitor.protocol.timestamps）
+- EventRecord.to_dict() 的输出与 MonitorEvent.to_dict() 字段、顺序和值类型都相同
+  （只包含 JSON 原生类型，timestamp 为 ISO-8601 字符串），
+  返回的 RenderedEvent 带有 envelope 的预渲染字节和纳秒时间戳，序列化时只编码每个事件不同的字段
+  （见 agent_monitor.protocol.serializer）
+- to_dict(deferred=True) 不格式化时间戳（timestamp 为 None），由传输器的序列化器在发送线程上
+  根据 RenderedEvent.ns 格式化；只交给声明 deferred_timestamps 的传输器（见 BaseTransport）
+
+需要校验时（严格模式或接收端检查）调用 EventRecord.to_model() 构造 pydantic 模型
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from agent_monitor.protocol import timestamps
+from agent_monitor.protocol.serializer import RenderedEvent, render_fragments
+from agent_monitor.protocol.unified_event import (
+    EventMetadata,
+    EventSource,
+    Language,
+    MonitorEvent,
+)
+
+PROTOCOL = "agent-monitor"
+VERSION = "1.0"
+
+
+class EventEnvelope:
+    """
+    进程内不变的事件字段（source 中除 agent_id 外的字段和 metadata）
+
+    构造时生成序列化函数，每个事件只需要填入 agent_id、timestamp 和 event
+    """
+
+    __slots__ = (
+        "server_id", "framework", "language", "process_id",
+        "hostname", "ip_address", "tags", "_serialize",
+    )
+
+    def __init__(
+        self,
+        server_id: str,
+        framework: str,
+        language: str = Language.python.value,
+        process_id: Optional[int] = None,
+        hostname: str = "",
+        ip_address: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None
+    ):
+        """
+        初始化 envelope
+
+        Args:
+            server_id: 服务器唯一标识
+            framework: 框架名称
+            language: 编程语言
+            process_id: 进程 ID
+            hostname: 主机名
+            ip_address: IP 地址
+            tags: 自定义标签，没有标签时发送空对象 {}（与原有事件格式一致）
+        """
+        self.server_id = server_id
+        self.framework = framework
+        self.language = Language(language).value
+        self.process_id = process_id
+        self.hostname = hostname
+        self.ip_address = ip_address
+        self.tags = dict(tags) if tags else {}
+        self._serialize = self._compile()
+
+    def _compile(self) -> Callable[[str, int, Dict[str, Any], bool], Dict[str, Any]]:
+        """生成序列化函数，不变字段绑定为局部变量"""
+        server_id = self.server_id
+        framework = self.framework
+        language = self.language
+        process_id = self.process_id
+        hostname = self.hostname
+        ip_address = self.ip_address
+        tags = self.tags
+        fragments = render_fragments(
+            PROTOCOL,
+            VERSION,
+            {
+                "server_id": server_id,
+                "agent_id": None,
+                "framework": framework,
+                "language": language,
+                "process_id": process_id,
+            },
+            {"hostname": hostname, "ip_address": ip_address, "tags": tags},
+        )
+
+        format_ns = timestamps.format_ns
+
+        def serialize(agent_id: str, ns: int, event: Dict[str, Any], deferred: bool) -> Dict[str, Any]:
+            rendered = RenderedEvent({
+                "protocol": PROTOCOL,
+                "version": VERSION,
+                "timestamp": None if deferred else format_ns(ns),
+                "source": {
+                    "server_id": server_id,
+                    "agent_id": agent_id,
+                    "framework": framework,
+                    "language": language,
+                    "process_id": process_id,
+                },
+                "event": event,
+                "metadata": {
+                    "hostname": hostname,
+                    "ip_address": ip_address,
+                    "tags": dict(tags),
+                },
+            })
+            rendered.fragments = fragments
+            rendered.ns = ns
+            return rendered
+
+        return serialize
+
+    def record(self, agent_id: str, event: Dict[str, Any]) -> "EventRecord":
+        """创建一个事件记录（时间戳取当前时间，进程内严格递增）"""
+        return EventRecord(self, agent_id, event, timestamps.clock.now_ns())
+
+
+class EventRecord:
+    """单个事件（__slots__，不做校验）"""
+
+    __slots__ = ("envelope", "agent_id", "event", "created_ns")
+
+    def __init__(self, envelope: EventEnvelope, agent_id: str, event: Dict[str, Any], created_ns: int):
+        self.envelope = envelope
+        self.agent_id = agent_id
+        self.event = event
+        self.created_ns = created_ns
+
+    def to_dict(self, deferred: bool = False) -> Dict[str, Any]:
+        """
+        转换为字典（与 MonitorEvent.to_dict() 相同）
+
+        Args:
+            deferred: 不格式化时间戳（timestamp 为 None），由传输器的序列化器在发送线程上格式化
+        """
+        return self.envelope._serialize(self.agent_id, self.created_ns, self.event, deferred)
+
+    def to_model(self) -> MonitorEvent:
+        """
+        构造并校验 pydantic 模型（严格模式）
+
+        Raises:
+            pydantic.ValidationError: 字段不符合协议
+        """
+        envelope = self.envelope
+        return MonitorEvent(
+            timestamp=timestamps.to_datetime(self.created_ns),
+            source=EventSource(
+                server_id=envelope.server_id,
+                agent_id=self.agent_id,
+                framework=envelope.framework,
+                language=envelope.language,
+                process_id=envelope.process_id,
+            ),
+            event=self.event,
+            metadata=EventMetadata(
+                hostname=envelope.hostname,
+                ip_address=envelope.ip_address,
+                tags=envelope.tags,
+            ),
+        )
@@ -0,0 +1,199 @@
+"""
+JSON 序列化 - 预渲染的 envelope 字节和可选的 orjson
+
+- 安装 orjson 时使用 orjson，否则使用标准库 json（预先创建的 JSONEncoder，
+  不在每次调用时重新构造编码器）；两者输出都是紧凑的 UTF-8 JSON
+- EventRecord.to_dict() 返回的 RenderedEvent 带有 envelope 的预渲染片段，
+  使用标准库 json 时 encode_event() 只编码 timestamp、agent_id 和 event，拼接上不变的字节
+  （orjson 整体编码比拼接更快，不使用片段）
+- encode_events() / encode_lines() 把整个批次直接写入一个字节缓冲区，
+  不再先构造事件字典列表再整体编码
+- 事件字典中的 timestamp 为 ISO-8601 字符串；epoch_ns=True 时只在编码输出中替换为整数纳秒
+  （优先使用 RenderedEvent.ns，否则解析字符串，见 agent_monitor.protocol.timestamps），
+  不修改事件字典
+- 延迟格式化的事件（EventRecord.to_dict(deferred=True)，timestamp 为 None）在编码时
+  由 RenderedEvent.ns 格式化，格式化发生在传输器的发送线程上（见 BaseTransport.deferred_timestamps）
+
+预渲染片段假定 RenderedEvent 中 source / metadata 的不变字段没有被修改；
+需要修改事件时先复制（dict(event)），副本按普通字典完整编码
+"""
+
+import json
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterable, Tuple
+
+from agent_monitor.protocol.timestamps import format_ns, parse_ns
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return _encoder.encode(obj).encode("utf-8")
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON 字节"""
+        try:
+            return orjson.dumps(obj, default=str)
+        except TypeError:
+            # orjson 不支持的值（非字符串键、超过 64 位的整数等）交给标准库处理
+            return _json_dumps(obj)
+else:
+    dumps = _json_dumps
+
+
+def _dumps_scalar(value: Any) -> bytes:
+    """timestamp / agent_id 通常是字符串或整数，直接编码，不经过完整的编码器"""
+    kind = type(value)
+    if kind is str:
+        return encode_basestring(value).encode("utf-8")
+    if kind is int:
+        return str(value).encode("ascii")
+    return dumps(value)
+
+
+def epoch_timestamp(event: Dict[str, Any]) -> Any:
+    """
+    事件时间戳的整数纳秒形式
+
+    Returns:
+        RenderedEvent.ns，或从 timestamp 字符串解析的纳秒；无法解析时返回原值
+    """
+    ns = getattr(event, "ns", None)
+    if ns is not None:
+        return ns
+    timestamp = event.get("timestamp")
+    ns = parse_ns(timestamp)
+    return timestamp if ns is None else ns
+
+
+def iso_timestamp(event: Dict[str, Any]) -> Any:
+    """
+    事件时间戳的 ISO-8601 形式
+
+    Returns:
+        事件的 timestamp；延迟格式化的事件（timestamp 为 None）由 RenderedEvent.ns 格式化
+    """
+    timestamp = event.get("timestamp")
+    if timestamp is None:
+        ns = getattr(event, "ns", None)
+        if ns is not None:
+            return format_ns(ns)
+    return timestamp
+
+
+def resolve(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    延迟格式化的事件 -> 带 ISO-8601 timestamp 的普通字典（副本），其他事件原样返回
+
+    用于不经过 encode_event() 的编码器（如 MessagePack）
+    """
+    if event.get("timestamp") is None and getattr(event, "ns", None) is not None:
+        return dict(event, timestamp=format_ns(event.ns))
+    return event
+
+
+class RenderedEvent(dict):
+    """
+    带有 envelope 预渲染片段的事件字典
+
+    fragments 为 (timestamp 之前, agent_id 之前, event 之前, event 之后) 四段字节，
+    ns 为 timestamp 的整数纳秒（epoch_ns 编码时使用，不影响字典内容）
+    """
+
+    __slots__ = ("fragments", "ns")
+
+
+def render_fragments(
+    protocol: str,
+    version: str,
+    source: Dict[str, Any],
+    metadata: Dict[str, Any]
+) -> Tuple[bytes, bytes, bytes, bytes]:
+    """
+    预渲染一个 envelope 的不变部分
+
+    Args:
+        protocol: 协议标识
+        version: 协议版本
+        source: source 字段（agent_id 的值会被忽略，位置保持不变）
+        metadata: metadata 字段
+
+    Returns:
+        encode_event() 使用的四段字节
+    """
+    keys = list(source)
+    split = keys.index("agent_id")
+    before = b",".join(dumps(key) + b":" + dumps(source[key]) for key in keys[:split])
+    after = b",".join(dumps(key) + b":" + dumps(source[key]) for key in keys[split + 1:])
+    return (
+        b'{"protocol":' + dumps(protocol) + b',"version":' + dumps(version) + b',"timestamp":',
+        b',"source":{' + (before + b"," if before else b"") + b'"agent_id":',
+        (b"," + after if after else b"") + b'},"event":',
+        b',"metadata":' + dumps(metadata) + b"}",
+    )
+
+
+def encode_event(event: Dict[str, Any], epoch_ns: bool = False) -> bytes:
+    """
+    编码单个事件，有预渲染片段时只编码每个事件不同的字段
+
+    Args:
+        event: 事件字典
+        epoch_ns: timestamp 编码为整数纳秒（服务器声明支持时），否则保持 ISO-8601 字符串
+    """
+    fragments = getattr(event, "fragments", None)
+    if fragments is None or orjson is not None:
+        # orjson 整体编码一个事件比在 Python 中拼接片段更快
+        if epoch_ns and "timestamp" in event:
+            # 复制为普通字典后替换，不修改调用方的事件
+            return dumps(dict(event, timestamp=epoch_timestamp(event)))
+        return dumps(resolve(event))
+    head, source_head, source_tail, tail = fragments
+    timestamp = epoch_timestamp(event) if epoch_ns else iso_timestamp(event)
+    return b"".join((
+        head, _dumps_scalar(timestamp),
+        source_head, _dumps_scalar(event["source"]["agent_id"]),
+        source_tail, dumps(event["event"]),
+        tail,
+    ))
+
+
+def encode_events(events: Iterable[Dict[str, Any]], epoch_ns: bool = False) -> bytes:
+    """把事件列表编码为 JSON 数组（写入同一个缓冲区）"""
+    buffer = bytearray(b"[")
+    for event in events:
+        if len(buffer) > 1:
+            buffer += b","
+        buffer += encode_event(event, epoch_ns)
+    buffer += b"]"
+    return bytes(buffer)
+
+
+def encode_lines(events: Iterable[Dict[str, Any]], epoch_ns: bool = False) -> Tuple[bytes, int, int]:
+    """
+    把事件编码为 JSONL（每行一个事件，写入同一个缓冲区）
+
+    Returns:
+        (字节, 成功编码的事件数, 编码失败的事件数)
+    """
+    buffer = bytearray()
+    written = failed = 0
+    for event in events:
+        try:
+            line = encode_event(event, epoch_ns)
+        except Exception:
+            failed += 1
+            continue
+        buffer += line
+        buffer += b"\n"
+        written += 1
+    return bytes(buffer), written, failed
@@ -0,0 +1,102 @@
+"""
+事件时间戳 - 热路径只记录 time.time_ns()
+
+MonitorEvent 每个事件都调用 datetime.now(timezone.utc)，to_dict() 再执行 isoformat()
+和 "+00:00" -> "Z" 的字符串替换。EventRecord 改为：
+- 创建时由 MonotonicClock 取 time.time_ns()，同一进程内严格递增
+  （系统时钟回拨或同一纳秒内的多个事件依次加 1 纳秒）
+- 由 format_ns() 格式化为 ISO-8601 字符串（与 MonitorEvent.to_dict() 相同，
+  精确到微秒，带 'Z' 后缀），同一秒内的事件复用 "YYYY-MM-DDTHH:MM:SS" 前缀；
+  内置的排队传输器（deferred_timestamps）在发送线程上编码时才格式化，
+  其他传输器在 to_dict() 时格式化，事件字典只包含 JSON 原生类型
+- 原始纳秒值保存在 RenderedEvent.ns 上（不是字典的键），服务器声明支持时
+  序列化器直接发送整数纳秒（见 serializer.encode_event 的 epoch_ns），
+  没有 ns 的事件（严格模式、复制过的字典）由 parse_ns() 从字符串解析
+
+服务器通过 /api/health 声明支持整数纳秒: {"features": ["epoch_ns"]}
+（见 agent_monitor.protocol.capabilities）
+"""
+
+import calendar
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+# 服务器声明的能力名称
+FEATURE = "epoch_ns"
+
+# 使用整数纳秒时间戳的请求带有此请求头
+HEADER = "X-Timestamp-Format"
+
+# (秒, 前缀) 缓存，整体替换，多线程读写安全
+_prefix_cache = (None, "")
+
+
+def format_ns(ns: int) -> str:
+    """Unix 纳秒时间戳 -> 带 'Z' 后缀的 ISO-8601 字符串（精确到微秒）"""
+    global _prefix_cache
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    cached_seconds, prefix = _prefix_cache
+    if cached_seconds != seconds:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _prefix_cache = (seconds, prefix)
+    micros = remainder // 1000
+    if micros:
+        return f"{prefix}.{micros:06d}Z"
+    # 与 datetime.isoformat() 一致，微秒为 0 时省略小数部分
+    return prefix + "Z"
+
+
+def to_datetime(ns: int) -> datetime:
+    """Unix 纳秒时间戳 -> datetime（UTC，精确到微秒）"""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=remainder // 1000)
+
+
+def parse_ns(value: Any) -> Optional[int]:
+    """
+    事件中的 timestamp -> Unix 纳秒时间戳
+
+    Args:
+        value: 整数纳秒或 ISO-8601 字符串（不带时区时按 UTC 处理）
+
+    Returns:
+        整数纳秒，无法解析时返回 None
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return calendar.timegm(parsed.utctimetuple()) * 1_000_000_000 + parsed.microsecond * 1000
+
+
+class MonotonicClock:
+    """进程内严格递增的纳秒时钟（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def now_ns(self) -> int:
+        now = time.time_ns()
+        with self._lock:
+            if now <= self._last:
+                now = self._last + 1
+            self._last = now
+        return now
+
+    def _after_fork(self):
+        # fork 时其他线程可能持有锁，子进程中重建
+        self._lock = threading.Lock()
+
+
+clock = MonotonicClock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=clock._after_fork)
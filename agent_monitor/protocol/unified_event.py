@@ -44,6 +44,17 @@ class EventType(str, Enum):
     llm_call_end = "llm_call_end"
     llm_stream_chunk = "llm_stream_chunk"
 
+    # 限流汇总（被抑制的事件数）
+    events_suppressed = "events_suppressed"
+
+    # Crew 生命周期
+    crew_started = "crew_started"
+    crew_completed = "crew_completed"
+
+    # 工具调用
+    tool_usage_started = "tool_usage_started"
+    tool_usage_finished = "tool_usage_finished"
+
 
 class EventSource(BaseModel):
     """事件源信息"""
@@ -0,0 +1 @@
+# Receivers module
@@ -0,0 +1,143 @@
+"""
+数据报参考接收端
+
+实现 agent_monitor.protocol.datagram 的接收方：按发送方和 msg_id 重组分片、
+解码事件后回调处理函数。分片可以乱序到达，任一分片丢失的事件在 ttl 秒后丢弃。
+用于在没有真实监控服务器时测试 DatagramTransport
+
+使用:
+    python -m agent_monitor.receivers.datagram --udp 127.0.0.1:9401
+    python -m agent_monitor.receivers.datagram --unixgram /tmp/agent-monitor.sock
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import socket
+import sys
+from typing import Any, Callable, Dict, List, Optional, Set
+import logging
+
+from agent_monitor.protocol import datagram
+
+logger = logging.getLogger(__name__)
+
+
+class DatagramReceiver(asyncio.DatagramProtocol):
+    """
+    数据报接收器
+
+    每个完整事件回调一次处理函数（参数为只含该事件的列表，与 FrameReceiver 一致）；
+    数据报即发即弃，处理失败的事件不会重发
+    """
+
+    def __init__(self, handler: Callable[[List[Dict[str, Any]]], Any], ttl: float = 5.0):
+        """
+        初始化接收器
+
+        Args:
+            handler: 事件处理函数，参数为事件列表，可以是协程函数
+            ttl: 未收齐分片的事件保留时间（秒）
+        """
+        self.handler = handler
+        self.reassembler = datagram.Reassembler(ttl)
+        self.stats = {
+            "datagrams": 0,
+            "events": 0,
+            "expired": 0,
+            "errors": 0
+        }
+        self._tasks: Set[asyncio.Future] = set()
+
+    def datagram_received(self, data: bytes, addr: Any):
+        """处理单个数据报"""
+        self.stats["datagrams"] += 1
+        try:
+            event = self.reassembler.feed(data, addr)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"无效的数据报 ({addr or 'local'}): {e}")
+            return
+        finally:
+            self.stats["expired"] = self.reassembler.expired
+        if event is None:
+            return
+
+        self.stats["events"] += 1
+        try:
+            result = self.handler([event])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"接收端处理失败: {e}")
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._tasks.add(task)
+            task.add_done_callback(self._handled)
+
+    def _handled(self, task: asyncio.Future):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+            logger.warning(f"接收端处理失败: {task.exception()}")
+
+    async def serve_udp(self, host: str, port: int) -> asyncio.DatagramTransport:
+        """在 UDP 地址上启动接收端"""
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        return transport
+
+    async def serve_unixgram(self, path: str) -> asyncio.DatagramTransport:
+        """在 Unix 数据报 socket 上启动接收端（已存在的 socket 文件会被替换）"""
+        if os.path.exists(path):
+            os.unlink(path)
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=path, family=socket.AF_UNIX
+        )
+        return transport
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口：把收到的事件按 JSON Lines 输出到标准输出"""
+    parser = argparse.ArgumentParser(description="Agent Monitor 数据报参考接收端")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--udp", default="127.0.0.1:9401", help="UDP 监听地址 host:port")
+    target.add_argument("--unixgram", help="Unix 数据报 socket 路径")
+    parser.add_argument("--quiet", action="store_true", help="只统计，不输出事件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    def print_events(events: List[Dict[str, Any]]):
+        if args.quiet:
+            return
+        for event in events:
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    receiver = DatagramReceiver(print_events)
+
+    async def run():
+        if args.unixgram:
+            transport = await receiver.serve_unixgram(args.unixgram)
+            logger.info(f"数据报接收端已启动: unixgram://{args.unixgram}")
+        else:
+            host, _, port = args.udp.rpartition(":")
+            transport = await receiver.serve_udp(host, int(port))
+            logger.info(f"数据报接收端已启动: udp://{args.udp}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            transport.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info(f"接收端退出: {receiver.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+共享内存转发器
+
+从 ShmRingBuffer 中读取 worker 写入的事件，通过 HTTP 批量接口转发到监控服务器
+
+事件发送成功（或写入暂存）后才从缓冲区移除：监控服务器不可用且未配置暂存时，
+事件留在缓冲区中等待重试，缓冲区满后由 worker 丢弃新事件；
+被服务器拒绝（4xx）的批次计入 rejected 后移除，不会阻塞后面的事件
+
+典型用法（gunicorn --preload / multiprocessing 主进程中，fork worker 之前）:
+
+    import multiprocessing
+    from agent_monitor.transports.shm import ShmRingBuffer, ShmTransport
+    from agent_monitor.receivers.shm_forwarder import start_forwarder
+
+    ring = ShmRingBuffer.create(lock=multiprocessing.Lock())
+    forwarder = start_forwarder(ring, "http://monitor:8080")
+
+    # worker 中
+    plugin = CrewAIPlugin(transport=ShmTransport(ring))
+"""
+
+import json
+import multiprocessing
+import threading
+from typing import Any, Dict, Optional, Union
+import logging
+
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.spool import BatchRejected
+from agent_monitor.transports.shm import ShmRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class ShmForwarder:
+    """
+    共享内存转发器
+
+    后台线程轮询环形缓冲区，读到事件后批量发送；
+    缓冲区为空或发送失败时按 poll_interval 休眠
+    """
+
+    def __init__(
+        self,
+        ring: ShmRingBuffer,
+        transport: DirectTransport,
+        batch_size: int = 500,
+        poll_interval: float = 0.05
+    ):
+        """
+        初始化转发器
+
+        Args:
+            ring: 环形缓冲区（转发器是唯一读者）
+            transport: 转发使用的 HTTP 传输器
+            batch_size: 单批最大事件数
+            poll_interval: 缓冲区为空或发送失败时的轮询间隔（秒）
+        """
+        self.ring = ring
+        self.transport = transport
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+        self._stopped = threading.Event()
+        self.stats = {
+            "forwarded": 0,
+            "spooled": 0,
+            "rejected": 0,
+            "invalid": 0,
+            "batches": 0,
+            "retries": 0
+        }
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="agent-monitor-shm-forwarder",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if not self.forward_once():
+                self._stopped.wait(self.poll_interval)
+        # 退出前转发剩余事件
+        while self.forward_once():
+            pass
+
+    def forward_once(self) -> int:
+        """
+        读取并转发一批事件，发送成功、写入暂存或被服务器拒绝后才从缓冲区移除
+
+        Returns:
+            int: 本次从缓冲区移除的记录数，发送失败（记录保留在缓冲区中）时为 0
+        """
+        records, head = self.ring.peek(self.batch_size)
+        if not records:
+            return 0
+
+        events = []
+        invalid = 0
+        for record in records:
+            try:
+                events.append(json.loads(record))
+            except ValueError:
+                invalid += 1
+
+        if events and not self._deliver(events):
+            self.stats["retries"] += 1
+            return 0
+
+        self.ring.advance(head)
+        self.stats["invalid"] += invalid
+        return len(records)
+
+    def _deliver(self, events: list) -> bool:
+        """
+        发送一批事件
+
+        Returns:
+            bool: 事件是否可以从缓冲区移除（已发送、已写入暂存或被服务器拒绝）
+        """
+        try:
+            sent = self.transport._send_batch(events, spool=False)
+        except BatchRejected as e:
+            self.stats["rejected"] += len(events)
+            logger.warning(f"转发的 {len(events)} 个事件被丢弃: {e}")
+            return True
+
+        if sent:
+            self.stats["forwarded"] += len(events)
+            self.stats["batches"] += 1
+            return True
+        if self.transport.spool is not None:
+            self.transport._spool_events(events)
+            self.stats["spooled"] += len(events)
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.copy()
+        stats["ring_used"] = self.ring.used()
+        stats["transport"] = self.transport.get_stats()
+        return stats
+
+    def close(self):
+        """停止转发线程，转发剩余事件"""
+        self._stopped.set()
+        self._thread.join(timeout=self.transport.timeout * 4)
+        self.transport.close()
+
+
+def run_forwarder(
+    ring: Union[ShmRingBuffer, str],
+    monitor_url: str,
+    stop_event: Optional[Any] = None,
+    **transport_kwargs
+):
+    """
+    转发进程入口：持续转发环形缓冲区中的事件，直到 stop_event 被设置
+
+    Args:
+        ring: fork 继承的环形缓冲区，或共享内存名称（独立进程按名称连接）
+        monitor_url: 监控服务器 URL
+        stop_event: 跨进程停止信号（multiprocessing.Event），None 时一直运行
+        **transport_kwargs: 传给 DirectTransport 的参数（spool_dir、compression 等）
+    """
+    if isinstance(ring, str):
+        ring = ShmRingBuffer.attach(ring)
+    forwarder = ShmForwarder(ring, DirectTransport(monitor_url, **transport_kwargs))
+    logger.info(f"共享内存转发器已启动: {ring.name} -> {monitor_url}")
+
+    try:
+        if stop_event is None:
+            threading.Event().wait()
+        else:
+            stop_event.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        forwarder.close()
+        ring.close()
+        logger.info(f"共享内存转发器已退出: {forwarder.stats}")
+
+
+def start_forwarder(
+    ring: Union[ShmRingBuffer, str],
+    monitor_url: str,
+    stop_event: Optional[Any] = None,
+    **transport_kwargs
+) -> multiprocessing.Process:
+    """
+    启动独立的转发进程
+
+    环形缓冲区对象只能通过 fork 传给子进程；使用 spawn 启动方式时请传入共享内存名称
+
+    Args:
+        ring: 环形缓冲区或共享内存名称
+        monitor_url: 监控服务器 URL
+        stop_event: 跨进程停止信号（multiprocessing.Event）
+        **transport_kwargs: 传给 DirectTransport 的参数
+
+    Returns:
+        已启动的转发进程
+    """
+    process = multiprocessing.Process(
+        target=run_forwarder,
+        args=(ring, monitor_url, stop_event),
+        kwargs=transport_kwargs,
+        name="agent-monitor-shm-forwarder",
+        daemon=True
+    )
+    process.start()
+    return process
@@ -0,0 +1,232 @@
+"""
+Sidecar 转发进程
+
+在 Unix 域套接字上接收本机多个 Agent 进程（UnixSocketTransport）发来的事件，
+汇总后通过现有的 HTTP 批量协议（/api/events/batch）转发到监控服务器
+
+使用:
+    python -m agent_monitor.receivers.sidecar \\
+        --socket /var/run/agent-monitor.sock \\
+        --monitor-url http://monitor:8080
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+from typing import Any, Dict, List, Optional
+import logging
+
+from agent_monitor.receivers.tcp import FrameReceiver
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.fanout import routing_key
+
+logger = logging.getLogger(__name__)
+
+
+class Sidecar:
+    """
+    Sidecar 转发器
+
+    事件收到后立即 ACK 并进入有界队列，由转发协程批量发送；
+    HTTP 请求在线程池中执行，不阻塞事件循环。
+    每个转发协程有自己的队列，事件按 source.agent_id 哈希分配，
+    同一 Agent 的事件总是由同一个协程按顺序转发
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        transport: DirectTransport,
+        batch_size: int = 500,
+        linger: float = 0.5,
+        max_queue_size: int = 100000,
+        concurrency: int = 2
+    ):
+        """
+        初始化 sidecar
+
+        Args:
+            socket_path: 监听的 Unix 域套接字路径
+            transport: 转发使用的 HTTP 传输器（可配置暂存、压缩）
+            batch_size: 转发单批最大事件数
+            linger: 转发批次最长等待时间（秒）
+            max_queue_size: 每个转发协程的队列容量上限，队列满时丢弃新事件
+            concurrency: 并发转发协程数
+        """
+        self.socket_path = socket_path
+        self.transport = transport
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_queue_size = max_queue_size
+        self.concurrency = concurrency
+
+        self.receiver = FrameReceiver(self._accept)
+        self._queues: List[asyncio.Queue] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._forwarders: List[asyncio.Task] = []
+
+        self.stats = {
+            "received": 0,
+            "dropped": 0,
+            "batches": 0
+        }
+
+    async def start(self):
+        """开始监听并启动转发协程"""
+        if os.path.exists(self.socket_path):
+            # 上次异常退出遗留的套接字文件
+            os.remove(self.socket_path)
+
+        loop = asyncio.get_running_loop()
+        self._queues = [
+            asyncio.Queue(maxsize=self.max_queue_size) for _ in range(max(1, self.concurrency))
+        ]
+        self._server = await asyncio.start_unix_server(
+            self.receiver.handle_connection,
+            path=self.socket_path
+        )
+        self._forwarders = [
+            loop.create_task(self._forward(lane_queue)) for lane_queue in self._queues
+        ]
+        logger.info(
+            f"Sidecar 已启动: unix://{self.socket_path} -> {self.transport.monitor_url}"
+        )
+
+    def _accept(self, events: List[Dict[str, Any]]):
+        """接收一个批次（在事件循环中调用，不做 IO）"""
+        for event in events:
+            if len(self._queues) == 1:
+                lane_queue = self._queues[0]
+            else:
+                lane_queue = self._queues[hash(routing_key(event)) % len(self._queues)]
+            try:
+                lane_queue.put_nowait(event)
+                self.stats["received"] += 1
+            except asyncio.QueueFull:
+                self.stats["dropped"] += 1
+
+    async def _forward(self, source: asyncio.Queue):
+        """转发协程：汇总本协程队列中的批次并在线程池中调用 send_batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await source.get()]
+            deadline = loop.time() + self.linger
+
+            while len(batch) < self.batch_size:
+                if not source.empty():
+                    batch.append(source.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(source.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await loop.run_in_executor(None, self.transport.send_batch, batch)
+                self.stats["batches"] += 1
+            except Exception as e:
+                logger.error(f"Sidecar 转发失败: {e}")
+            finally:
+                for _ in batch:
+                    source.task_done()
+
+    async def stop(self, timeout: float = 10.0):
+        """停止监听，在超时时间内转发剩余事件后退出"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(lane_queue.join() for lane_queue in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Sidecar 退出时仍有 {self._queued()} 个事件未转发")
+
+        for task in self._forwarders:
+            task.cancel()
+        await asyncio.gather(*self._forwarders, return_exceptions=True)
+
+        self.transport.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def _queued(self) -> int:
+        return sum(lane_queue.qsize() for lane_queue in self._queues)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.copy()
+        stats["queued"] = self._queued()
+        stats["transport"] = self.transport.get_stats()
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="Agent Monitor sidecar 转发进程")
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("AGENT_MONITOR_SIDECAR_SOCKET", "/tmp/agent-monitor.sock"),
+        help="监听的 Unix 域套接字路径"
+    )
+    parser.add_argument(
+        "--monitor-url",
+        default=os.getenv("AGENT_MONITOR_URL"),
+        help="监控服务器 URL，默认读取 AGENT_MONITOR_URL"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--linger", type=float, default=0.5)
+    parser.add_argument("--spool-dir", default=os.getenv("AGENT_MONITOR_SPOOL_DIR"))
+    parser.add_argument("--compression", default=os.getenv("AGENT_MONITOR_COMPRESSION"))
+    parser.add_argument(
+        "--dictionary",
+        action="store_true",
+        default=os.getenv("AGENT_MONITOR_DICTIONARY", "false").lower() == "true",
+        help="转发时使用字典编码（服务器声明支持时）"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.monitor_url:
+        parser.error("未设置监控服务器 URL，请使用 --monitor-url 或 AGENT_MONITOR_URL")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
+        datefmt='%H:%M:%S'
+    )
+
+    transport = DirectTransport(
+        args.monitor_url,
+        timeout=5.0,
+        spool_dir=args.spool_dir,
+        compression=args.compression,
+        dictionary=args.dictionary
+    )
+    sidecar = Sidecar(
+        args.socket,
+        transport,
+        batch_size=args.batch_size,
+        linger=args.linger
+    )
+
+    async def run():
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+
+        await sidecar.start()
+        await stopping.wait()
+        await sidecar.stop()
+        logger.info(f"Sidecar 已退出: {sidecar.get_stats()}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
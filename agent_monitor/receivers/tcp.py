@@ -0,0 +1,131 @@
+"""
+TCP 参考接收端
+
+实现 agent_monitor.protocol.framing 的接收方：读取批次帧、解码
+（字典编码的批次按连接还原为完整事件，v2 紧凑批次还原为 v1 事件）、回调处理函数后回复 ACK。用于在没有真实监控服务器时测试 TcpTransport
+
+使用:
+    python -m agent_monitor.receivers.tcp --host 127.0.0.1 --port 9400
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from agent_monitor.protocol import compact, framing
+from agent_monitor.protocol.dictionary import BlockDecoder
+
+logger = logging.getLogger(__name__)
+
+
+class FrameReceiver:
+    """
+    帧接收器
+
+    每个连接一个协程，按顺序处理批次帧；处理函数返回（或 await 完成）
+    之后才回复 ACK，因此处理失败的批次会由发送方重发
+    """
+
+    def __init__(self, handler: Callable[[List[Dict[str, Any]]], Any]):
+        """
+        初始化接收器
+
+        Args:
+            handler: 批次处理函数，参数为事件列表，可以是协程函数
+        """
+        self.handler = handler
+        self.stats = {
+            "connections": 0,
+            "batches": 0,
+            "events": 0,
+            "errors": 0
+        }
+
+    async def handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ):
+        """处理单个连接"""
+        self.stats["connections"] += 1
+        peer = writer.get_extra_info("peername") or "local"
+        logger.debug(f"接收端新连接: {peer}")
+        # 字典编码的句柄表只在本连接内有效
+        decoder = BlockDecoder()
+
+        try:
+            while True:
+                header = await reader.readexactly(framing.HEADER.size)
+                length, frame_type, codec, seq = framing.decode_header(header)
+                payload = await reader.readexactly(length) if length else b""
+
+                if frame_type == framing.FRAME_BATCH:
+                    events = framing.decode_payload(payload, codec)
+                elif frame_type == framing.FRAME_DICT_BATCH:
+                    events = decoder.decode(framing.decode_payload(payload, codec))
+                elif frame_type == framing.FRAME_V2_BATCH:
+                    events = compact.decode_events(framing.decode_payload(payload, codec))
+                else:
+                    continue
+
+                result = self.handler(events)
+                if inspect.isawaitable(result):
+                    await result
+
+                self.stats["batches"] += 1
+                self.stats["events"] += len(events)
+
+                writer.write(framing.encode_ack(seq))
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            # 不回复 ACK 直接断开，发送方会重连并重发
+            self.stats["errors"] += 1
+            logger.warning(f"接收端处理失败 ({peer}): {e}")
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host: str, port: int) -> asyncio.AbstractServer:
+        """在 TCP 地址上启动接收端"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口：把收到的事件按 JSON Lines 输出到标准输出"""
+    parser = argparse.ArgumentParser(description="Agent Monitor TCP 参考接收端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9400)
+    parser.add_argument("--quiet", action="store_true", help="只统计，不输出事件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    def print_events(events: List[Dict[str, Any]]):
+        if args.quiet:
+            return
+        for event in events:
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    receiver = FrameReceiver(print_events)
+
+    async def run():
+        server = await receiver.serve_tcp(args.host, args.port)
+        logger.info(f"TCP 接收端已启动: tcp://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info(f"接收端退出: {receiver.stats}")
+
+
+if __name__ == "__main__":
+    main()
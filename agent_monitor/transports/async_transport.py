@@ -0,0 +1,515 @@
+"""
+异步传输器 - 基于 asyncio 的批量发送
+
+适用于在 asyncio 服务中运行 Agent（如 CrewAI kickoff_async）的场景：
+- 不创建 OS 线程，批量协程运行在应用自己的事件循环中
+- 使用 aiohttp 的 keep-alive 连接池发送到 /api/events/batch
+- send() 可在事件循环线程或其他线程中调用（线程安全）
+- health_check() / close() 与其他传输器一样是同步方法，供其他线程调用
+  （如 FanoutTransport 的健康检查线程）；事件循环中使用 await ahealth_check() / aclose()
+
+需要安装可选依赖: pip install agent-monitor-plugin[async]
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Any, List, Optional
+import logging
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - 可选依赖
+    aiohttp = None
+
+from agent_monitor.protocol import serializer
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.utils import compression as codec
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+
+def _loop_running() -> bool:
+    """当前线程是否正在运行事件循环"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AsyncTransport(BaseTransport):
+    """
+    异步传输器
+
+    事件进入 asyncio.Queue，由若干批量协程按批量大小或最长等待时间
+    汇总发送。第一次在事件循环中调用 send() 或 await start() 时
+    绑定到当前事件循环
+    """
+
+    # 事件只经过 serializer 编码，时间戳在发送线程上格式化
+    deferred_timestamps = True
+
+    def __init__(
+        self,
+        monitor_url: str,
+        timeout: float = 1.0,
+        silent_fail: bool = True,
+        batch_size: int = 100,
+        linger: float = 0.2,
+        max_queue_size: int = 10000,
+        pool_size: int = 2,
+        compression: Optional[str] = None,
+        compress_min_bytes: int = codec.DEFAULT_MIN_BYTES
+    ):
+        """
+        初始化异步传输器
+
+        Args:
+            monitor_url: 监控服务器 URL (e.g., http://localhost:8080)
+            timeout: 请求超时时间（秒），默认 1 秒
+            silent_fail: 是否静默失败，True 时失败不抛异常
+            batch_size: 单批最大事件数
+            linger: 批次最长等待时间（秒）
+            max_queue_size: 队列容量上限，队列满时丢弃新事件
+            pool_size: keep-alive 连接数，同时也是并发批量协程数
+            compression: 批量请求压缩编码 ("gzip" / "zstd" / "auto")，
+                只有服务器在 /api/health 中声明支持时才会压缩
+            compress_min_bytes: 请求体小于该大小（字节）时不压缩
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncTransport 需要 aiohttp，请安装: "
+                "pip install agent-monitor-plugin[async]"
+            )
+
+        self.monitor_url = monitor_url.rstrip("/")
+        self.timeout = timeout
+        self.silent_fail = silent_fail
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_queue_size = max_queue_size
+        self.pool_size = pool_size
+
+        # 压缩协商（服务器能力在首次批量发送前探测）
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self._server_encodings: Optional[frozenset] = None
+        self._capabilities_checked_at = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._workers: List[asyncio.Task] = []
+        self._bind_lock = threading.Lock()
+        self._closed = False
+        # 批量协程已出队但尚未发送完成的事件数
+        self._sending = 0
+
+        # 统计
+        self.stats = TransportStats(
+            ("sent", "failed", "dropped", "batches"),
+            histograms={"latency_ms": 1000, "batch_size": 1, "payload_bytes": 1, "queue_depth": 1}
+        )
+        if compression:
+            self.stats.declare("bytes_raw", "bytes_sent")
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """绑定到当前事件循环并启动批量协程"""
+        self._bind(asyncio.get_running_loop())
+
+    def _bind(self, loop: asyncio.AbstractEventLoop):
+        """绑定事件循环（只在该循环的线程中调用）"""
+        with self._bind_lock:
+            if self._loop is not None:
+                return
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    keepalive_timeout=30
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout * 2)
+            )
+            self._workers = [
+                loop.create_task(self._run()) for _ in range(self.pool_size)
+            ]
+        logger.debug(f"异步传输器已绑定事件循环，连接池大小: {self.pool_size}")
+
+    def _in_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # ------------------------------------------------------------------
+    # 发送
+    # ------------------------------------------------------------------
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        将事件放入队列（非阻塞，线程安全）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功入队
+        """
+        if self._closed:
+            self.stats.incr("dropped")
+            return False
+
+        if self._loop is None:
+            try:
+                self._bind(asyncio.get_running_loop())
+            except RuntimeError:
+                self.stats.incr("dropped")
+                logger.warning("异步传输器尚未绑定事件循环，请先 await transport.start()")
+                return False
+
+        if self._in_loop_thread():
+            self._enqueue(event)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._enqueue, event)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.stats.incr("dropped")
+                return False
+        return True
+
+    def _enqueue(self, event: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.stats.incr("dropped")
+            logger.warning("事件队列已满，丢弃事件")
+
+    async def send_async(self, event: Dict[str, Any]) -> bool:
+        """
+        立即发送单个事件并等待结果
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功
+        """
+        if self._loop is None:
+            await self.start()
+        return await self.send_batch([event])
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """
+        同步发送事件（阻塞，用于测试）
+
+        只能在事件循环以外的线程调用，事件循环中请使用 await send_async()
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功
+        """
+        if self._loop is None or self._in_loop_thread():
+            raise RuntimeError(
+                "send_sync 不能在事件循环线程中调用，请使用 await transport.send_async()"
+            )
+        future = asyncio.run_coroutine_threadsafe(self.send_async(event), self._loop)
+        return future.result(timeout=self.timeout * 2 + 1)
+
+    async def _run(self):
+        """批量协程：按批量大小或等待时间汇总并发送"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.linger
+
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self.stats.observe("queue_depth", self._queue.qsize())
+            self._sending += len(batch)
+            try:
+                await self.send_batch(batch)
+                self.stats.incr("batches")
+            except Exception as e:
+                if not self.silent_fail:
+                    logger.error(f"批量发送异常: {e}")
+            finally:
+                self._sending -= len(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def send_batch(self, events: list) -> bool:
+        """
+        批量发送事件
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            bool: 是否成功
+        """
+        if not events:
+            return True
+
+        url = f"{self.monitor_url}/api/events/batch"
+
+        self.stats.observe("batch_size", len(events))
+        try:
+            body, headers = await self._encode_batch(events)
+            self.stats.observe("payload_bytes", len(body))
+            started = time.perf_counter()
+            status, text = await self._post_batch(url, body, headers)
+            if status == 415 and "Content-Encoding" in headers:
+                # 服务器实际不支持该编码，禁用压缩后不压缩重发
+                logger.warning(f"服务器拒绝 {headers['Content-Encoding']} 压缩，改为不压缩发送")
+                self._server_encodings = frozenset()
+                self._capabilities_checked_at = time.monotonic()
+                body, headers = await self._encode_batch(events)
+                status, text = await self._post_batch(url, body, headers)
+            self.stats.observe("latency_ms", (time.perf_counter() - started) * 1000)
+
+            if status == 200:
+                self.stats.incr("sent", len(events))
+                logger.debug(f"批量发送成功: {len(events)} 个事件")
+                return True
+
+            self.stats.incr("failed", len(events))
+            logger.warning(f"批量发送失败: {status} - {text}")
+            return False
+
+        except asyncio.TimeoutError:
+            self.stats.incr("failed", len(events))
+            logger.warning("批量发送超时")
+            return False
+
+        except aiohttp.ClientConnectionError:
+            self.stats.incr("failed", len(events))
+            logger.warning("无法连接到监控服务器")
+            return False
+
+        except Exception as e:
+            self.stats.incr("failed", len(events))
+            if not self.silent_fail:
+                logger.error(f"批量发送异常: {e}")
+            return False
+
+    async def _post_batch(self, url: str, body: bytes, headers: Dict[str, str]):
+        """
+        发送一个批量请求
+
+        Returns:
+            (状态码, 失败时的响应内容)
+        """
+        async with self._session.post(url, data=body, headers=headers) as response:
+            if response.status == 200:
+                return response.status, ""
+            return response.status, await response.text()
+
+    async def _encode_batch(self, events: list):
+        """
+        编码批量请求体，满足条件时压缩
+
+        Returns:
+            (请求体字节, 请求头)
+        """
+        body = serializer.encode_events(events)
+        headers = {"Content-Type": "application/json"}
+
+        if not self.compression or len(body) < self.compress_min_bytes:
+            return body, headers
+
+        if self._server_encodings is None or (
+            not self._server_encodings
+            and time.monotonic() - self._capabilities_checked_at > 60.0
+        ):
+            await self.ahealth_check()
+
+        encoding = codec.negotiate(self.compression, self._server_encodings or ())
+        if encoding is None:
+            return body, headers
+
+        compressed = codec.compress(body, encoding)
+        self.stats.incr("bytes_raw", len(body))
+        self.stats.incr("bytes_sent", len(compressed))
+        headers["Content-Encoding"] = encoding
+        return compressed, headers
+
+    def health_check(self) -> bool:
+        """
+        健康检查（同步，用于事件循环以外的线程）
+
+        已绑定且正在运行的事件循环上执行 ahealth_check()；尚未绑定或事件循环已停止时
+        使用临时事件循环和连接检查。事件循环中请使用 await transport.ahealth_check()
+
+        Returns:
+            bool: 是否可达
+        """
+        if _loop_running():
+            raise RuntimeError(
+                "health_check 不能在事件循环线程中调用，请使用 await transport.ahealth_check()"
+            )
+        if self._loop is not None and self._loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self.ahealth_check(), self._loop)
+            try:
+                return future.result(timeout=3.0)
+            except Exception:
+                future.cancel()
+                return False
+        return asyncio.run(self._probe())
+
+    async def _probe(self) -> bool:
+        """使用临时连接执行健康检查"""
+        async with aiohttp.ClientSession() as session:
+            return await self._check_health(session)
+
+    async def ahealth_check(self) -> bool:
+        """
+        健康检查 - 测试监控服务器是否可达
+
+        Returns:
+            bool: 是否可达
+        """
+        if self._loop is None:
+            await self.start()
+        return await self._check_health(self._session)
+
+    async def _check_health(self, session: "aiohttp.ClientSession") -> bool:
+        """请求 /api/health 并更新服务器能力"""
+        try:
+            url = f"{self.monitor_url}/api/health"
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=2.0)) as response:
+                healthy = response.status == 200
+                if healthy and self.compression:
+                    try:
+                        body = await response.json(content_type=None)
+                    except ValueError:
+                        body = None
+                    self._server_encodings = codec.parse_server_encodings(response.headers, body)
+        except Exception:
+            healthy = False
+
+        if self.compression:
+            if not healthy:
+                self._server_encodings = frozenset()
+            self._capabilities_checked_at = time.monotonic()
+        return healthy
+
+    async def flush(self):
+        """等待队列中的事件全部发送完成"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.snapshot()
+        stats["queued"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    async def aclose(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止接收事件，在截止时间前发送剩余事件后关闭连接池
+
+        Args:
+            flush: 是否等待队列中的事件发送完成
+            timeout: 等待的最长时间（秒），默认按超时时间和 linger 计算
+
+        Returns:
+            int: 截止时仍未发送完成而被放弃的事件数
+        """
+        self._closed = True
+        if self._loop is None:
+            return 0
+
+        if timeout is None:
+            timeout = self._default_close_timeout()
+        if flush:
+            try:
+                await asyncio.wait_for(self.flush(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        abandoned = self._queue.qsize() + self._sending
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+        if abandoned:
+            logger.warning(f"关闭异步传输器时放弃了 {abandoned} 个未发送完成的事件")
+        return abandoned
+
+    def _default_close_timeout(self) -> float:
+        return self.timeout * 2 + self.linger
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        同步关闭（用于事件循环以外的线程）
+
+        事件循环中请使用 await transport.aclose()
+
+        Args:
+            flush: 是否等待队列中的事件发送完成
+            timeout: 等待的最长时间（秒）
+
+        Returns:
+            int: 被放弃的事件数；事件循环已停止时为队列中剩余的事件数
+        """
+        if self._loop is None or not self._loop.is_running():
+            self._closed = True
+            return self._close_stopped()
+        if self._in_loop_thread():
+            raise RuntimeError("close 不能在事件循环线程中调用，请使用 await transport.aclose()")
+        if timeout is None:
+            timeout = self._default_close_timeout()
+        future = asyncio.run_coroutine_threadsafe(self.aclose(flush, timeout), self._loop)
+        return future.result(timeout=timeout + 1)
+
+    def _close_stopped(self) -> int:
+        """
+        事件循环已停止（或已关闭）：取消批量协程并关闭连接池，不发送剩余事件
+
+        Returns:
+            int: 队列中剩余的事件数
+        """
+        if self._loop is None:
+            return 0
+        abandoned = self._queue.qsize() + self._sending
+        session, self._session = self._session, None
+        if session is None or session.closed:
+            return abandoned
+
+        try:
+            if not self._loop.is_closed():
+                for worker in self._workers:
+                    worker.cancel()
+                self._loop.run_until_complete(
+                    asyncio.gather(*self._workers, session.close(), return_exceptions=True)
+                )
+            else:
+                # 原事件循环已关闭，在临时事件循环中释放连接
+                asyncio.run(session.close())
+        except RuntimeError as e:
+            logger.debug(f"关闭异步传输器连接池失败: {e}")
+
+        if abandoned:
+            logger.warning(f"关闭异步传输器时放弃了 {abandoned} 个未发送完成的事件")
+        return abandoned
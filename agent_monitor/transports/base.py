@@ -0,0 +1,69 @@
+"""
+传输器基础接口
+
+所有传输器（包括通过 entry points 注册的第三方传输器）都实现同一组方法，
+CrewAIPlugin 只依赖这组接口：
+- send(event): 非阻塞发送，返回是否已接收
+- send_sync(event) / send_batch(events): 同步发送
+- health_check(): 目标是否可用
+- get_stats(): 统计快照
+- close(flush, timeout): 停止接收事件，在截止时间前发送剩余事件，返回被放弃的事件数
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class BaseTransport(ABC):
+    """
+    传输器基类
+
+    子类至少实现 send()；其余方法提供逐个发送 / 无需等待的默认实现
+    """
+
+    # 为 True 时 send() 接受延迟格式化时间戳的事件（timestamp 为 None，纳秒值在 RenderedEvent.ns 上），
+    # 传输器只通过 agent_monitor.protocol.serializer 编码事件，在发送线程上格式化；
+    # 把事件字典交给外部代码的传输器保持 False
+    deferred_timestamps = False
+
+    @abstractmethod
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        发送事件（非阻塞）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功（或成功入队）
+        """
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """同步发送事件，默认与 send 相同"""
+        return self.send(event)
+
+    def send_batch(self, events: list) -> bool:
+        """逐个发送事件，返回是否全部成功"""
+        results = [self.send(event) for event in events]
+        return all(results)
+
+    def health_check(self) -> bool:
+        """健康检查，默认总是可用"""
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {}
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止接收事件并释放资源
+
+        Args:
+            flush: 是否等待剩余事件发送完成
+            timeout: 等待的最长时间（秒）
+
+        Returns:
+            int: 被放弃的事件数
+        """
+        return 0
@@ -0,0 +1,247 @@
+"""
+批量传输器 - 有界队列 + 单个常驻后台线程
+
+事件先进入内存队列，由后台线程按批量大小或最大等待时间
+汇总后发送到 /api/events/batch，避免每个事件创建一个线程
+
+max_in_flight_batches > 1 时启用流水线：事件按 source.agent_id 哈希分配到多个发送通道，
+每个通道有自己的队列、后台线程和 keep-alive 连接，最多同时有 max_in_flight_batches
+个批量请求在途；同一 Agent 的事件总是进入同一通道并按顺序发送
+"""
+
+import threading
+import queue
+import time
+from typing import Dict, Any, List, Optional
+import logging
+
+import requests
+
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.fanout import routing_key
+from agent_monitor.transports.priority import PriorityEventQueue, default_limits
+from agent_monitor.utils import compression as codec
+
+logger = logging.getLogger(__name__)
+
+
+# 关闭开始后，等待事件的最长间隔（秒）
+STOP_POLL_INTERVAL = 0.05
+
+
+def _get(source, timeout: float, stop: Optional[threading.Event]):
+    """带超时地取出一个事件，stop 被设置后不再等满超时"""
+    if stop is None:
+        return source.get(timeout=timeout)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            return source.get(timeout=max(min(remaining, STOP_POLL_INTERVAL), 0))
+        except queue.Empty:
+            if stop.is_set() or remaining <= STOP_POLL_INTERVAL:
+                raise
+
+
+def collect_batch(source, batch_size: int, linger: float, stop: Optional[threading.Event] = None) -> list:
+    """
+    从队列收集一个批次
+
+    阻塞等待第一个事件，之后最多再等待 linger 秒或凑满 batch_size
+
+    Args:
+        source: 事件队列（queue.Queue 或 PriorityEventQueue）
+        batch_size: 单批最大事件数
+        linger: 批次最长等待时间（秒）
+        stop: 关闭事件，设置后队列一空就立即返回，不再等满 linger
+
+    Returns:
+        事件列表，等待超时时为空列表
+    """
+    try:
+        first = _get(source, linger, stop)
+    except queue.Empty:
+        return []
+
+    batch = [first]
+    deadline = time.monotonic() + linger
+
+    while len(batch) < batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_get(source, remaining, stop))
+        except queue.Empty:
+            break
+
+    return batch
+
+
+class BatchingTransport(DirectTransport):
+    """
+    批量传输器
+
+    与 DirectTransport 接口一致（send / send_sync / get_stats / close），
+    可直接作为 CrewAIPlugin 的 transport 使用
+    """
+
+    def __init__(
+        self,
+        monitor_url: str,
+        timeout: float = 1.0,
+        silent_fail: bool = True,
+        batch_size: int = 100,
+        linger: float = 0.2,
+        max_queue_size: int = 10000,
+        priority_limits: Optional[Dict[str, int]] = None,
+        event_priorities: Optional[Dict[str, str]] = None,
+        spool_dir: Optional[str] = None,
+        compression: Optional[str] = None,
+        compress_min_bytes: int = codec.DEFAULT_MIN_BYTES,
+        dictionary: bool = False,
+        epoch_ns: bool = False,
+        wire_version: str = "1.0",
+        max_in_flight_batches: int = 1
+    ):
+        """
+        初始化批量传输器
+
+        Args:
+            monitor_url: 监控服务器 URL (e.g., http://localhost:8080)
+            timeout: 请求超时时间（秒），默认 1 秒
+            silent_fail: 是否静默失败，True 时失败不抛异常
+            batch_size: 单批最大事件数，达到后立即发送
+            linger: 批次最长等待时间（秒），超时后即使未满也发送
+            max_queue_size: 队列总容量，按优先级划分（见 priority_limits）
+            priority_limits: 各优先级队列容量 {"high": n, "normal": n, "low": n}，
+                默认按 max_queue_size 划分；某级队列满时丢弃该级最旧的事件
+            event_priorities: 事件类型 -> 优先级 ("high" / "normal" / "low")，
+                覆盖默认映射
+            spool_dir: 暂存目录，设置后发送失败的批次写入磁盘
+            compression: 批量请求压缩编码 ("gzip" / "zstd" / "auto")
+            compress_min_bytes: 请求体小于该大小（字节）时不压缩
+            dictionary: 批量请求是否使用字典编码（服务器声明支持时）
+            epoch_ns: 时间戳以整数纳秒发送（服务器声明支持时）
+            wire_version: 线格式版本 "1.0" / "2.0"（v2 在服务器声明支持时使用）
+            max_in_flight_batches: 同时在途的最大批次数（发送通道数），
+                1 表示每批收到响应后再发送下一批；每个通道的队列使用同样的容量
+        """
+        super().__init__(
+            monitor_url,
+            timeout=timeout,
+            silent_fail=silent_fail,
+            spool_dir=spool_dir,
+            compression=compression,
+            compress_min_bytes=compress_min_bytes,
+            dictionary=dictionary,
+            epoch_ns=epoch_ns,
+            wire_version=wire_version
+        )
+        self.batch_size = batch_size
+        self.linger = linger
+
+        self.max_in_flight_batches = max(1, max_in_flight_batches)
+        lanes = self.max_in_flight_batches
+        # 按 Agent 分配通道时负载不一定均匀，容量不在通道间划分
+        limits = priority_limits or default_limits(max_queue_size)
+
+        self.stats.declare("batches")
+        self.stats.declare_histogram("queue_depth")
+
+        # 每个发送通道一个队列和一个后台线程；只有一个通道时使用共享的 session
+        self._queues: List[PriorityEventQueue] = []
+        self._sessions: List[requests.Session] = []
+        self._workers: List[threading.Thread] = []
+        for index in range(lanes):
+            lane_queue = PriorityEventQueue(limits, event_priorities)
+            session = self.session if lanes == 1 else requests.Session()
+            worker = threading.Thread(
+                target=self._run,
+                args=(lane_queue, session),
+                name="agent-monitor-batching" if lanes == 1 else f"agent-monitor-batching-{index}",
+                daemon=True
+            )
+            self._queues.append(lane_queue)
+            self._sessions.append(session)
+            self._workers.append(worker)
+
+        for worker in self._workers:
+            worker.start()
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        将事件放入队列（非阻塞）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功入队，已关闭时返回 False
+        """
+        if self._closed.is_set():
+            self.stats.incr("dropped")
+            return False
+
+        if len(self._queues) == 1:
+            lane_queue = self._queues[0]
+        else:
+            lane_queue = self._queues[hash(routing_key(event)) % len(self._queues)]
+
+        shed = lane_queue.put(event)
+        if shed is not None:
+            self.stats.incr("dropped")
+            logger.debug(f"事件队列已满，丢弃最旧的 {shed} 优先级事件")
+        else:
+            with self._window_lock:
+                self._in_flight += 1
+        return True
+
+    def _run(self, source: PriorityEventQueue, session: requests.Session):
+        """后台线程：按批量大小或等待时间汇总本通道的事件并顺序发送"""
+        while not (self._closed.is_set() and source.empty()):
+            batch = collect_batch(source, self.batch_size, self.linger, self._closed)
+            if batch:
+                # 取出批次后剩余的队列长度
+                self.stats.observe("queue_depth", source.qsize())
+                self._flush_batch(batch, session)
+
+    def _flush_batch(self, batch: list, session: Optional[requests.Session] = None):
+        """发送一个批次，异常不会终止后台线程"""
+        try:
+            self._send_batch(batch, spool=True, session=session)
+            self.stats.incr("batches")
+        except Exception as e:
+            if not self.silent_fail:
+                logger.error(f"批量发送异常: {e}")
+        finally:
+            self._release(len(batch))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = super().get_stats()
+        stats["queued"] = sum(lane_queue.qsize() for lane_queue in self._queues)
+        for lane_queue in self._queues:
+            for priority, depth in lane_queue.depths().items():
+                stats[f"queued_{priority}"] = stats.get(f"queued_{priority}", 0) + depth
+            for priority, dropped in lane_queue.dropped.items():
+                stats[f"dropped_{priority}"] = stats.get(f"dropped_{priority}", 0) + dropped
+        return stats
+
+    def _default_close_timeout(self) -> float:
+        return self.timeout * 2 + self.linger
+
+    def _drain(self, deadline: float) -> int:
+        """等待后台线程发送完队列，超时则把剩余事件写入暂存"""
+        for worker in self._workers:
+            worker.join(timeout=max(deadline - time.monotonic(), 0))
+        for worker, lane_queue in zip(self._workers, self._queues):
+            if worker.is_alive():
+                self._spool_queued(lane_queue)
+        abandoned = self._wait_idle(deadline)
+
+        for session in self._sessions:
+            if session is not self.session:
+                session.close()
+        return abandoned
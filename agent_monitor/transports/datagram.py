@@ -0,0 +1,203 @@
+"""
+数据报传输器 - udp:// 或 unixgram:// 即发即弃
+
+类似 StatsD 的模型，适合大量可容忍丢失的事件（llm_stream_chunk、agent_thinking）：
+- 无连接状态、无重试、无后台线程
+- socket 为非阻塞模式，内核缓冲区满时直接丢弃，不阻塞 Agent 线程
+- 超过单个数据报大小的事件按 agent_monitor.protocol.datagram 切片
+"""
+
+import itertools
+import os
+import socket
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+import logging
+
+from agent_monitor.protocol import datagram, framing
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+# 默认单个数据报大小：UDP 取以太网 MTU 内的安全值，unixgram 无 MTU 限制
+_DEFAULT_MAX_SIZE = {
+    "udp": 1400,
+    "unixgram": 8192,
+}
+
+
+class DatagramTransport(BaseTransport):
+    """
+    数据报传输器
+
+    与 DirectTransport 接口一致，send() 直接在调用线程发送
+    """
+
+    def __init__(
+        self,
+        address: str,
+        max_datagram_size: Optional[int] = None,
+        max_chunks: int = 16,
+        silent_fail: bool = True
+    ):
+        """
+        初始化数据报传输器
+
+        Args:
+            address: udp://host:port 或 unixgram:///path/to/socket
+            max_datagram_size: 单个数据报最大字节数，默认 UDP 1400 / unixgram 8192
+            max_chunks: 单个事件最多切分的数据报数，超出时丢弃
+            silent_fail: 是否静默失败，True 时失败不抛异常
+        """
+        parsed = urlparse(address)
+        if parsed.scheme not in _DEFAULT_MAX_SIZE:
+            raise ValueError(f"不支持的数据报地址: {address}")
+
+        self.address = address
+        self.scheme = parsed.scheme
+        self.max_datagram_size = max_datagram_size or _DEFAULT_MAX_SIZE[parsed.scheme]
+        self.max_chunks = max_chunks
+        self.silent_fail = silent_fail
+        self.codec = framing.default_codec()
+
+        if parsed.scheme == "udp":
+            if not parsed.hostname or not parsed.port:
+                raise ValueError(f"无效的 UDP 地址: {address}")
+            self._target: Any = (parsed.hostname, parsed.port)
+            family = socket.AF_INET6 if ":" in parsed.hostname else socket.AF_INET
+        else:
+            self._target = parsed.path
+            family = socket.AF_UNIX
+
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._connected = False
+        self._next_connect = 0.0
+        self._msg_ids = itertools.count(os.getpid() << 32)
+
+        # 统计
+        self.stats = TransportStats(
+            ("sent", "dropped", "oversize", "oversize_dropped", "datagrams"),
+            histograms={"latency_ms": 1000, "payload_bytes": 1}
+        )
+
+    def _ensure_connected(self) -> bool:
+        """
+        connect 数据报 socket（只设置默认目标，不产生网络流量）
+
+        unixgram 接收端不存在时 connect 会失败，每秒最多重试一次，
+        避免每个事件都付出一次失败的系统调用
+        """
+        if self._connected:
+            return True
+        now = time.monotonic()
+        if now < self._next_connect:
+            return False
+        try:
+            self._sock.connect(self._target)
+            self._connected = True
+            return True
+        except OSError as e:
+            self._next_connect = now + 1.0
+            logger.debug(f"数据报目标不可用 {self.address}: {e}")
+            return False
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        发送事件（非阻塞，即发即弃）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否已交给内核发送（不代表接收端收到）
+        """
+        started = time.perf_counter()
+        try:
+            payload = framing.encode_payload(event, self.codec)
+        except Exception as e:
+            self.stats.incr("dropped")
+            if not self.silent_fail:
+                logger.error(f"事件编码失败: {e}")
+            return False
+
+        datagrams = datagram.encode_datagrams(
+            payload,
+            next(self._msg_ids),
+            self.codec,
+            self.max_datagram_size,
+            self.max_chunks
+        )
+        if datagrams is None:
+            self.stats.incr("oversize_dropped")
+            logger.debug(f"事件过大（{len(payload)} 字节），已丢弃")
+            return False
+        if len(datagrams) > 1:
+            self.stats.incr("oversize")
+
+        if not self._ensure_connected():
+            self.stats.incr("dropped")
+            return False
+
+        try:
+            for data in datagrams:
+                self._sock.send(data)
+                self.stats.incr("datagrams")
+        except BlockingIOError:
+            # 内核发送缓冲区已满
+            self.stats.incr("dropped")
+            return False
+        except OSError as e:
+            # 接收端不存在（ICMP 不可达 / unixgram 接收端已退出）
+            self.stats.incr("dropped")
+            if self.scheme == "unixgram":
+                self._connected = False
+            logger.debug(f"数据报发送失败: {e}")
+            return False
+
+        self.stats.incr("sent")
+        self.stats.observe("latency_ms", (time.perf_counter() - started) * 1000)
+        self.stats.observe("payload_bytes", len(payload))
+        return True
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """同步发送事件（数据报发送本身即为非阻塞，与 send 相同）"""
+        return self.send(event)
+
+    def send_batch(self, events: list) -> bool:
+        """
+        逐个发送事件
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            bool: 是否全部发送成功
+        """
+        results = [self.send(event) for event in events]
+        return all(results)
+
+    def health_check(self) -> bool:
+        """
+        健康检查 - 数据报无连接状态，只检查目标是否可设置
+
+        Returns:
+            bool: 是否可用
+        """
+        return self._ensure_connected()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return self.stats.snapshot()
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        关闭 socket（数据报发送即完成，没有需要等待的事件）
+
+        Returns:
+            int: 被放弃的事件数，总是 0
+        """
+        self._sock.close()
+        return 0
@@ -4,16 +4,34 @@
 最简单的方案，插件直接 HTTP POST 到监控服务器
 """
 
+import itertools
+import queue
 import threading
 import socket
+import time
 import requests
 from typing import Dict, Any, Optional
 import logging
 
+from agent_monitor.protocol import capabilities, compact
+from agent_monitor.protocol import dictionary as dict_codec
+from agent_monitor.protocol import serializer
+from agent_monitor.protocol import timestamps
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.resilience import CircuitBreaker, decorrelated_jitter
+from agent_monitor.transports.spool import BatchRejected, EventSpool, SpoolReplayer
+from agent_monitor.utils import compression as codec
+from agent_monitor.utils.stats import TransportStats
+
 logger = logging.getLogger(__name__)
 
 
-class DirectTransport:
+def _is_rejection(status_code: int) -> bool:
+    """4xx 表示请求本身被拒绝（408 / 429 为暂时性错误，稍后可以重试）"""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+class DirectTransport(BaseTransport):
     """
     直连传输器
 
@@ -21,11 +39,26 @@ class DirectTransport:
     适合 MVP 验证和小规模部署
     """
 
+    # 事件只经过 serializer 编码，时间戳在发送线程上格式化
+    deferred_timestamps = True
+
     def __init__(
         self,
         monitor_url: str,
         timeout: float = 1.0,
-        silent_fail: bool = True
+        silent_fail: bool = True,
+        spool_dir: Optional[str] = None,
+        spool_max_bytes: int = 64 * 1024 * 1024,
+        compression: Optional[str] = None,
+        compress_min_bytes: int = codec.DEFAULT_MIN_BYTES,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.1,
+        retry_backoff_max: float = 2.0,
+        dictionary: bool = False,
+        epoch_ns: bool = False,
+        wire_version: str = "1.0"
     ):
         """
         初始化直连传输器
@@ -34,17 +67,82 @@ class DirectTransport:
             monitor_url: 监控服务器 URL (e.g., http://localhost:8080)
             timeout: 请求超时时间（秒），默认 1 秒
             silent_fail: 是否静默失败，True 时失败不抛异常
+            spool_dir: 暂存目录，设置后连接失败/超时的事件写入磁盘，
+                服务器恢复后自动回放
+            spool_max_bytes: 暂存目录大小上限（字节）
+            compression: 批量请求压缩编码 ("gzip" / "zstd" / "auto")，
+                只有服务器在 /api/health 中声明支持时才会压缩
+            compress_min_bytes: 请求体小于该大小（字节）时不压缩
+            failure_threshold: 连续失败多少次后熔断，熔断期间直接快速失败（启用暂存时写入暂存）
+            reset_timeout: 熔断后多久（秒）放行一次试探请求
+            max_retries: 服务器返回 5xx 时的最大重试次数
+            retry_backoff: 重试最小等待时间（秒），按去相关抖动递增
+            retry_backoff_max: 重试最大等待时间（秒）
+            dictionary: 批量请求是否使用字典编码（source / metadata 公共块每批只发送一次），
+                只有服务器在 /api/health 中声明支持时才会启用
+            epoch_ns: 时间戳以整数纳秒发送（请求带 X-Timestamp-Format: epoch_ns），
+                只有服务器在 /api/health 中声明支持时才会启用，否则为 ISO-8601 字符串
+            wire_version: 线格式版本，"1.0"（默认）或 "2.0"（紧凑格式，见 agent_monitor.protocol.compact）；
+                "2.0" 只有服务器在 /api/health 中声明支持、并接受 /api/schema 上发布的编码表后才会启用
         """
+        if wire_version not in ("1.0", compact.VERSION):
+            raise ValueError(f"不支持的线格式版本: {wire_version}")
         self.monitor_url = monitor_url.rstrip("/")
         self.timeout = timeout
         self.silent_fail = silent_fail
         self.session = requests.Session()
 
-        # 统计
-        self.stats = {
-            "sent": 0,
-            "failed": 0
-        }
+        # 压缩协商（服务器能力在首次批量发送前探测）
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self._server_encodings: Optional[frozenset] = None
+        self._capabilities_checked_at = 0.0
+
+        # 字典编码协商（与压缩共用一次能力探测）
+        self.dictionary = dictionary
+        self._server_dictionary = False
+
+        # 整数纳秒时间戳协商（同上）
+        self.epoch_ns = epoch_ns
+        self._server_epoch_ns = False
+
+        # 紧凑线格式 v2 协商（同上），编码表发布到服务器后才使用
+        self.wire_version = wire_version
+        self._server_wire_v2 = False
+        self._schema_published = False
+
+        # 批次序号（X-Batch-Seq 请求头），重试时不变，服务器可据此识别重复的批次
+        self._batch_seq = itertools.count(1)
+
+        # 熔断与重试
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+
+        # 统计（按线程分片，发送线程并发更新不会丢失计数）
+        self.stats = TransportStats(
+            ("sent", "failed", "dropped", "retries"),
+            histograms={"latency_ms": 1000, "batch_size": 1, "payload_bytes": 1}
+        )
+        if compression:
+            self.stats.declare("bytes_raw", "bytes_sent")
+
+        # 磁盘暂存（可选）
+        self.spool: Optional[EventSpool] = None
+        self._replayer: Optional[SpoolReplayer] = None
+        if spool_dir:
+            self.spool = EventSpool(spool_dir, max_bytes=spool_max_bytes)
+            self._replayer = SpoolReplayer(
+                self.spool,
+                send_batch=lambda events: self._send_batch(events, spool=False),
+                health_check=self.health_check,
+            )
+
+        # 已接收但尚未发送完成的事件数，close(flush=True) 等待其归零
+        self._in_flight = 0
+        self._window_lock = threading.Condition()
+        self._closed = threading.Event()
 
     def send(self, event: Dict[str, Any]) -> bool:
         """
@@ -54,15 +152,33 @@ class DirectTransport:
             event: 事件字典
 
         Returns:
-            bool: 是否成功
+            bool: 是否成功，已关闭时返回 False
         """
+        if self._closed.is_set():
+            self.stats.incr("dropped")
+            return False
+
+        # 熔断期间在调用线程直接快速失败，不再创建发送线程；
+        # 冷却结束时这里取得的试探名额交给发送线程，不再重复调用 allow()
+        admitted = False
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            if not self.breaker.allow():
+                self._reject([event])
+                return False
+            admitted = True
+
+        with self._window_lock:
+            self._in_flight += 1
+
         # 在独立线程中发送，不阻塞 Agent
         def send_async():
             try:
-                self._send_sync(event)
+                self._send_sync(event, admitted=admitted)
             except Exception as e:
                 if not self.silent_fail:
                     logger.error(f"发送事件失败: {e}")
+            finally:
+                self._release(1)
 
         thread = threading.Thread(target=send_async, daemon=True)
         thread.start()
@@ -79,54 +195,123 @@ class DirectTransport:
         Returns:
             bool: 是否成功
         """
+        if self._closed.is_set():
+            self.stats.incr("dropped")
+            return False
         return self._send_sync(event)
 
-    def _send_sync(self, event: Dict[str, Any]) -> bool:
+    def _send_sync(
+        self,
+        event: Dict[str, Any],
+        session: Optional[requests.Session] = None,
+        admitted: bool = False
+    ) -> bool:
         """
         内部同步发送实现
 
         Args:
             event: 事件字典
+            session: 使用的 session，默认为共享的 self.session
+            admitted: 调用方已通过 breaker.allow()（每个事件只能调用一次，
+                否则半开状态下的试探名额会被同一个事件占用两次）
 
         Returns:
             bool: 是否成功
         """
         url = f"{self.monitor_url}/api/events"
 
+        if not admitted and not self.breaker.allow():
+            self._reject([event])
+            return False
+
         try:
-            response = self.session.post(
+            # 单个事件不触发能力探测和编码表发布，只使用已知的服务器能力
+            if self._server_wire_v2 and self._schema_published:
+                data = serializer.dumps(compact.encode_event(event))
+                headers = {"Content-Type": compact.CONTENT_TYPE, compact.SCHEMA_HEADER: compact.SCHEMA_ID}
+            else:
+                epoch_ns = self.epoch_ns and self._server_epoch_ns
+                data = serializer.encode_event(event, epoch_ns)
+                headers = {"Content-Type": "application/json"}
+                if epoch_ns:
+                    headers[timestamps.HEADER] = timestamps.FEATURE
+
+            response = self._post(
+                session or self.session,
                 url,
-                json=event,
+                data=data,
+                headers=headers,
                 timeout=self.timeout
             )
 
             if response.status_code == 200:
-                self.stats["sent"] += 1
+                self.stats.incr("sent")
                 logger.debug(f"事件发送成功: {event.get('event', {}).get('type')}")
                 return True
             else:
-                self.stats["failed"] += 1
+                self.stats.incr("failed")
                 logger.warning(
                     f"事件发送失败: {response.status_code} - {response.text}"
                 )
                 return False
 
         except requests.exceptions.Timeout:
-            self.stats["failed"] += 1
+            self.breaker.record_failure()
+            self.stats.incr("failed")
             logger.warning("事件发送超时")
+            self._spool_events([event])
             return False
 
         except requests.exceptions.ConnectionError:
-            self.stats["failed"] += 1
+            self.breaker.record_failure()
+            self.stats.incr("failed")
             logger.warning("无法连接到监控服务器")
+            self._spool_events([event])
             return False
 
         except Exception as e:
-            self.stats["failed"] += 1
+            self.breaker.record_failure()
+            self.stats.incr("failed")
             if not self.silent_fail:
                 logger.error(f"事件发送异常: {e}")
             return False
 
+    def _post(self, session: requests.Session, url: str, **kwargs) -> requests.Response:
+        """
+        POST 请求，服务器返回 5xx 时按去相关抖动退避重试，并更新熔断器
+
+        连接失败/超时的异常直接抛出，由调用方记录熔断失败
+
+        Returns:
+            最后一次请求的响应
+        """
+        delay = self.retry_backoff
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            response = session.post(url, **kwargs)
+            self.stats.observe("latency_ms", (time.perf_counter() - started) * 1000)
+            if not attempt and response.request.body:
+                self.stats.observe("payload_bytes", len(response.request.body))
+            if response.status_code < 500:
+                # 4xx 说明服务器可达，不计入熔断
+                self.breaker.record_success()
+                return response
+            if attempt >= self.max_retries:
+                self.breaker.record_failure()
+                return response
+
+            attempt += 1
+            self.stats.incr("retries")
+            delay = decorrelated_jitter(self.retry_backoff, self.retry_backoff_max, delay)
+            logger.debug(f"服务器返回 {response.status_code}，{delay:.2f} 秒后第 {attempt} 次重试")
+            time.sleep(delay)
+
+    def _reject(self, events: list):
+        """熔断期间快速失败，启用暂存时写入暂存"""
+        self.stats.incr("failed", len(events))
+        self._spool_events(events)
+
     def send_batch(self, events: list) -> bool:
         """
         批量发送事件
@@ -137,35 +322,224 @@ class DirectTransport:
         Returns:
             bool: 是否成功
         """
+        return self._send_batch(events, spool=True)
+
+    def _send_batch(
+        self,
+        events: list,
+        spool: bool,
+        session: Optional[requests.Session] = None
+    ) -> bool:
+        """
+        内部批量发送实现
+
+        Args:
+            events: 事件列表
+            spool: 连接失败/超时时是否写入暂存（回放、共享内存转发时为 False）
+            session: 使用的 session，默认为共享的 self.session
+
+        Returns:
+            bool: 是否成功
+
+        Raises:
+            BatchRejected: spool=False 时服务器以 4xx 拒绝批次
+        """
         if not events:
             return True
 
         url = f"{self.monitor_url}/api/events/batch"
 
+        if not self.breaker.allow():
+            if spool:
+                self._reject(events)
+            else:
+                self.stats.incr("failed", len(events))
+            return False
+
+        self.stats.observe("batch_size", len(events))
+        session = session or self.session
+        seq = str(next(self._batch_seq))
         try:
-            response = self.session.post(
+            body, headers = self._encode_batch(events)
+            headers["X-Batch-Seq"] = seq
+            response = self._post(
+                session,
                 url,
-                json=events,
+                data=body,
+                headers=headers,
                 timeout=self.timeout * 2  # 批量发送超时加倍
             )
 
+            if response.status_code == 415 and self._downgrade(headers):
+                # 服务器实际不支持该编码，降级后重发
+                body, headers = self._encode_batch(events)
+                headers["X-Batch-Seq"] = seq
+                response = self._post(
+                    session,
+                    url,
+                    data=body,
+                    headers=headers,
+                    timeout=self.timeout * 2
+                )
+
             if response.status_code == 200:
-                self.stats["sent"] += len(events)
+                self.stats.incr("sent", len(events))
                 logger.debug(f"批量发送成功: {len(events)} 个事件")
                 return True
-            else:
-                self.stats["failed"] += len(events)
-                logger.warning(
-                    f"批量发送失败: {response.status_code} - {response.text}"
-                )
-                return False
+
+            self.stats.incr("failed", len(events))
+            logger.warning(
+                f"批量发送失败: {response.status_code} - {response.text}"
+            )
+            if not spool and _is_rejection(response.status_code):
+                raise BatchRejected(response.status_code)
+            return False
+
+        except BatchRejected:
+            raise
+
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            self.breaker.record_failure()
+            self.stats.incr("failed", len(events))
+            logger.warning("批量发送失败，无法连接到监控服务器")
+            if spool:
+                self._spool_events(events)
+            return False
 
         except Exception as e:
-            self.stats["failed"] += len(events)
+            self.breaker.record_failure()
+            self.stats.incr("failed", len(events))
             if not self.silent_fail:
                 logger.error(f"批量发送异常: {e}")
             return False
 
+    def _encode_batch(self, events: list):
+        """
+        编码批量请求体，满足条件时使用字典编码和压缩
+
+        Returns:
+            (请求体字节, 请求头)
+        """
+        if self.dictionary or self.epoch_ns or self.wire_version == compact.VERSION:
+            self._check_capabilities()
+        if self._wire_v2_ready():
+            # v2 自带整数纳秒时间戳和短字段名，不再叠加字典编码
+            body = serializer.dumps(compact.encode_events(events))
+            headers = {"Content-Type": compact.CONTENT_TYPE, compact.SCHEMA_HEADER: compact.SCHEMA_ID}
+        else:
+            epoch_ns = self.epoch_ns and self._server_epoch_ns
+            if self.dictionary and self._server_dictionary:
+                body = serializer.dumps(dict_codec.encode_batch(
+                    events, serializer.epoch_timestamp if epoch_ns else serializer.iso_timestamp
+                ))
+                headers = {"Content-Type": dict_codec.CONTENT_TYPE}
+            else:
+                body = serializer.encode_events(events, epoch_ns)
+                headers = {"Content-Type": "application/json"}
+            if epoch_ns:
+                headers[timestamps.HEADER] = timestamps.FEATURE
+
+        if not self.compression or len(body) < self.compress_min_bytes:
+            return body, headers
+
+        encoding = codec.negotiate(self.compression, self._get_server_encodings())
+        if encoding is None:
+            return body, headers
+
+        compressed = codec.compress(body, encoding)
+        self.stats.incr("bytes_raw", len(body))
+        self.stats.incr("bytes_sent", len(compressed))
+        headers["Content-Encoding"] = encoding
+        return compressed, headers
+
+    def _get_server_encodings(self) -> frozenset:
+        """获取服务器支持的压缩编码"""
+        self._check_capabilities()
+        return self._server_encodings or frozenset()
+
+    def _check_capabilities(self):
+        """服务器能力未知，或未声明任何能力且距上次探测超过 60 秒时重新探测"""
+        if self._server_encodings is None or (
+            not self._server_encodings
+            and not self._server_dictionary
+            and not self._server_epoch_ns
+            and not self._server_wire_v2
+            and time.monotonic() - self._capabilities_checked_at > 60.0
+        ):
+            self.health_check()
+
+    def _update_capabilities(self, response: requests.Response):
+        """从健康检查响应中更新服务器能力"""
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        self._server_encodings = codec.parse_server_encodings(response.headers, body)
+        self._server_dictionary = capabilities.server_supports(body, dict_codec.FEATURE)
+        self._server_epoch_ns = capabilities.server_supports(body, timestamps.FEATURE)
+        self._server_wire_v2 = capabilities.server_supports(body, compact.FEATURE)
+        self._capabilities_checked_at = time.monotonic()
+
+    def _wire_v2_ready(self) -> bool:
+        """是否使用 v2 线格式：已配置、服务器声明支持，且编码表已发布"""
+        if self.wire_version != compact.VERSION or not self._server_wire_v2:
+            return False
+        if not self._schema_published:
+            self._publish_schema()
+        return self._schema_published
+
+    def _publish_schema(self):
+        """把 v2 编码表发布到服务器的 /api/schema，服务器拒绝时回退到 v1"""
+        try:
+            response = self.session.post(
+                f"{self.monitor_url}/api/schema",
+                data=serializer.dumps(compact.schema_descriptor()),
+                headers={"Content-Type": "application/json", compact.SCHEMA_HEADER: compact.SCHEMA_ID},
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            # 网络错误时保持 v1，下一个批次再尝试
+            logger.debug(f"发布 v2 编码表失败: {e}")
+            return
+
+        if 200 <= response.status_code < 300:
+            self._schema_published = True
+            logger.debug(f"v2 编码表已发布: {compact.SCHEMA_ID}")
+        else:
+            logger.warning(f"服务器拒绝 v2 编码表 ({response.status_code})，改为使用 v1 线格式")
+            self._server_wire_v2 = False
+
+    def _downgrade(self, headers: Dict[str, str]) -> bool:
+        """
+        服务器以 415 拒绝请求体格式：禁用本次使用的压缩 / v2 线格式 / 字典编码 / 整数纳秒时间戳
+
+        Returns:
+            bool: 是否有可以降级的选项（有则应重发）
+        """
+        if "Content-Encoding" in headers:
+            logger.warning(f"服务器拒绝 {headers['Content-Encoding']} 压缩，改为不压缩发送")
+            self._server_encodings = frozenset()
+            return True
+        if headers.get("Content-Type") == compact.CONTENT_TYPE:
+            logger.warning("服务器拒绝 v2 线格式，改为使用 v1")
+            self._server_wire_v2 = False
+            self._schema_published = False
+            return True
+        if headers.get("Content-Type") == dict_codec.CONTENT_TYPE:
+            logger.warning("服务器拒绝字典编码，改为发送完整事件")
+            self._server_dictionary = False
+            return True
+        if timestamps.HEADER in headers:
+            logger.warning("服务器拒绝整数纳秒时间戳，改为发送 ISO-8601 字符串")
+            self._server_epoch_ns = False
+            return True
+        return False
+
+    def _spool_events(self, events: list):
+        """将发送失败的事件写入磁盘暂存（未启用暂存时忽略）"""
+        if self.spool is not None:
+            self.spool.append(events)
+
     def health_check(self) -> bool:
         """
         健康检查 - 测试监控服务器是否可达
@@ -176,44 +550,115 @@ class DirectTransport:
         try:
             url = f"{self.monitor_url}/api/health"
             response = self.session.get(url, timeout=2.0)
-            return response.status_code == 200
+            healthy = response.status_code == 200
         except:
-            return False
+            healthy = False
 
-    def get_stats(self) -> Dict[str, int]:
+        if self.compression or self.dictionary or self.epoch_ns or self.wire_version == compact.VERSION:
+            if healthy:
+                self._update_capabilities(response)
+            else:
+                self._server_encodings = frozenset()
+                self._server_dictionary = False
+                self._server_epoch_ns = False
+                self._server_wire_v2 = False
+                self._capabilities_checked_at = time.monotonic()
+        return healthy
+
+    def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
-        return self.stats.copy()
+        stats = self.stats.snapshot()
+        for key, value in self.breaker.get_stats().items():
+            stats[f"breaker_{key}"] = value
+        if self.spool is not None:
+            for key, value in self.spool.get_stats().items():
+                stats[f"spool_{key}"] = value
+            stats["spool_replayed"] = self._replayer.stats["replayed"]
+            stats["spool_rejected"] = self._replayer.stats["rejected"]
+        return stats
+
+    def _release(self, count: int):
+        """事件发送完成（成功或失败），在途数归零时唤醒 close()"""
+        with self._window_lock:
+            self._in_flight -= count
+            if self._in_flight <= 0:
+                self._window_lock.notify_all()
+
+    def _wait_idle(self, deadline: float) -> int:
+        """
+        等待在途事件发送完成
+
+        Args:
+            deadline: time.monotonic() 截止时间
+
+        Returns:
+            int: 截止时仍未完成的事件数
+        """
+        with self._window_lock:
+            self._window_lock.wait_for(
+                lambda: self._in_flight <= 0,
+                max(deadline - time.monotonic(), 0)
+            )
+            return max(self._in_flight, 0)
+
+    def _default_close_timeout(self) -> float:
+        return self.timeout * 2
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止接收事件并关闭 session
+
+        Args:
+            flush: 是否等待已接收的事件发送完成
+            timeout: 等待的最长时间（秒），默认按请求超时计算
 
-    def close(self):
-        """关闭 session"""
+        Returns:
+            int: 截止时仍未发送完成而被放弃的事件数
+        """
+        self._closed.set()
+        if timeout is None:
+            timeout = self._default_close_timeout()
+        deadline = time.monotonic() + (timeout if flush else 0)
+
+        abandoned = self._drain(deadline)
+        if abandoned:
+            logger.warning(f"关闭传输器时放弃了 {abandoned} 个未发送完成的事件")
+
+        if self._replayer is not None:
+            self._replayer.close()
+        if self.spool is not None:
+            self.spool.close()
         self.session.close()
+        return abandoned
 
+    def _drain(self, deadline: float) -> int:
+        """
+        在截止时间前发送剩余事件，子类覆盖以处理自己的队列
 
-def create_transport(
-    monitor_url: Optional[str] = None,
-    transport_type: str = "direct"
-) -> DirectTransport:
-    """
-    创建传输器实例
+        Returns:
+            int: 被放弃的事件数
+        """
+        return self._wait_idle(deadline)
 
-    Args:
-        monitor_url: 监控服务器 URL，默认从环境变量读取
-        transport_type: 传输器类型，当前只支持 "direct"
+    def _spool_queued(self, source):
+        """
+        截止时间已到：取出队列中尚未发送的事件写入暂存
 
-    Returns:
-        传输器实例
-    """
-    import os
+        未启用暂存时这些事件仍计入在途数（即被放弃的事件）
+        """
+        events = []
+        while True:
+            try:
+                item = source.get_nowait()
+            except queue.Empty:
+                break
+            events.append(item)
 
-    if monitor_url is None:
-        monitor_url = os.getenv("AGENT_MONITOR_URL")
+        if events and self.spool is not None:
+            self._spool_events(events)
+            self._release(len(events))
+            logger.info(f"关闭传输器时将 {len(events)} 个未发送的事件写入暂存")
 
-    if not monitor_url:
-        raise ValueError(
-            "未设置监控服务器 URL，请设置 AGENT_MONITOR_URL 环境变量"
-        )
 
-    if transport_type == "direct":
-        return DirectTransport(monitor_url)
-    else:
-        raise ValueError(f"不支持的传输器类型: {transport_type}")
+# 兼容旧的导入路径
+from agent_monitor.transports.registry import create_transport  # noqa: E402,F401
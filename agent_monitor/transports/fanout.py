@@ -0,0 +1,291 @@
+"""
+一致性哈希分发传输器 - 把事件分散到多个监控收集端
+
+单个 monitor_url 的吞吐受限于一个收集端，这里为每个收集端创建一个子传输器
+（默认 DirectTransport），按 source.agent_id 做一致性哈希选择收集端：
+- 同一个 Agent 的事件总是进入同一个子传输器，保持该 Agent 的事件顺序
+- 后台线程定期对每个收集端执行 health_check，失败的节点从哈希环中摘除，
+  恢复后重新加入；只有落在该节点上的 Agent 会迁移（一致性哈希）
+- 所有节点都不健康时使用完整哈希环，由子传输器自身的暂存/熔断处理失败
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    一致性哈希环
+
+    每个节点映射为 replicas 个虚拟节点，使负载在节点间均匀分布
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100):
+        """
+        初始化哈希环
+
+        Args:
+            nodes: 节点列表
+            replicas: 每个节点的虚拟节点数
+        """
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: List[str] = []
+        self.rebuild(nodes)
+
+    def rebuild(self, nodes: Iterable[str]):
+        """用新的节点集合重建哈希环"""
+        ring = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(self.replicas)
+        )
+        self.nodes = sorted(set(node for _, node in ring))
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        获取 key 所在的节点
+
+        Returns:
+            节点，哈希环为空时返回 None
+        """
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def routing_key(event: Dict[str, Any]) -> str:
+    """事件的路由键: source.agent_id（没有时为空字符串）"""
+    source = event.get("source")
+    if isinstance(source, dict):
+        return str(source.get("agent_id") or "")
+    return ""
+
+
+class FanoutTransport(BaseTransport):
+    """
+    一致性哈希分发传输器
+
+    与 DirectTransport 接口一致（send / send_sync / send_batch /
+    health_check / get_stats / close），可直接作为 CrewAIPlugin 的 transport
+    """
+
+    def __init__(
+        self,
+        monitor_urls: List[str],
+        transport_factory: Optional[Callable[[str], Any]] = None,
+        health_interval: float = 5.0,
+        replicas: int = 100,
+        spool_dir: Optional[str] = None,
+        **transport_kwargs
+    ):
+        """
+        初始化分发传输器
+
+        Args:
+            monitor_urls: 收集端 URL 列表
+            transport_factory: 为每个 URL 创建子传输器的函数，默认 DirectTransport
+            health_interval: 健康检查间隔（秒）
+            replicas: 每个收集端的虚拟节点数
+            spool_dir: 暂存目录，每个收集端使用其中一个独立子目录
+            **transport_kwargs: 传给默认 DirectTransport 的其他参数
+        """
+        urls = [url.rstrip("/") for url in monitor_urls if url]
+        if not urls:
+            raise ValueError("至少需要一个收集端 URL")
+        if len(set(urls)) != len(urls):
+            raise ValueError(f"收集端 URL 重复: {urls}")
+
+        self.monitor_urls = urls
+        self.health_interval = health_interval
+
+        self.nodes: Dict[str, Any] = {}
+        for index, url in enumerate(urls):
+            if transport_factory is not None:
+                self.nodes[url] = transport_factory(url)
+            else:
+                node_spool = os.path.join(spool_dir, str(index)) if spool_dir else None
+                self.nodes[url] = DirectTransport(url, spool_dir=node_spool, **transport_kwargs)
+
+        # 所有子传输器都在发送线程上格式化时间戳时才接受延迟格式化的事件
+        self.deferred_timestamps = all(
+            getattr(node, "deferred_timestamps", False) for node in self.nodes.values()
+        )
+
+        # 完整哈希环（所有节点都不健康时使用）和当前路由使用的健康节点哈希环
+        self._full_ring = HashRing(urls, replicas)
+        self._ring = HashRing(urls, replicas)
+        self._healthy = set(urls)
+        self._ring_lock = threading.Lock()
+
+        self.stats = TransportStats(("routed", "ejections", "rejoins"))
+
+        self._closed = threading.Event()
+        self._checker = threading.Thread(
+            target=self._run,
+            name="agent-monitor-fanout-health",
+            daemon=True
+        )
+        self._checker.start()
+
+    # ------------------------------------------------------------------
+    # 路由
+    # ------------------------------------------------------------------
+
+    def node_for(self, event: Dict[str, Any]) -> Any:
+        """选择事件所属的子传输器"""
+        ring = self._ring
+        if not ring.nodes:
+            ring = self._full_ring
+        return self.nodes[ring.get(routing_key(event))]
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        发送到 agent_id 对应的收集端（非阻塞，取决于子传输器）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 子传输器的返回值
+        """
+        self.stats.incr("routed")
+        return self.node_for(event).send(event)
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """同步发送到 agent_id 对应的收集端"""
+        self.stats.incr("routed")
+        return self.node_for(event).send_sync(event)
+
+    def send_batch(self, events: list) -> bool:
+        """
+        按收集端拆分批次并分别发送（每个收集端内保持原有顺序）
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            bool: 是否全部发送成功
+        """
+        groups: Dict[int, list] = {}
+        targets: Dict[int, Any] = {}
+        for event in events:
+            node = self.node_for(event)
+            groups.setdefault(id(node), []).append(event)
+            targets[id(node)] = node
+
+        self.stats.incr("routed", len(events))
+        results = [targets[key].send_batch(group) for key, group in groups.items()]
+        return all(results)
+
+    # ------------------------------------------------------------------
+    # 健康检查与再平衡
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        """后台线程：定期检查各收集端健康状态"""
+        while not self._closed.wait(self.health_interval):
+            self.check_nodes()
+
+    def check_nodes(self) -> Dict[str, bool]:
+        """
+        检查所有收集端，摘除失败的节点、重新加入恢复的节点
+
+        Returns:
+            URL -> 是否健康
+        """
+        results = {}
+        for url, node in self.nodes.items():
+            try:
+                results[url] = bool(node.health_check())
+            except Exception:
+                results[url] = False
+
+        with self._ring_lock:
+            healthy = {url for url, ok in results.items() if ok}
+            if healthy != self._healthy:
+                for url in self._healthy - healthy:
+                    self.stats.incr("ejections")
+                    logger.warning(f"收集端健康检查失败，已从哈希环摘除: {url}")
+                for url in healthy - self._healthy:
+                    self.stats.incr("rejoins")
+                    logger.info(f"收集端已恢复，重新加入哈希环: {url}")
+                self._healthy = healthy
+                # 先构建新环再替换引用，路由线程无需加锁
+                self._ring = HashRing(healthy, self._full_ring.replicas)
+        return results
+
+    def health_check(self) -> bool:
+        """
+        健康检查 - 任一收集端可达即视为可用
+
+        Returns:
+            bool: 是否可用
+        """
+        return any(self.check_nodes().values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息，包含每个收集端的子传输器统计"""
+        stats = self.stats.snapshot()
+        stats["healthy_nodes"] = len(self._healthy)
+        stats["nodes"] = {
+            url: dict(node.get_stats(), healthy=url in self._healthy)
+            for url, node in self.nodes.items()
+        }
+        for key in ("sent", "failed", "dropped"):
+            stats[key] = sum(
+                node_stats.get(key, 0) for node_stats in stats["nodes"].values()
+            )
+        return stats
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止健康检查并并行关闭所有子传输器（共用同一个截止时间）
+
+        Args:
+            flush: 是否等待子传输器发送剩余事件
+            timeout: 等待的最长时间（秒），默认使用子传输器各自的默认值
+
+        Returns:
+            int: 所有子传输器被放弃的事件数之和
+        """
+        self._closed.set()
+        results: Dict[str, int] = {}
+
+        def close_node(url: str, node: Any):
+            try:
+                results[url] = node.close(flush=flush, timeout=timeout) or 0
+            except Exception as e:
+                logger.warning(f"关闭收集端 {url} 的传输器失败: {e}")
+
+        threads = [
+            threading.Thread(target=close_node, args=item, daemon=True)
+            for item in self.nodes.items()
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = None if timeout is None else time.monotonic() + timeout + 1
+        for thread in threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+        # 未在截止时间内返回的子传输器无法确认放弃数，按 0 计
+        return sum(results.values())
@@ -0,0 +1,340 @@
+"""
+文件传输器 - 以 JSONL 格式写入本地文件（离线 / 隔离网络环境）
+
+批处理任务中通常没有可达的监控服务器，事件追加写入本地文件，事后再导入：
+- send() 只把事件放入内存队列，序列化和磁盘写入都在后台线程中完成
+- 每批事件拼接后一次写入带大缓冲区的文件，fsync 按时间间隔批量执行
+- 当前文件达到大小上限或时间间隔后轮转为 <name>.<时间>.<序号>.jsonl，
+  可选在独立线程中压缩已轮转的分段（gzip / zstd）
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+import logging
+
+from agent_monitor.protocol import serializer
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.batching import collect_batch
+from agent_monitor.utils import compression as codec
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+
+def parse_file_address(address: str) -> str:
+    """
+    解析 file:///path/events.jsonl 地址
+
+    Args:
+        address: file:// URL 或文件路径
+
+    Returns:
+        文件路径
+    """
+    if "://" not in address:
+        return address
+    parsed = urlparse(address)
+    if parsed.scheme != "file" or not (parsed.netloc + parsed.path):
+        raise ValueError(f"无效的文件地址: {address}")
+    # file://relative/path 也按相对路径处理
+    return parsed.netloc + parsed.path
+
+
+class FileTransport(BaseTransport):
+    """
+    JSONL 文件传输器
+
+    与 DirectTransport 接口一致（send / send_sync / send_batch /
+    health_check / get_stats / close），可直接作为 CrewAIPlugin 的 transport
+    """
+
+    # 事件只经过 serializer 编码，时间戳在发送线程上格式化
+    deferred_timestamps = True
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        rotate_interval: Optional[float] = None,
+        compression: Optional[str] = None,
+        fsync_interval: float = 1.0,
+        buffer_size: int = 1024 * 1024,
+        batch_size: int = 1000,
+        linger: float = 0.2,
+        max_queue_size: int = 100000,
+        epoch_ns: bool = False,
+        silent_fail: bool = True
+    ):
+        """
+        初始化文件传输器
+
+        Args:
+            path: 输出文件路径或 file:// URL（目录不存在时自动创建）
+            max_bytes: 单个文件大小上限（字节），超过后轮转
+            rotate_interval: 按时间轮转的间隔（秒），None 表示只按大小轮转
+            compression: 已轮转分段的压缩编码 ("gzip" / "zstd" / "auto")，None 表示不压缩
+            fsync_interval: fsync 间隔（秒），0 表示每批都 fsync
+            buffer_size: 文件写缓冲区大小（字节）
+            batch_size: 单次写入的最大事件数
+            linger: 批次最长等待时间（秒）
+            max_queue_size: 队列容量，满时丢弃新事件
+            epoch_ns: 时间戳写为整数纳秒（默认为 ISO-8601 字符串）
+            silent_fail: 是否静默失败，True 时失败不抛异常
+        """
+        if compression == "auto":
+            compression = "zstd" if "zstd" in codec.local_encodings() else "gzip"
+        if compression and compression not in codec.local_encodings():
+            raise ValueError(f"不支持的压缩编码: {compression}")
+
+        self.path = os.path.abspath(parse_file_address(path))
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compression = compression
+        self.fsync_interval = fsync_interval
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.linger = linger
+        self.epoch_ns = epoch_ns
+        self.silent_fail = silent_fail
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._last_fsync = time.monotonic()
+        self._rotation_seq = 0
+        self._compressors: List[threading.Thread] = []
+
+        # 文件日志必须按时间顺序写入，使用先进先出队列而不是优先级队列
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._closed = threading.Event()
+
+        self.stats = TransportStats(
+            ("sent", "failed", "dropped", "rotations", "fsyncs"),
+            histograms={"latency_ms": 1000, "batch_size": 1, "payload_bytes": 1, "queue_depth": 1}
+        )
+
+        with self._io_lock:
+            self._open()
+
+        self._worker = threading.Thread(
+            target=self._run,
+            name="agent-monitor-file",
+            daemon=True
+        )
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # 文件管理（调用方持有 _io_lock）
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        """打开（或继续追加）当前文件"""
+        self._file = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = self._file.tell()
+        self._opened_at = time.monotonic()
+
+    def _sync(self):
+        """把缓冲区写入磁盘"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+        self.stats.incr("fsyncs")
+
+    def _should_rotate(self) -> bool:
+        if self._size >= self.max_bytes:
+            return True
+        return (
+            self.rotate_interval is not None
+            and self._size > 0
+            and time.monotonic() - self._opened_at >= self.rotate_interval
+        )
+
+    def _rotate(self):
+        """关闭当前文件并重命名为带时间戳的分段，然后打开新文件"""
+        self._sync()
+        self._file.close()
+
+        self._rotation_seq += 1
+        base, ext = os.path.splitext(self.path)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        rotated = f"{base}.{stamp}.{os.getpid()}.{self._rotation_seq:06d}{ext or '.jsonl'}"
+        os.replace(self.path, rotated)
+        self.stats.incr("rotations")
+        logger.debug(f"事件文件已轮转: {rotated}")
+
+        if self.compression:
+            # 压缩大文件耗时较长，放到独立线程中，不阻塞写入
+            compressor = threading.Thread(
+                target=self._compress,
+                args=(rotated,),
+                name="agent-monitor-file-compress",
+                daemon=True
+            )
+            compressor.start()
+            self._compressors = [t for t in self._compressors if t.is_alive()]
+            self._compressors.append(compressor)
+
+        self._open()
+
+    def _compress(self, path: str):
+        """压缩已轮转的分段，成功后删除原文件"""
+        target = path + codec.FILE_SUFFIXES[self.compression]
+        try:
+            codec.compress_file(path, target, self.compression)
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"压缩事件文件失败 {path}: {e}")
+
+    def _write(self, events: list) -> bool:
+        """序列化并写入一批事件（编码到同一个缓冲区），按需 fsync 和轮转"""
+        data, written, failed = serializer.encode_lines(events, self.epoch_ns)
+        if failed:
+            self.stats.incr("dropped", failed)
+            if not self.silent_fail:
+                logger.error(f"事件编码失败: {failed} 个事件被丢弃")
+        if not written:
+            return True
+
+        started = time.perf_counter()
+        try:
+            with self._io_lock:
+                self._file.write(data)
+                self._size += len(data)
+                if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    self._sync()
+                if self._should_rotate():
+                    self._rotate()
+        except (OSError, ValueError) as e:
+            self.stats.incr("failed", written)
+            logger.warning(f"写入事件文件失败: {e}")
+            return False
+
+        self.stats.incr("sent", written)
+        self.stats.observe("latency_ms", (time.perf_counter() - started) * 1000)
+        self.stats.observe("batch_size", written)
+        self.stats.observe("payload_bytes", len(data))
+        return True
+
+    # ------------------------------------------------------------------
+    # 发送
+    # ------------------------------------------------------------------
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        将事件放入队列（非阻塞，不做序列化和磁盘 IO）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功入队，队列已满或已关闭时返回 False
+        """
+        if self._closed.is_set():
+            self.stats.incr("dropped")
+            return False
+
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.stats.incr("dropped")
+            logger.warning("事件队列已满，丢弃事件")
+            return False
+        return True
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """同步写入单个事件（写入文件缓冲区即返回）"""
+        return self.send_batch([event])
+
+    def send_batch(self, events: list) -> bool:
+        """
+        同步写入一批事件
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if not events:
+            return True
+        return self._write(events)
+
+    def _run(self):
+        """后台线程：汇总批次写入文件，空闲时也按间隔 fsync 和轮转"""
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = collect_batch(self._queue, self.batch_size, self.linger, self._closed)
+            if batch:
+                self.stats.observe("queue_depth", self._queue.qsize())
+                self._write(batch)
+            else:
+                self._maintain()
+
+    def _maintain(self):
+        """空闲时落盘未 fsync 的数据，并执行按时间的轮转"""
+        try:
+            with self._io_lock:
+                if self._file.tell() and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    self._sync()
+                if self._should_rotate():
+                    self._rotate()
+        except (OSError, ValueError) as e:
+            logger.warning(f"事件文件维护失败: {e}")
+
+    def health_check(self) -> bool:
+        """
+        健康检查 - 输出目录是否可写
+
+        Returns:
+            bool: 是否可用
+        """
+        return os.access(os.path.dirname(self.path), os.W_OK)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.snapshot()
+        stats["queued"] = self._queue.qsize()
+        stats["file_bytes"] = self._size
+        return stats
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止接收事件，写入剩余事件并落盘
+
+        Args:
+            flush: 是否写入队列中剩余的事件
+            timeout: 等待的最长时间（秒），默认 5 秒
+
+        Returns:
+            int: 截止时仍未写入而被放弃的事件数
+        """
+        deadline = time.monotonic() + ((5.0 if timeout is None else timeout) if flush else 0)
+        self._closed.set()
+        self._worker.join(timeout=max(deadline - time.monotonic(), 0))
+
+        abandoned = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            abandoned += 1
+        if abandoned:
+            logger.warning(f"关闭文件传输器时放弃了 {abandoned} 个未写入的事件")
+
+        with self._io_lock:
+            try:
+                self._sync()
+                self._file.close()
+            except (OSError, ValueError) as e:
+                logger.warning(f"关闭事件文件失败: {e}")
+
+        for compressor in self._compressors:
+            compressor.join(timeout=max(deadline - time.monotonic(), 0))
+        return abandoned
@@ -0,0 +1,93 @@
+"""
+内存传输器 - 事件保存在进程内的命名通道中（memory://name）
+
+用于测试和本地调试：把 AGENT_MONITOR_URL 设为 memory://test 后，
+通过 get_channel("test") 读取插件发出的事件，无需启动监控服务器
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.utils.stats import TransportStats
+
+_channels: Dict[str, Deque[Dict[str, Any]]] = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(name: str = "default", max_events: Optional[int] = None) -> Deque[Dict[str, Any]]:
+    """
+    获取（或创建）命名通道
+
+    Args:
+        name: 通道名称
+        max_events: 创建通道时的容量上限，超过后丢弃最旧的事件；None 表示不限
+
+    Returns:
+        事件队列（同一名称返回同一个对象）
+    """
+    with _channels_lock:
+        channel = _channels.get(name)
+        if channel is None:
+            channel = _channels[name] = deque(maxlen=max_events)
+        return channel
+
+
+def parse_memory_address(address: str) -> str:
+    """
+    解析 memory://name 地址
+
+    Returns:
+        通道名称（省略时为 "default"）
+    """
+    parsed = urlparse(address)
+    if parsed.scheme != "memory":
+        raise ValueError(f"无效的内存通道地址: {address}")
+    return (parsed.netloc + parsed.path).strip("/") or "default"
+
+
+class MemoryTransport(BaseTransport):
+    """内存传输器"""
+
+    def __init__(
+        self,
+        address: str = "memory://default",
+        max_events: Optional[int] = 100000,
+        silent_fail: bool = True
+    ):
+        """
+        初始化内存传输器
+
+        Args:
+            address: memory://name
+            max_events: 通道容量上限，超过后丢弃最旧的事件
+            silent_fail: 是否静默失败（内存写入不会失败，仅为接口一致）
+        """
+        self.name = parse_memory_address(address)
+        self.events = get_channel(self.name, max_events)
+        self.silent_fail = silent_fail
+        self._closed = False
+
+        self.stats = TransportStats(("sent", "dropped"))
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """追加到通道"""
+        if self._closed:
+            self.stats.incr("dropped")
+            return False
+        self.events.append(event)
+        self.stats.incr("sent")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.snapshot()
+        stats["buffered"] = len(self.events)
+        return stats
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """停止接收事件（通道中的事件保留，供读取）"""
+        self._closed = True
+        return 0
@@ -0,0 +1,187 @@
+"""
+线程池传输器 - 固定数量的发送线程，每个线程独占一个 keep-alive 连接
+
+与 DirectTransport 每个事件一个线程不同：
+- 发送线程数固定，突发流量下不会堆积大量线程
+- 每个线程持有独立的 requests.Session（连接池大小为 1），
+  TCP/TLS 握手只在连接建立时发生一次
+- 在途事件数（排队 + 发送中）受窗口限制，超出时丢弃新事件
+"""
+
+import threading
+import queue
+import time
+from typing import Dict, Any, List, Optional
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from agent_monitor.transports.direct import DirectTransport
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_STOP = object()
+
+
+class _Worker:
+    """发送线程状态"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.started = time.monotonic()
+        self.busy_seconds = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.thread: Optional[threading.Thread] = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "worker": self.index,
+            "sent": self.sent,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "utilisation": round(min(self.busy_seconds / elapsed, 1.0), 4),
+        }
+
+
+class PooledTransport(DirectTransport):
+    """
+    线程池传输器
+
+    与 DirectTransport 接口一致，send() 只做入队操作
+    """
+
+    def __init__(
+        self,
+        monitor_url: str,
+        timeout: float = 1.0,
+        silent_fail: bool = True,
+        workers: int = 4,
+        max_in_flight: int = 1000,
+        spool_dir: Optional[str] = None,
+        compression: Optional[str] = None,
+        dictionary: bool = False,
+        epoch_ns: bool = False,
+        wire_version: str = "1.0"
+    ):
+        """
+        初始化线程池传输器
+
+        Args:
+            monitor_url: 监控服务器 URL (e.g., http://localhost:8080)
+            timeout: 请求超时时间（秒），默认 1 秒
+            silent_fail: 是否静默失败，True 时失败不抛异常
+            workers: 发送线程数
+            max_in_flight: 在途事件窗口（排队 + 发送中），超出时丢弃新事件
+            spool_dir: 暂存目录，设置后连接失败的事件写入磁盘
+            compression / dictionary / epoch_ns / wire_version: 同 DirectTransport
+        """
+        super().__init__(
+            monitor_url,
+            timeout=timeout,
+            silent_fail=silent_fail,
+            spool_dir=spool_dir,
+            compression=compression,
+            dictionary=dictionary,
+            epoch_ns=epoch_ns,
+            wire_version=wire_version
+        )
+        self.max_in_flight = max_in_flight
+
+        self._queue: "queue.Queue" = queue.Queue()
+
+        self._workers: List[_Worker] = []
+        for i in range(workers):
+            worker = _Worker(i)
+            worker.thread = threading.Thread(
+                target=self._run,
+                args=(worker,),
+                name=f"agent-monitor-pooled-{i}",
+                daemon=True
+            )
+            worker.thread.start()
+            self._workers.append(worker)
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        将事件交给发送线程（非阻塞）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功入队，窗口已满或已关闭时返回 False
+        """
+        with self._window_lock:
+            admitted = not self._closed.is_set() and self._in_flight < self.max_in_flight
+            if admitted:
+                self._in_flight += 1
+
+        if not admitted:
+            self.stats.incr("dropped")
+            return False
+
+        self._queue.put(event)
+        return True
+
+    def _run(self, worker: _Worker):
+        """发送线程：使用自己的 session 逐个发送事件"""
+        while True:
+            event = self._queue.get()
+            if event is _STOP:
+                break
+
+            started = time.monotonic()
+            try:
+                if self._send_sync(event, session=worker.session):
+                    worker.sent += 1
+                else:
+                    worker.failed += 1
+            except Exception as e:
+                worker.failed += 1
+                if not self.silent_fail:
+                    logger.error(f"发送事件失败: {e}")
+            finally:
+                worker.busy_seconds += time.monotonic() - started
+                self._release(1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息，包含每个发送线程的利用率"""
+        stats = super().get_stats()
+        stats["in_flight"] = self._in_flight
+        stats["workers"] = [worker.get_stats() for worker in self._workers]
+        return stats
+
+    def _drain(self, deadline: float) -> int:
+        """等待在途事件发送完成，超时则把队列中剩余事件写入暂存，然后停止发送线程"""
+        if self._wait_idle(deadline):
+            self._spool_queued(self._queue)
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.thread.join(timeout=max(deadline - time.monotonic(), 0))
+        return self._wait_idle(deadline)
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止接收事件，等待在途事件发送完成后关闭所有连接
+
+        Args:
+            flush: 是否等待已接收的事件发送完成
+            timeout: 等待的最长时间（秒）
+
+        Returns:
+            int: 被放弃的事件数
+        """
+        abandoned = super().close(flush=flush, timeout=timeout)
+        for worker in self._workers:
+            worker.session.close()
+        return abandoned
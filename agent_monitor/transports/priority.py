@@ -0,0 +1,164 @@
+"""
+按事件优先级分级的有界队列 - 背压时优先丢弃低价值事件
+
+监控服务器变慢时，宁可丢弃 agent_thinking / llm_stream_chunk 这类噪声，
+也要保证 agent_error / crew_completed 等生命周期事件送达：
+- 每个优先级一个独立的有界队列，内存上限 = 各级容量之和，可预测
+- 某一级队列满时丢弃该级最旧的事件（新事件总是被接收）
+- 出队按到达顺序（跨优先级 FIFO），同一 Agent 的事件不会因优先级不同而乱序
+"""
+
+import itertools
+import queue
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+
+# 所有优先级
+PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+# 事件类型 -> 优先级，未列出的类型为 normal
+DEFAULT_EVENT_PRIORITIES = {
+    # 生命周期
+    "crew_started": PRIORITY_HIGH,
+    "crew_completed": PRIORITY_HIGH,
+    "agent_online": PRIORITY_HIGH,
+    "agent_offline": PRIORITY_HIGH,
+    "agent_error": PRIORITY_HIGH,
+    "method_error": PRIORITY_HIGH,
+
+    # 高频噪声
+    "agent_thinking": PRIORITY_LOW,
+    "llm_stream_chunk": PRIORITY_LOW,
+}
+
+
+def default_limits(max_queue_size: int) -> Dict[str, int]:
+    """
+    按总容量划分各优先级容量（high 10% / normal 50% / low 40%）
+
+    Args:
+        max_queue_size: 总容量
+
+    Returns:
+        各优先级容量
+    """
+    high = max(max_queue_size // 10, 1)
+    low = max(max_queue_size * 4 // 10, 1)
+    return {
+        PRIORITY_HIGH: high,
+        PRIORITY_NORMAL: max(max_queue_size - high - low, 1),
+        PRIORITY_LOW: low,
+    }
+
+
+class PriorityEventQueue:
+    """
+    分级有界事件队列
+
+    get() / qsize() / empty() 与 queue.Queue 兼容，可直接用于 collect_batch；
+    put() 从不阻塞也从不失败，满时按优先级丢弃旧事件
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        event_priorities: Optional[Dict[str, str]] = None
+    ):
+        """
+        初始化队列
+
+        Args:
+            limits: 各优先级容量 {"high": n, "normal": n, "low": n}
+            event_priorities: 事件类型 -> 优先级，覆盖默认映射
+        """
+        missing = set(PRIORITIES) - set(limits)
+        if missing:
+            raise ValueError(f"缺少优先级容量: {sorted(missing)}")
+
+        self.limits = dict(limits)
+        self.event_priorities = dict(DEFAULT_EVENT_PRIORITIES)
+        if event_priorities:
+            self.event_priorities.update(event_priorities)
+
+        # 每个元素为 (到达序号, 事件)，出队时取各级队首中序号最小的
+        self._queues: Dict[str, Deque[Tuple[int, Dict[str, Any]]]] = {
+            priority: deque() for priority in PRIORITIES
+        }
+        self._arrivals = itertools.count()
+        self._size = 0
+        self._not_empty = threading.Condition(threading.Lock())
+
+        self.dropped = {priority: 0 for priority in PRIORITIES}
+
+    def classify(self, event: Dict[str, Any]) -> str:
+        """根据 event["event"]["type"] 确定优先级"""
+        body = event.get("event")
+        event_type = body.get("type") if isinstance(body, dict) else None
+        return self.event_priorities.get(event_type, PRIORITY_NORMAL)
+
+    def put(self, event: Dict[str, Any]) -> Optional[str]:
+        """
+        入队（非阻塞）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            因容量被丢弃的旧事件的优先级，没有丢弃时返回 None
+        """
+        priority = self.classify(event)
+        shed = None
+
+        with self._not_empty:
+            target = self._queues[priority]
+            if len(target) >= self.limits[priority]:
+                target.popleft()
+                self.dropped[priority] += 1
+                shed = priority
+            else:
+                self._size += 1
+            target.append((next(self._arrivals), event))
+            self._not_empty.notify()
+
+        return shed
+
+    # queue.Queue 兼容
+    put_nowait = put
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        按到达顺序出队（最早到达的未丢弃事件）
+
+        Raises:
+            queue.Empty: 等待超时仍没有事件
+        """
+        with self._not_empty:
+            if block and not self._size:
+                self._not_empty.wait_for(lambda: self._size > 0, timeout)
+            if not self._size:
+                raise queue.Empty
+            oldest = min(
+                (pending for pending in self._queues.values() if pending),
+                key=lambda pending: pending[0][0]
+            )
+            self._size -= 1
+            return oldest.popleft()[1]
+
+    def get_nowait(self) -> Dict[str, Any]:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def depths(self) -> Dict[str, int]:
+        """各优先级当前队列长度"""
+        with self._not_empty:
+            return {priority: len(self._queues[priority]) for priority in PRIORITIES}
@@ -0,0 +1,291 @@
+"""
+传输器注册表 - 按 URL scheme 选择传输器
+
+create_transport("tcp://collector:9400") 根据 scheme 查找工厂函数，
+整个集群只需修改 AGENT_MONITOR_URL 即可切换到更快的传输方式：
+
+    http:// https://     DirectTransport
+    file://              FileTransport
+    udp:// unixgram://   DatagramTransport
+    unix://              UnixSocketTransport（本机 sidecar）
+    tcp://               TcpTransport
+    memory://            MemoryTransport
+
+另外保留按名称选择 HTTP 变体: "direct" / "batching" / "pooled" / "async"
+（transport_type 参数或 AGENT_MONITOR_TRANSPORT 环境变量）
+
+第三方传输器通过 entry points 注册（group: agent_monitor.transports，
+名称为 scheme，值为工厂函数或传输器类，调用方式 factory(url, **options)；
+options 只包含调用方传入或环境变量设置的选项，多个收集端时每个收集端另外
+带有 spool_dir（仅在启用暂存时），未接受 **kwargs 的传输器类只会收到这些选项）:
+
+    # setup.py
+    entry_points={
+        "agent_monitor.transports": [
+            "kafka = my_package.kafka:KafkaTransport",
+        ],
+    }
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import urlparse
+import logging
+
+from agent_monitor.transports.base import BaseTransport
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "agent_monitor.transports"
+
+# 工厂函数: factory(url, **options) -> 传输器
+TransportFactory = Callable[..., Any]
+
+_registry: Dict[str, TransportFactory] = {}
+_registry_lock = threading.Lock()
+_entry_points_loaded = False
+
+# 可以把事件分发到多个收集端的传输器（见 FanoutTransport）
+_FANOUT_KINDS = {"http", "https", "direct", "batching", "pooled"}
+
+
+def register_transport(name: str, factory: TransportFactory, replace: bool = False):
+    """
+    注册传输器
+
+    Args:
+        name: URL scheme 或传输器名称
+        factory: 工厂函数或传输器类，以 factory(url, **options) 调用；
+            options 只包含已设置的选项（如 spool_dir、compression），
+            接受 **kwargs 的工厂应忽略不支持的选项
+        replace: 已注册时是否替换
+    """
+    name = name.lower()
+    with _registry_lock:
+        if name in _registry and not replace:
+            raise ValueError(f"传输器已注册: {name}")
+        _registry[name] = factory
+
+
+def available_transports() -> List[str]:
+    """已注册的 scheme / 名称（包括 entry points）"""
+    _load_entry_points()
+    return sorted(_registry)
+
+
+def _load_entry_points():
+    """加载通过 entry points 注册的第三方传输器（只加载一次，不覆盖内置传输器）"""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+
+    try:
+        from importlib.metadata import entry_points
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            group = eps.select(group=ENTRY_POINT_GROUP)
+        else:  # Python < 3.10
+            group = eps.get(ENTRY_POINT_GROUP, [])
+    except Exception as e:  # pragma: no cover - 元数据损坏
+        logger.debug(f"读取传输器 entry points 失败: {e}")
+        return
+
+    for ep in group:
+        if ep.name.lower() in _registry:
+            logger.debug(f"忽略与已注册传输器同名的 entry point: {ep.name}")
+            continue
+        try:
+            register_transport(ep.name, ep.load())
+        except Exception as e:
+            logger.warning(f"加载传输器 {ep.name} ({ep.value}) 失败: {e}")
+
+
+def get_transport_factory(name: str) -> TransportFactory:
+    """
+    查找传输器工厂
+
+    Raises:
+        ValueError: 未注册
+    """
+    name = name.lower()
+    factory = _registry.get(name)
+    if factory is None:
+        _load_entry_points()
+        factory = _registry.get(name)
+    if factory is None:
+        raise ValueError(
+            f"不支持的传输器类型: {name}（可用: {', '.join(available_transports())}）"
+        )
+    return factory
+
+
+def _scheme(url: str) -> str:
+    return urlparse(url).scheme.lower() if "://" in url else "http"
+
+
+def _normalize_url(url: str) -> str:
+    """去掉空白和 "://" 之后的末尾斜杠（"memory://" 保持不变）"""
+    url = url.strip()
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        return url.rstrip("/")
+    return scheme + sep + rest.rstrip("/")
+
+
+def create_transport(
+    monitor_url: Optional[Union[str, List[str]]] = None,
+    transport_type: Optional[str] = None,
+    **options
+) -> BaseTransport:
+    """
+    创建传输器实例
+
+    Args:
+        monitor_url: 监控服务器 URL，默认从 AGENT_MONITOR_URL 读取；scheme 决定传输器，
+            多个收集端时传入列表或逗号分隔的字符串，按 agent_id 一致性哈希分发
+        transport_type: 覆盖 scheme 选择的传输器，如 HTTP 变体 "batching" / "pooled" / "async"；
+            http(s) URL 默认从 AGENT_MONITOR_TRANSPORT 读取
+        **options: 传给工厂函数的其他参数（如 silent_fail）
+
+    Returns:
+        传输器实例
+    """
+    if monitor_url is None:
+        monitor_url = os.getenv("AGENT_MONITOR_URL")
+
+    if isinstance(monitor_url, str):
+        urls = [_normalize_url(url) for url in monitor_url.split(",") if url.strip()]
+    else:
+        urls = [_normalize_url(url) for url in (monitor_url or []) if url]
+
+    if not urls:
+        raise ValueError(
+            "未设置监控服务器 URL，请设置 AGENT_MONITOR_URL 环境变量"
+        )
+
+    if transport_type is None and _scheme(urls[0]) in ("http", "https"):
+        # 环境变量只用于选择 HTTP 变体，其他 scheme 由 URL 决定
+        transport_type = os.getenv("AGENT_MONITOR_TRANSPORT") or None
+
+    env_options = {
+        "spool_dir": os.getenv("AGENT_MONITOR_SPOOL_DIR") or None,
+        "compression": os.getenv("AGENT_MONITOR_COMPRESSION") or None,
+        "dictionary": os.getenv("AGENT_MONITOR_DICTIONARY", "false").lower() == "true",
+        "epoch_ns": os.getenv("AGENT_MONITOR_EPOCH_NS", "false").lower() == "true",
+        "wire_version": os.getenv("AGENT_MONITOR_WIRE_VERSION") or None,
+    }
+    for key, value in env_options.items():
+        # 未设置的选项不传递，工厂使用自己的默认值（第三方传输器类不必接受这些参数）
+        if value:
+            options.setdefault(key, value)
+
+    if len(urls) == 1:
+        kind = transport_type or _scheme(urls[0])
+        return get_transport_factory(kind)(urls[0], **options)
+
+    kinds = {transport_type or _scheme(url) for url in urls}
+    if len(kinds) != 1 or not kinds <= _FANOUT_KINDS:
+        raise ValueError(f"传输器类型 {', '.join(sorted(kinds))} 不支持多个收集端")
+    factory = get_transport_factory(kinds.pop())
+    spool_dir = options.pop("spool_dir", None)
+
+    from agent_monitor.transports.fanout import FanoutTransport
+
+    def node_factory(url: str):
+        if not spool_dir:
+            return factory(url, **options)
+        # 每个收集端使用独立的暂存子目录
+        node_spool = os.path.join(spool_dir, str(urls.index(url)))
+        return factory(url, spool_dir=node_spool, **options)
+
+    return FanoutTransport(urls, transport_factory=node_factory)
+
+
+# ----------------------------------------------------------------------
+# 内置传输器（按需导入，避免加载可选依赖）
+# ----------------------------------------------------------------------
+
+def _direct(url: str, spool_dir=None, compression=None, dictionary=False, epoch_ns=False,
+            wire_version="1.0", silent_fail=True, **_):
+    from agent_monitor.transports.direct import DirectTransport
+    return DirectTransport(
+        url, silent_fail=silent_fail, spool_dir=spool_dir, compression=compression,
+        dictionary=dictionary, epoch_ns=epoch_ns, wire_version=wire_version
+    )
+
+
+def _batching(url: str, spool_dir=None, compression=None, dictionary=False, epoch_ns=False,
+              wire_version="1.0", max_in_flight_batches=1, silent_fail=True, **_):
+    from agent_monitor.transports.batching import BatchingTransport
+    return BatchingTransport(
+        url, silent_fail=silent_fail, spool_dir=spool_dir, compression=compression,
+        dictionary=dictionary, epoch_ns=epoch_ns, wire_version=wire_version,
+        max_in_flight_batches=max_in_flight_batches
+    )
+
+
+def _pooled(url: str, spool_dir=None, compression=None, dictionary=False, epoch_ns=False,
+            wire_version="1.0", silent_fail=True, **_):
+    from agent_monitor.transports.pooled import PooledTransport
+    return PooledTransport(
+        url, silent_fail=silent_fail, spool_dir=spool_dir, compression=compression,
+        dictionary=dictionary, epoch_ns=epoch_ns, wire_version=wire_version
+    )
+
+
+def _async(url: str, compression=None, silent_fail=True, **_):
+    from agent_monitor.transports.async_transport import AsyncTransport
+    return AsyncTransport(url, silent_fail=silent_fail, compression=compression)
+
+
+def _tcp(url: str, dictionary=False, max_in_flight_batches=4, wire_version="1.0",
+         silent_fail=True, **_):
+    from agent_monitor.transports.tcp import TcpTransport
+    return TcpTransport(
+        url, silent_fail=silent_fail, dictionary=dictionary,
+        max_in_flight_batches=max_in_flight_batches, wire_version=wire_version
+    )
+
+
+def _unix(url: str, dictionary=False, max_in_flight_batches=4, wire_version="1.0",
+          silent_fail=True, **_):
+    from agent_monitor.transports.unix import UnixSocketTransport
+    return UnixSocketTransport(
+        url, silent_fail=silent_fail, dictionary=dictionary,
+        max_in_flight_batches=max_in_flight_batches, wire_version=wire_version
+    )
+
+
+def _datagram(url: str, silent_fail=True, **_):
+    from agent_monitor.transports.datagram import DatagramTransport
+    return DatagramTransport(url, silent_fail=silent_fail)
+
+
+def _file(url: str, compression=None, epoch_ns=False, silent_fail=True, **_):
+    from agent_monitor.transports.file import FileTransport
+    return FileTransport(url, compression=compression, epoch_ns=epoch_ns, silent_fail=silent_fail)
+
+
+def _memory(url: str, silent_fail=True, **_):
+    from agent_monitor.transports.memory import MemoryTransport
+    return MemoryTransport(url, silent_fail=silent_fail)
+
+
+for _name, _factory in (
+    ("http", _direct),
+    ("https", _direct),
+    ("direct", _direct),
+    ("batching", _batching),
+    ("pooled", _pooled),
+    ("async", _async),
+    ("tcp", _tcp),
+    ("unix", _unix),
+    ("udp", _datagram),
+    ("unixgram", _datagram),
+    ("datagram", _datagram),
+    ("file", _file),
+    ("memory", _memory),
+):
+    register_transport(_name, _factory)
@@ -0,0 +1,129 @@
+"""
+熔断器与重试退避
+
+- CircuitBreaker: 连续失败达到阈值后熔断（open），期间直接快速失败；
+  冷却时间过后进入半开（half_open）状态放行一次试探请求，成功则恢复（closed）
+- decorrelated_jitter: 去相关抖动退避（AWS Architecture Blog 提出的算法），
+  避免大量进程在同一时刻重试
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict
+
+
+def decorrelated_jitter(base: float, cap: float, previous: float) -> float:
+    """
+    计算下一次重试等待时间
+
+    Args:
+        base: 最小等待时间（秒）
+        cap: 最大等待时间（秒）
+        previous: 上一次等待时间（秒），首次为 base
+
+    Returns:
+        等待时间（秒）
+    """
+    return min(cap, random.uniform(base, max(previous, base) * 3))
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+
+    状态: closed -> open -> half_open -> closed / open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多久（秒）放行试探请求
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self._opens = 0
+        self._rejected = 0
+        self._open_seconds = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        是否允许发送请求
+
+        Returns:
+            bool: closed 时总是允许；open 时冷却结束前拒绝；
+            half_open 时只允许一个试探请求
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._trial_in_flight:
+                self._rejected += 1
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        """记录一次成功，半开/熔断状态下恢复为 closed"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                self._open_seconds += time.monotonic() - self._opened_at
+                self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """记录一次失败，达到阈值或试探失败时熔断"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+
+            if self._state == self.HALF_OPEN:
+                # 试探失败，重新熔断并重新开始冷却计时
+                self._state = self.OPEN
+                self._open_seconds += time.monotonic() - self._opened_at
+                self._opened_at = time.monotonic()
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._opens += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器状态和统计"""
+        with self._lock:
+            open_seconds = self._open_seconds
+            if self._state != self.CLOSED:
+                open_seconds += time.monotonic() - self._opened_at
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opens": self._opens,
+                "rejected": self._rejected,
+                "open_seconds": round(open_seconds, 3),
+            }
@@ -0,0 +1,301 @@
+"""
+共享内存环形缓冲区传输器 - 多进程 Agent worker 写入，单个转发进程读取
+
+适用于 multiprocessing / gunicorn worker 池：worker 不再各自持有连接和线程，
+只把序列化后的事件复制到 multiprocessing.shared_memory 中的环形缓冲区，
+由转发进程（agent_monitor.receivers.shm_forwarder）统一批量发送
+
+- 单写者（SPSC）无需加锁；多写者（MPSC）需传入 fork 前创建的
+  multiprocessing.Lock，由所有 worker 继承
+- 缓冲区满时丢弃新事件，worker 永不阻塞
+"""
+
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from agent_monitor.protocol import serializer
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"AMRB"
+_VERSION = 1
+
+# 头部布局：写偏移和读偏移放在不同缓存行，减少读写进程之间的伪共享
+_META = struct.Struct("<4sIQ")      # magic, version, capacity
+_OFFSET = struct.Struct("<Q")
+_TAIL_AT = 64                       # 写偏移（单调递增）
+_HEAD_AT = 128                      # 读偏移（单调递增）
+_DATA_AT = 192
+
+_RECORD = struct.Struct("<I")       # 记录长度
+_WRAP = 0xFFFFFFFF                  # 回绕标记：跳到缓冲区开头
+_ALIGN = 8
+
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGN - 1) & ~(_ALIGN - 1)
+
+
+class ShmRingBuffer:
+    """
+    共享内存环形缓冲区
+
+    记录格式：4 字节长度 + 数据，按 8 字节对齐；
+    记录放不下缓冲区末尾时写入回绕标记，从开头继续
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, lock: Any = None, owner: bool = False):
+        self._shm = shm
+        self._buf = shm.buf
+        self._lock = lock
+        # fork 出的 worker 继承了创建者对象，只有创建进程负责删除共享内存
+        self._owner_pid = os.getpid() if owner else None
+
+        magic, version, capacity = _META.unpack_from(self._buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"不是有效的事件环形缓冲区: {shm.name}")
+        self.capacity = capacity
+
+    @classmethod
+    def create(
+        cls,
+        name: Optional[str] = None,
+        capacity: int = 4 * 1024 * 1024,
+        lock: Any = None
+    ) -> "ShmRingBuffer":
+        """
+        创建环形缓冲区（在转发进程或 fork 前的主进程中调用）
+
+        Args:
+            name: 共享内存名称，None 时自动生成
+            capacity: 数据区大小（字节），向上对齐到 8 字节
+            lock: 多写者时使用的跨进程锁（如 multiprocessing.Lock()）
+
+        Returns:
+            环形缓冲区
+        """
+        capacity = _aligned(capacity)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_DATA_AT + capacity)
+        _META.pack_into(shm.buf, 0, _MAGIC, _VERSION, capacity)
+        _OFFSET.pack_into(shm.buf, _TAIL_AT, 0)
+        _OFFSET.pack_into(shm.buf, _HEAD_AT, 0)
+        return cls(shm, lock=lock, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, lock: Any = None) -> "ShmRingBuffer":
+        """
+        按名称连接已存在的环形缓冲区（用于不是由创建者 fork 出的独立进程）
+
+        Args:
+            name: 共享内存名称
+            lock: 多写者时使用的跨进程锁
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # 连接方不负责回收共享内存，避免进程退出时被 resource_tracker 删除
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, lock=lock)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _load(self, at: int) -> int:
+        return _OFFSET.unpack_from(self._buf, at)[0]
+
+    def _store(self, at: int, value: int):
+        _OFFSET.pack_into(self._buf, at, value)
+
+    def used(self) -> int:
+        """已使用的字节数"""
+        return self._load(_TAIL_AT) - self._load(_HEAD_AT)
+
+    def write(self, data: bytes) -> bool:
+        """
+        写入一条记录（写者调用）
+
+        Args:
+            data: 记录数据
+
+        Returns:
+            bool: 是否写入成功，空间不足时返回 False
+        """
+        if self._lock is not None:
+            with self._lock:
+                return self._write(data)
+        return self._write(data)
+
+    def _write(self, data: bytes) -> bool:
+        size = _aligned(_RECORD.size + len(data))
+        if size > self.capacity:
+            return False
+
+        tail = self._load(_TAIL_AT)
+        head = self._load(_HEAD_AT)
+        pos = tail % self.capacity
+        skip = self.capacity - pos if pos + size > self.capacity else 0
+
+        if tail + skip + size - head > self.capacity:
+            return False
+
+        if skip:
+            _RECORD.pack_into(self._buf, _DATA_AT + pos, _WRAP)
+            tail += skip
+            pos = 0
+
+        start = _DATA_AT + pos
+        _RECORD.pack_into(self._buf, start, len(data))
+        self._buf[start + _RECORD.size:start + _RECORD.size + len(data)] = data
+
+        # 数据写完后才发布写偏移，读者不会看到半条记录
+        self._store(_TAIL_AT, tail + size)
+        return True
+
+    def read(self, max_records: int = 500) -> List[bytes]:
+        """
+        读取并移除记录（只能有一个读者）
+
+        Args:
+            max_records: 最多读取的记录数
+
+        Returns:
+            记录列表
+        """
+        records, head = self.peek(max_records)
+        self.advance(head)
+        return records
+
+    def peek(self, max_records: int = 500) -> Tuple[List[bytes], int]:
+        """
+        读取记录但不移除（只能有一个读者），处理完成后调用 advance()
+
+        Args:
+            max_records: 最多读取的记录数
+
+        Returns:
+            (记录列表, 这些记录之后的读偏移)
+        """
+        head = self._load(_HEAD_AT)
+        tail = self._load(_TAIL_AT)
+        records = []
+
+        while head < tail and len(records) < max_records:
+            pos = head % self.capacity
+            (length,) = _RECORD.unpack_from(self._buf, _DATA_AT + pos)
+            if length == _WRAP:
+                head += self.capacity - pos
+                continue
+
+            start = _DATA_AT + pos + _RECORD.size
+            records.append(bytes(self._buf[start:start + length]))
+            head += _aligned(_RECORD.size + length)
+
+        return records, head
+
+    def advance(self, head: int):
+        """移除 peek() 返回的记录，释放空间给写者"""
+        self._store(_HEAD_AT, head)
+
+    def close(self):
+        """断开共享内存（创建者同时删除共享内存）"""
+        self._buf = None
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ShmTransport(BaseTransport):
+    """
+    共享内存传输器（worker 端）
+
+    与 DirectTransport 接口一致，send() 只做序列化和内存复制
+    """
+
+    def __init__(self, ring: ShmRingBuffer, silent_fail: bool = True):
+        """
+        初始化共享内存传输器
+
+        Args:
+            ring: 环形缓冲区（fork 继承或 ShmRingBuffer.attach 获得）
+            silent_fail: 是否静默失败，True 时失败不抛异常
+        """
+        self.ring = ring
+        self.silent_fail = silent_fail
+
+        # 统计（每个 worker 进程各自统计）
+        self.stats = TransportStats(
+            ("sent", "dropped"),
+            histograms={"latency_ms": 1000, "payload_bytes": 1}
+        )
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        写入环形缓冲区（非阻塞）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否写入成功，缓冲区满时返回 False
+        """
+        started = time.perf_counter()
+        try:
+            data = serializer.encode_event(event)
+        except Exception as e:
+            self.stats.incr("dropped")
+            if not self.silent_fail:
+                logger.error(f"事件编码失败: {e}")
+            return False
+
+        if self.ring.write(data):
+            self.stats.incr("sent")
+            self.stats.observe("latency_ms", (time.perf_counter() - started) * 1000)
+            self.stats.observe("payload_bytes", len(data))
+            return True
+
+        self.stats.incr("dropped")
+        logger.debug("共享内存缓冲区已满，丢弃事件")
+        return False
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """同步发送（与 send 相同，写入缓冲区即返回）"""
+        return self.send(event)
+
+    def send_batch(self, events: list) -> bool:
+        """逐个写入事件，返回是否全部写入成功"""
+        results = [self.send(event) for event in events]
+        return all(results)
+
+    def health_check(self) -> bool:
+        """缓冲区未满即视为可用"""
+        return self.ring.used() < self.ring.capacity
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.snapshot()
+        stats["ring_used"] = self.ring.used()
+        return stats
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        断开共享内存（不删除，由创建者回收）
+
+        已写入缓冲区的事件由转发进程负责发送，这里没有需要等待的事件
+
+        Returns:
+            int: 被放弃的事件数，总是 0
+        """
+        self.ring.close()
+        return 0
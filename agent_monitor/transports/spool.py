@@ -0,0 +1,539 @@
+"""
+磁盘暂存（Spool）- 监控服务器不可达时的预写日志
+
+事件以分段文件（segment）的形式写入磁盘目录：
+- 追加操作只写入内存缓冲，由后台线程写入内存映射的分段文件并刷盘，
+  Agent 线程不会阻塞在磁盘 IO / fsync 上
+- 单个分段大小和目录总大小都有上限，超出时丢弃最旧的分段
+- SpoolReplayer 在健康检查恢复后按从旧到新的顺序回放分段；
+  服务器明确拒绝的批次（BatchRejected）跳过并计数，不会阻塞后面的分段
+
+多个进程可以共用同一个暂存目录：每个 EventSpool 在目录下创建自己的子目录
+（<pid>-<随机后缀>），并在存活期间持有子目录对应的 .lock 文件锁（fcntl.flock）。
+启动时接管锁已释放（进程已退出）的子目录中遗留的分段，接管过程由目录级的
+.adopt.lock 串行化，同一个分段只会被一个进程回放。没有 fcntl 的平台上只使用独立子目录，
+不接管其他子目录
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+from typing import Any, Callable, Dict, IO, List, Optional, Tuple
+import logging
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from agent_monitor.protocol import serializer
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+# 记录格式: 4 字节大端长度 + JSON 字节，长度为 0 表示分段结束
+_RECORD_HEADER = struct.Struct(">I")
+_SEGMENT_SUFFIX = ".seg"
+_LOCK_SUFFIX = ".lock"
+_ADOPT_LOCK = ".adopt.lock"
+# 实例子目录名: <pid>-<随机后缀>
+_SEGMENT_DIR = re.compile(r"^\d+-[0-9a-f]{8}$")
+
+
+def _try_lock(path: str) -> Optional[IO[bytes]]:
+    """
+    非阻塞地获取文件锁
+
+    Returns:
+        持有锁的文件对象（关闭即释放），锁被其他进程持有时返回 None
+    """
+    f = open(path, "a+b")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _segment_seq(name: str) -> Optional[int]:
+    if not name.endswith(_SEGMENT_SUFFIX):
+        return None
+    try:
+        return int(name[:-len(_SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+
+class BatchRejected(Exception):
+    """不写暂存发送（回放、共享内存转发）的批次被服务器拒绝（4xx），重发同样的内容也不会成功"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"服务器拒绝批次: {status_code}")
+        self.status_code = status_code
+
+
+class EventSpool:
+    """
+    基于分段文件的事件暂存
+
+    线程模型:
+    - append() 可在任意线程调用，只做内存操作
+    - 写入线程负责编码、写入 mmap、刷盘、分段轮转和容量控制
+    - read_oldest() / commit() 由回放线程调用
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 4 * 1024 * 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000
+    ):
+        """
+        初始化暂存
+
+        Args:
+            directory: 暂存目录，不存在时自动创建；分段文件写在其中本实例的子目录里
+            segment_size: 单个分段文件大小（字节）
+            max_bytes: 本实例分段文件总大小上限（字节）
+            flush_interval: 后台写入/刷盘间隔（秒）
+            max_pending: 尚未写入磁盘的内存缓冲上限（事件数）
+        """
+        self.directory = directory
+        self.segment_dir = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.segment_size = segment_size
+        self.max_bytes = max(max_bytes, segment_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+
+        # 已封存分段: seq -> 记录数
+        self._sealed: Dict[int, int] = {}
+        self._active_seq = 0
+        self._active_file = None
+        self._active_map: Optional[mmap.mmap] = None
+        self._active_offset = 0
+        self._active_records = 0
+
+        self.stats = TransportStats(("spooled", "dropped", "segments_dropped"))
+        self._dir_lock: Optional[IO[bytes]] = None
+
+        self._recover()
+
+        self._writer = threading.Thread(
+            target=self._run,
+            name="agent-monitor-spool-writer",
+            daemon=True
+        )
+        self._writer.start()
+
+    # ------------------------------------------------------------------
+    # 追加（任意线程）
+    # ------------------------------------------------------------------
+
+    def append(self, events: List[Dict[str, Any]]) -> int:
+        """
+        追加事件到内存缓冲（非阻塞，不触发磁盘 IO）
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            int: 实际接收的事件数，缓冲已满时多余事件被丢弃
+        """
+        if self._closed.is_set():
+            self.stats.incr("dropped", len(events))
+            return 0
+
+        with self._pending_lock:
+            room = self.max_pending - len(self._pending)
+            accepted = events[:max(room, 0)]
+            self._pending.extend(accepted)
+
+        dropped = len(events) - len(accepted)
+        if dropped:
+            self.stats.incr("dropped", dropped)
+            logger.warning(f"暂存缓冲已满，丢弃 {dropped} 个事件")
+
+        self._wakeup.set()
+        return len(accepted)
+
+    def has_pending(self) -> bool:
+        """是否有待回放的事件（包括尚未落盘的缓冲）"""
+        with self._pending_lock:
+            if self._pending:
+                return True
+        with self._io_lock:
+            return bool(self._sealed) or self._active_records > 0
+
+    # ------------------------------------------------------------------
+    # 回放（回放线程）
+    # ------------------------------------------------------------------
+
+    def read_oldest(self) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        读取最旧的分段
+
+        没有已封存分段时会先封存当前活动分段
+
+        Returns:
+            (分段序号, 事件列表)，没有数据时返回 None
+        """
+        self._write_pending()
+
+        with self._io_lock:
+            if not self._sealed and self._active_records > 0:
+                self._seal_active()
+            if not self._sealed:
+                return None
+            seq = min(self._sealed)
+
+        return seq, self._read_segment(self._segment_path(seq))
+
+    def commit(self, seq: int):
+        """确认分段已回放成功，删除分段文件"""
+        with self._io_lock:
+            self._sealed.pop(seq, None)
+            self._remove_segment(seq)
+
+    # ------------------------------------------------------------------
+    # 写入线程
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        """后台写入线程"""
+        while not self._closed.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self._write_pending()
+            except Exception as e:
+                logger.error(f"暂存写入失败: {e}")
+
+    def _write_pending(self):
+        """将内存缓冲写入活动分段并刷盘"""
+        with self._pending_lock:
+            events, self._pending = self._pending, []
+
+        if not events:
+            return
+
+        with self._io_lock:
+            for event in events:
+                self._write_record(event)
+            if self._active_map is not None:
+                self._active_map.flush()
+
+    def _write_record(self, event: Dict[str, Any]):
+        """写入单条记录，空间不足时轮转分段"""
+        payload = serializer.encode_event(event)
+        size = _RECORD_HEADER.size + len(payload)
+
+        # 预留 4 字节作为分段结束标记
+        if size + _RECORD_HEADER.size > self.segment_size:
+            self.stats.incr("dropped")
+            logger.warning(f"事件过大（{len(payload)} 字节），无法写入暂存")
+            return
+
+        if self._active_map is None:
+            self._open_active()
+        elif self._active_offset + size + _RECORD_HEADER.size > self.segment_size:
+            self._seal_active()
+            self._open_active()
+
+        _RECORD_HEADER.pack_into(self._active_map, self._active_offset, len(payload))
+        start = self._active_offset + _RECORD_HEADER.size
+        self._active_map[start:start + len(payload)] = payload
+        self._active_offset += size
+        self._active_records += 1
+        self.stats.incr("spooled")
+
+    def _open_active(self):
+        """创建新的活动分段（调用方持有 _io_lock）"""
+        self._enforce_capacity()
+
+        self._active_seq += 1
+        path = self._segment_path(self._active_seq)
+        self._active_file = open(path, "w+b")
+        self._active_file.truncate(self.segment_size)
+        self._active_map = mmap.mmap(self._active_file.fileno(), self.segment_size)
+        self._active_offset = 0
+        self._active_records = 0
+
+    def _seal_active(self):
+        """封存活动分段并截断到实际大小（调用方持有 _io_lock）"""
+        if self._active_map is None:
+            return
+
+        self._active_map.flush()
+        self._active_map.close()
+        self._active_file.truncate(self._active_offset)
+        self._active_file.close()
+
+        if self._active_records > 0:
+            self._sealed[self._active_seq] = self._active_records
+        else:
+            self._remove_segment(self._active_seq)
+
+        self._active_map = None
+        self._active_file = None
+        self._active_offset = 0
+        self._active_records = 0
+
+    def _enforce_capacity(self):
+        """为新分段腾出空间，丢弃最旧的已封存分段（调用方持有 _io_lock）"""
+        while self._sealed:
+            used = sum(
+                os.path.getsize(self._segment_path(seq)) for seq in self._sealed
+            )
+            if used + self.segment_size <= self.max_bytes:
+                return
+            oldest = min(self._sealed)
+            self.stats.incr("dropped", self._sealed.pop(oldest))
+            self.stats.incr("segments_dropped")
+            self._remove_segment(oldest)
+            logger.warning(f"暂存已达上限，丢弃最旧分段 {oldest}")
+
+    # ------------------------------------------------------------------
+    # 文件工具
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.segment_dir, f"{seq:016d}{_SEGMENT_SUFFIX}")
+
+    def _remove_segment(self, seq: int):
+        try:
+            os.remove(self._segment_path(seq))
+        except FileNotFoundError:
+            pass
+
+    def _adopt_lock(self) -> Optional[IO[bytes]]:
+        """获取目录级的接管锁（阻塞），没有 fcntl 时返回 None"""
+        if fcntl is None:
+            return None
+        f = open(os.path.join(self.directory, _ADOPT_LOCK), "a+b")
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return f
+
+    def _recover(self):
+        """创建本实例的子目录，接管已退出进程遗留的分段"""
+        adopt_lock = self._adopt_lock()
+        try:
+            if fcntl is not None:
+                self._dir_lock = _try_lock(self.segment_dir + _LOCK_SUFFIX)
+            os.makedirs(self.segment_dir)
+
+            # 旧版本直接写在暂存目录下的分段，以及锁已释放的子目录中的分段
+            orphans: List[Tuple[str, Optional[IO[bytes]]]] = [(self.directory, None)]
+            if fcntl is not None:
+                for name in sorted(os.listdir(self.directory)):
+                    path = os.path.join(self.directory, name)
+                    if not _SEGMENT_DIR.match(name) or path == self.segment_dir or not os.path.isdir(path):
+                        continue
+                    lock = _try_lock(path + _LOCK_SUFFIX)
+                    if lock is not None:
+                        orphans.append((path, lock))
+
+            segments = []
+            for path, _ in orphans:
+                for name in os.listdir(path):
+                    seq = _segment_seq(name)
+                    if seq is not None:
+                        segment = os.path.join(path, name)
+                        segments.append((os.path.getmtime(segment), path, seq, segment))
+
+            # 按写入时间从旧到新重新编号，移入本实例的子目录
+            for _, _, _, segment in sorted(segments):
+                records = len(self._read_segment(segment))
+                if not records:
+                    os.remove(segment)
+                    continue
+                self._active_seq += 1
+                os.replace(segment, self._segment_path(self._active_seq))
+                self._sealed[self._active_seq] = records
+
+            for path, lock in orphans[1:]:
+                self._remove_dir(path, lock)
+        finally:
+            if adopt_lock is not None:
+                adopt_lock.close()
+
+        if self._sealed:
+            logger.info(f"从暂存目录恢复 {sum(self._sealed.values())} 个事件")
+
+    @staticmethod
+    def _remove_dir(path: str, lock: Optional[IO[bytes]]):
+        """删除空的子目录及其锁文件（调用方持有接管锁）"""
+        try:
+            os.rmdir(path)
+            os.remove(path + _LOCK_SUFFIX)
+        except OSError:
+            pass
+        if lock is not None:
+            lock.close()
+
+    @staticmethod
+    def _read_segment(path: str) -> List[Dict[str, Any]]:
+        """通过 mmap 解析分段文件中的全部记录"""
+        events = []
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return events
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                offset = 0
+                while offset + _RECORD_HEADER.size <= size:
+                    (length,) = _RECORD_HEADER.unpack_from(mm, offset)
+                    if length == 0:
+                        break
+                    start = offset + _RECORD_HEADER.size
+                    if start + length > size:
+                        break
+                    try:
+                        events.append(json.loads(mm[start:start + length]))
+                    except ValueError:
+                        logger.warning(f"暂存记录损坏，跳过: {path}@{offset}")
+                    offset = start + length
+        return events
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息"""
+        stats = self.stats.snapshot()
+        with self._io_lock:
+            stats["pending"] = sum(self._sealed.values()) + self._active_records
+        return stats
+
+    def close(self):
+        """停止写入线程，落盘剩余缓冲并封存活动分段，没有剩余分段时删除本实例的子目录"""
+        self._closed.set()
+        self._wakeup.set()
+        self._writer.join(timeout=self.flush_interval * 2)
+        self._write_pending()
+        with self._io_lock:
+            self._seal_active()
+            remaining = bool(self._sealed)
+
+        if self._dir_lock is None:
+            return
+        if remaining:
+            # 释放锁，由下一个使用该目录的进程接管剩余分段
+            self._dir_lock.close()
+        else:
+            adopt_lock = self._adopt_lock()
+            try:
+                self._remove_dir(self.segment_dir, self._dir_lock)
+            finally:
+                adopt_lock.close()
+        self._dir_lock = None
+
+
+class SpoolReplayer:
+    """
+    暂存回放器
+
+    后台线程定期检查暂存，健康检查通过后按从旧到新的顺序
+    将分段中的事件通过批量接口重新发送
+    """
+
+    def __init__(
+        self,
+        spool: EventSpool,
+        send_batch: Callable[[List[Dict[str, Any]]], bool],
+        health_check: Callable[[], bool],
+        interval: float = 5.0,
+        batch_size: int = 500
+    ):
+        """
+        初始化回放器
+
+        Args:
+            spool: 事件暂存
+            send_batch: 批量发送函数，失败时不应再次写入暂存；
+                服务器拒绝批次时抛出 BatchRejected，其他失败返回 False
+            health_check: 健康检查函数
+            interval: 检查间隔（秒）
+            batch_size: 回放时单批最大事件数
+        """
+        self.spool = spool
+        self._send_batch = send_batch
+        self._health_check = health_check
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._stopped = threading.Event()
+        self.stats = {
+            "replayed": 0,
+            "rejected": 0
+        }
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="agent-monitor-spool-replayer",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if self.spool.has_pending() and self._health_check():
+                    self.replay()
+            except Exception as e:
+                logger.error(f"暂存回放失败: {e}")
+
+    def replay(self) -> int:
+        """
+        回放所有分段，遇到连接失败 / 5xx 时停止，下次检查时重试
+
+        分段内的事件全部发送成功后才删除分段，
+        因此中途失败时部分事件可能会被重复发送（至少一次语义）；
+        被服务器拒绝的批次计入 rejected 后跳过，分段照常删除
+
+        Returns:
+            int: 本次回放的事件数
+        """
+        replayed = 0
+        while not self._stopped.is_set():
+            segment = self.spool.read_oldest()
+            if segment is None:
+                break
+
+            seq, events = segment
+            sent = 0
+            for i in range(0, len(events), self.batch_size):
+                batch = events[i:i + self.batch_size]
+                try:
+                    if not self._send_batch(batch):
+                        logger.warning("暂存回放中断，监控服务器仍不可用")
+                        return replayed
+                except BatchRejected as e:
+                    self.stats["rejected"] += len(batch)
+                    logger.warning(f"暂存分段 {seq} 中的 {len(batch)} 个事件被丢弃: {e}")
+                    continue
+                sent += len(batch)
+
+            self.spool.commit(seq)
+            replayed += sent
+            self.stats["replayed"] += sent
+
+        if replayed:
+            logger.info(f"暂存回放完成: {replayed} 个事件")
+        return replayed
+
+    def close(self):
+        """停止回放线程"""
+        self._stopped.set()
+        self._thread.join(timeout=self.interval)
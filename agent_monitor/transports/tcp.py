@@ -0,0 +1,503 @@
+"""
+TCP 传输器 - 单个持久连接 + 长度前缀二进制帧
+
+与 HTTP 批量接口相比，每个批次只需一个帧头和一个 ACK，
+没有 HTTP 请求/响应头的开销，适合大量小事件（如 agent_thinking）
+
+- 帧格式见 agent_monitor.protocol.framing（MessagePack 或紧凑 JSON）
+- 流水线发送：最多 max_in_flight_batches 个批次可以同时等待 ACK，ACK 按 seq 匹配，
+  高延迟链路上吞吐不再受限于每批一个往返
+- 批次在收到 ACK 前保留，断线后以指数退避重连，按原顺序重发所有未确认的批次
+  （至少一次投递；同一连接上的帧按顺序处理，因此每个 Agent 的事件顺序不变）
+- dictionary=True 时使用字典编码：source / metadata 公共块每个连接只发送一次，
+  之后的事件只携带句柄（见 agent_monitor.protocol.dictionary）
+- wire_version="2.0" 时发送紧凑线格式 v2 的批次帧（见 agent_monitor.protocol.compact），
+  v2 已去掉重复的字段名，不再叠加字典编码
+- 参考接收端: python -m agent_monitor.receivers.tcp
+"""
+
+import queue
+import random
+import select
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+import logging
+
+from agent_monitor.protocol import compact, framing, serializer
+from agent_monitor.protocol.dictionary import BlockEncoder
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.batching import collect_batch
+from agent_monitor.transports.priority import PriorityEventQueue, default_limits
+from agent_monitor.utils.stats import TransportStats
+
+logger = logging.getLogger(__name__)
+
+
+def parse_tcp_address(address: str) -> Tuple[str, int]:
+    """
+    解析 tcp://host:port 地址
+
+    Args:
+        address: tcp://host:port 或 host:port
+
+    Returns:
+        (host, port)
+    """
+    if "://" not in address:
+        address = f"tcp://{address}"
+    parsed = urlparse(address)
+    if parsed.scheme != "tcp" or not parsed.hostname or not parsed.port:
+        raise ValueError(f"无效的 TCP 地址: {address}")
+    return parsed.hostname, parsed.port
+
+
+class TcpTransport(BaseTransport):
+    """
+    TCP 传输器
+
+    与 DirectTransport 接口一致（send / send_sync / send_batch /
+    health_check / get_stats / close），可直接作为 CrewAIPlugin 的 transport
+    """
+
+    # 事件只经过 serializer 编码，时间戳在发送线程上格式化
+    deferred_timestamps = True
+
+    def __init__(
+        self,
+        address: str,
+        timeout: float = 1.0,
+        silent_fail: bool = True,
+        batch_size: int = 100,
+        linger: float = 0.2,
+        max_queue_size: int = 10000,
+        priority_limits: Optional[Dict[str, int]] = None,
+        event_priorities: Optional[Dict[str, str]] = None,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 30.0,
+        dictionary: bool = False,
+        max_in_flight_batches: int = 4,
+        wire_version: str = "1.0"
+    ):
+        """
+        初始化 TCP 传输器
+
+        Args:
+            address: 接收端地址 (e.g., tcp://localhost:9400)
+            timeout: 连接和等待 ACK 的超时时间（秒）
+            silent_fail: 是否静默失败，True 时失败不抛异常
+            batch_size: 单批最大事件数
+            linger: 批次最长等待时间（秒）
+            max_queue_size: 队列总容量，按优先级划分（见 priority_limits）
+            priority_limits: 各优先级队列容量 {"high": n, "normal": n, "low": n}，
+                默认按 max_queue_size 划分；某级队列满时丢弃该级最旧的事件
+            event_priorities: 事件类型 -> 优先级 ("high" / "normal" / "low")，
+                覆盖默认映射
+            backoff_initial: 首次重连等待时间（秒）
+            backoff_max: 重连等待时间上限（秒）
+            dictionary: 是否使用字典编码（接收端需支持 DICT_BATCH 帧）
+            max_in_flight_batches: 同时等待 ACK 的最大批次数，1 表示每批等待 ACK 后再发送下一批
+            wire_version: 线格式版本，"1.0"（默认）或 "2.0"（接收端需支持 V2_BATCH 帧）
+        """
+        if wire_version not in ("1.0", compact.VERSION):
+            raise ValueError(f"不支持的线格式版本: {wire_version}")
+
+        self.address = address
+        self.timeout = timeout
+        self.silent_fail = silent_fail
+        self.batch_size = batch_size
+        self.linger = linger
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_in_flight_batches = max(1, max_in_flight_batches)
+        self.codec = framing.default_codec()
+        self.wire_version = wire_version
+        # 字典编码的句柄表与连接绑定，断线时清空
+        self._encoder = BlockEncoder() if dictionary and wire_version == "1.0" else None
+
+        self._sock: Optional[socket.socket] = None
+        self._io_lock = threading.Lock()
+        self._seq = 0
+        self._backoff = backoff_initial
+        self._next_attempt = 0.0
+        self._ever_connected = False
+
+        self._queue = PriorityEventQueue(
+            priority_limits or default_limits(max_queue_size),
+            event_priorities
+        )
+        self._closed = threading.Event()
+        self._deadline: Optional[float] = None
+        # 后台线程持有的批次（均由 _io_lock 保护）：
+        # _ready 为已出队、等待发送（或断线后等待重发）的批次，按原顺序排列；
+        # _unacked 为已发送、等待 ACK 的批次 seq -> (事件列表, 发送时间)
+        self._ready: Deque[list] = deque()
+        self._unacked: "OrderedDict[int, Tuple[list, float]]" = OrderedDict()
+        self._given_up = 0
+
+        # 统计
+        self.stats = TransportStats(
+            ("sent", "failed", "dropped", "abandoned", "batches", "retries", "reconnects"),
+            histograms={"latency_ms": 1000, "batch_size": 1, "payload_bytes": 1, "queue_depth": 1}
+        )
+
+        self._worker = threading.Thread(
+            target=self._run,
+            name="agent-monitor-tcp",
+            daemon=True
+        )
+        self._worker.start()
+
+    # ------------------------------------------------------------------
+    # 连接管理（调用方持有 _io_lock）
+    # ------------------------------------------------------------------
+
+    def _open_socket(self) -> socket.socket:
+        """建立到接收端的连接，子类可覆盖以使用其他地址族"""
+        host, port = parse_tcp_address(self.address)
+        sock = socket.create_connection((host, port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _ensure_connected(self) -> bool:
+        """确保连接可用，处于退避期内时直接返回 False"""
+        if self._sock is not None:
+            return True
+        if time.monotonic() < self._next_attempt:
+            return False
+
+        try:
+            self._sock = self._open_socket()
+            self._sock.settimeout(self.timeout)
+        except OSError as e:
+            # 指数退避 + 抖动，避免大量进程同时重连
+            delay = self._backoff * random.uniform(0.5, 1.0)
+            self._next_attempt = time.monotonic() + delay
+            self._backoff = min(self._backoff * 2, self.backoff_max)
+            logger.warning(f"无法连接到接收端 {self.address}: {e}，{delay:.1f} 秒后重试")
+            return False
+
+        if self._ever_connected:
+            self.stats.incr("reconnects")
+            logger.info(f"已重新连接到接收端 {self.address}")
+        self._ever_connected = True
+        self._backoff = self.backoff_initial
+        return True
+
+    def _disconnect(self):
+        """断开连接，未确认的批次按原顺序放回待发送队列的最前面"""
+        if self._unacked:
+            self.stats.incr("retries", len(self._unacked))
+            self._ready.extendleft(reversed([events for events, _ in self._unacked.values()]))
+            self._unacked.clear()
+        if self._encoder is not None:
+            self._encoder.reset()
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    # ------------------------------------------------------------------
+    # 发送
+    # ------------------------------------------------------------------
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        """
+        将事件放入队列（非阻塞）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功入队
+        """
+        if self._closed.is_set():
+            self.stats.incr("dropped")
+            return False
+
+        shed = self._queue.put(event)
+        if shed is not None:
+            self.stats.incr("dropped")
+            logger.debug(f"事件队列已满，丢弃最旧的 {shed} 优先级事件")
+        return True
+
+    def send_sync(self, event: Dict[str, Any]) -> bool:
+        """
+        同步发送事件并等待 ACK（阻塞，用于测试）
+
+        Args:
+            event: 事件字典
+
+        Returns:
+            bool: 是否成功
+        """
+        return self.send_batch([event])
+
+    def send_batch(self, events: list) -> bool:
+        """
+        同步发送一个批次并等待 ACK
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            bool: 是否成功
+        """
+        if not events:
+            return True
+
+        if self._deliver(events):
+            self.stats.incr("sent", len(events))
+            return True
+
+        self.stats.incr("failed", len(events))
+        return False
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        return self._seq
+
+    def _encode(self, events: list, seq: int) -> bytes:
+        """编码批次帧（调用方持有 _io_lock，字典编码的句柄表按发送顺序更新）"""
+        if self.wire_version == compact.VERSION:
+            return framing.encode_v2_batch(compact.encode_events(events), seq, self.codec)
+        if self._encoder is not None:
+            return framing.encode_dict_batch(
+                self._encoder.encode(events, serializer.iso_timestamp), seq, self.codec
+            )
+        return framing.encode_batch(events, seq, self.codec)
+
+    def _deliver(self, events: list) -> bool:
+        """同步发送批次帧并等待对应 seq 的 ACK，失败时断开连接"""
+        with self._io_lock:
+            if not self._ensure_connected():
+                return False
+
+            seq = self._next_seq()
+            started = time.perf_counter()
+            try:
+                frame = self._encode(events, seq)
+                self._sock.sendall(frame)
+                self._await_ack(seq)
+            except (OSError, framing.FrameError) as e:
+                self._disconnect()
+                logger.warning(f"TCP 批量发送失败: {e}")
+                return False
+
+        self.stats.observe("latency_ms", (time.perf_counter() - started) * 1000)
+        self.stats.observe("batch_size", len(events))
+        self.stats.observe("payload_bytes", len(frame))
+
+        logger.debug(f"TCP 批量发送成功: {len(events)} 个事件 (seq={seq})")
+        return True
+
+    def _await_ack(self, seq: int):
+        """读取帧直到收到指定 seq 的 ACK，期间收到的后台线程批次的 ACK 一并处理"""
+        while True:
+            frame_type, _, ack_seq, _ = framing.recv_frame(self._sock)
+            if frame_type != framing.FRAME_ACK:
+                continue
+            if ack_seq == seq:
+                return
+            self._ack(ack_seq)
+
+    def _ack(self, seq: int):
+        """后台线程的批次收到 ACK（调用方持有 _io_lock）"""
+        entry = self._unacked.pop(seq, None)
+        if entry is None:
+            return
+        events, sent_at = entry
+        self.stats.incr("sent", len(events))
+        self.stats.incr("batches")
+        self.stats.observe("latency_ms", (time.perf_counter() - sent_at) * 1000)
+        logger.debug(f"TCP 批量发送成功: {len(events)} 个事件 (seq={seq})")
+
+    def _transmit(self, events: list) -> bool:
+        """发送一个批次帧，不等待 ACK（调用方持有 _io_lock）"""
+        seq = self._next_seq()
+        try:
+            frame = self._encode(events, seq)
+            self._sock.sendall(frame)
+        except (OSError, framing.FrameError) as e:
+            self._disconnect()
+            logger.warning(f"TCP 批量发送失败: {e}")
+            return False
+
+        self._unacked[seq] = (events, time.perf_counter())
+        self.stats.observe("batch_size", len(events))
+        self.stats.observe("payload_bytes", len(frame))
+        return True
+
+    def _fill_window(self):
+        """在窗口内依次发送待发送的批次，窗口未满时把队列中已有的事件组成新批次（不等待）"""
+        while len(self._unacked) < self.max_in_flight_batches:
+            if not self._ready:
+                batch = self._take_queued()
+                if not batch:
+                    return
+                self._ready.append(batch)
+            if not self._transmit(self._ready[0]):
+                return
+            self._ready.popleft()
+
+    def _take_queued(self) -> list:
+        """取出队列中已有的事件（最多 batch_size 个，不等待）"""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _read_acks(self):
+        """等待并处理 ACK；最早的未确认批次超过超时时间仍未确认时断开重连"""
+        sock = self._sock
+        if sock is None:
+            return
+        # 窗口未满时最多等待 linger，期间到达的事件组成下一个批次
+        wait = self.linger if len(self._unacked) < self.max_in_flight_batches else self.timeout
+        try:
+            select.select([sock], [], [], wait)
+        except (OSError, ValueError):
+            pass  # 连接已被其他线程关闭，下面按当前状态处理
+
+        with self._io_lock:
+            if self._sock is not sock:
+                return
+            try:
+                while self._unacked and select.select([sock], [], [], 0)[0]:
+                    frame_type, _, ack_seq, _ = framing.recv_frame(sock)
+                    if frame_type == framing.FRAME_ACK:
+                        self._ack(ack_seq)
+            except (OSError, ValueError, framing.FrameError) as e:
+                self._disconnect()
+                logger.warning(f"TCP 读取 ACK 失败: {e}")
+                return
+
+            if self._unacked:
+                _, sent_at = next(iter(self._unacked.values()))
+                if time.perf_counter() - sent_at > self.timeout:
+                    logger.warning(f"TCP 等待 ACK 超时，{len(self._unacked)} 个批次将在重连后重发")
+                    self._disconnect()
+
+    def _outstanding(self) -> int:
+        """后台线程持有的尚未确认的事件数"""
+        return sum(len(events) for events in self._ready) + sum(
+            len(events) for events, _ in self._unacked.values()
+        )
+
+    def _run(self):
+        """后台线程：流水线发送批次并读取 ACK，发送失败时保留批次并在退避后按原顺序重发"""
+        while not (
+            self._closed.is_set() and self._queue.empty()
+            and not self._ready and not self._unacked
+        ):
+            if self._closed.is_set() and (
+                self._deadline is None or time.monotonic() >= self._deadline
+            ):
+                # 关闭截止时间已到而接收端仍不可用（或连接后一直不确认），放弃剩余事件
+                self._give_up()
+                return
+
+            if not self._ready and not self._unacked:
+                # 空闲：阻塞等待下一个批次
+                batch = collect_batch(self._queue, self.batch_size, self.linger)
+                if not batch:
+                    continue
+                self.stats.observe("queue_depth", self._queue.qsize())
+                with self._io_lock:
+                    self._ready.append(batch)
+
+            with self._io_lock:
+                connected = self._ensure_connected()
+                if connected:
+                    self._fill_window()
+
+            if connected:
+                self._read_acks()
+            else:
+                wait = max(self._next_attempt - time.monotonic(), 0.05)
+                if self._closed.is_set():
+                    wait = min(wait, max(self._deadline - time.monotonic(), 0))
+                    time.sleep(wait)
+                else:
+                    self._closed.wait(wait)
+
+    def _give_up(self):
+        """放弃后台线程持有的批次并断开连接"""
+        with self._io_lock:
+            outstanding = self._outstanding()
+            self._ready.clear()
+            self._unacked.clear()
+            self._disconnect()
+        self.stats.incr("failed", outstanding)
+        self._given_up += outstanding
+
+    def health_check(self) -> bool:
+        """
+        健康检查 - 测试接收端是否可连接
+
+        Returns:
+            bool: 是否可达
+        """
+        with self._io_lock:
+            return self._ensure_connected()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = self.stats.snapshot()
+        stats["queued"] = self._queue.qsize()
+        for priority, depth in self._queue.depths().items():
+            stats[f"queued_{priority}"] = depth
+        for priority, dropped in self._queue.dropped.items():
+            stats[f"dropped_{priority}"] = dropped
+        stats["connected"] = int(self._sock is not None)
+        stats["in_flight_batches"] = len(self._unacked)
+        return stats
+
+    def close(self, flush: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        停止接收事件，在截止时间前发送剩余事件后关闭连接
+
+        Args:
+            flush: 是否发送队列中剩余的事件
+            timeout: 等待的最长时间（秒），默认按超时时间和 linger 计算
+
+        Returns:
+            int: 截止时仍未送达而被放弃的事件数
+        """
+        if timeout is None:
+            timeout = self.timeout * 2 + self.linger
+        self._deadline = time.monotonic() + (timeout if flush else 0)
+        abandoned = 0 if flush else self._discard_queued()
+        self._closed.set()
+
+        self._worker.join(timeout=max(self._deadline - time.monotonic(), 0))
+        abandoned += self._discard_queued() + self._given_up
+        if self._worker.is_alive():
+            # 后台线程仍在等待 ACK，可能持有 _io_lock，不再等待它
+            abandoned += self._outstanding()
+        else:
+            with self._io_lock:
+                self._disconnect()
+
+        self.stats.incr("abandoned", abandoned)
+        if abandoned:
+            logger.warning(f"关闭 TCP 传输器时放弃了 {abandoned} 个未送达的事件")
+        return abandoned
+
+    def _discard_queued(self) -> int:
+        """清空队列，返回丢弃的事件数"""
+        discarded = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return discarded
+            discarded += 1
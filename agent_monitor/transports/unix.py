@@ -0,0 +1,60 @@
+"""
+Unix 域套接字传输器 - 发送到本机 sidecar 转发进程
+
+与 TcpTransport 使用相同的帧协议和 ACK 机制，只是连接本机的 Unix 域套接字。
+sidecar（python -m agent_monitor.receivers.sidecar）汇总多个进程的事件，
+批量转发到监控服务器，网络延迟和重试完全不在 Agent 进程内发生
+"""
+
+import socket
+from urllib.parse import urlparse
+
+from agent_monitor.transports.tcp import TcpTransport
+
+
+def parse_unix_address(address: str) -> str:
+    """
+    解析 unix:///path/to/socket 地址
+
+    Args:
+        address: unix:///path 或直接为套接字路径
+
+    Returns:
+        套接字路径
+    """
+    if "://" not in address:
+        return address
+    parsed = urlparse(address)
+    if parsed.scheme != "unix" or not parsed.path:
+        raise ValueError(f"无效的 Unix 套接字地址: {address}")
+    return parsed.path
+
+
+class UnixSocketTransport(TcpTransport):
+    """
+    Unix 域套接字传输器
+
+    接口和行为与 TcpTransport 一致（批量、ACK、断线重连）
+    """
+
+    def __init__(self, address: str, **kwargs):
+        """
+        初始化 Unix 域套接字传输器
+
+        Args:
+            address: sidecar 套接字地址 (e.g., unix:///var/run/agent-monitor.sock)
+            **kwargs: 其余参数同 TcpTransport
+        """
+        self.socket_path = parse_unix_address(address)
+        super().__init__(address, **kwargs)
+
+    def _open_socket(self) -> socket.socket:
+        """连接 sidecar 的 Unix 域套接字"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
@@ -0,0 +1,135 @@
+"""
+批量请求体压缩（Content-Encoding）
+
+- gzip 使用标准库，始终可用
+- zstd 需要安装可选依赖 zstandard: pip install agent-monitor-plugin[zstd]
+
+compress_file() 用于文件导出器压缩已轮转的分段
+
+服务器通过 /api/health 声明支持的编码：
+- 响应头 Accept-Encoding: gzip, zstd
+- 或 JSON 响应体 {"compression": ["gzip", "zstd"]}
+"""
+
+import gzip
+import shutil
+from typing import Any, FrozenSet, Iterable, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+# 按优先级排列（压缩率/速度更好的在前）
+_PREFERENCE = ("zstd", "gzip")
+
+# 默认最小压缩阈值（字节），小批次压缩收益不抵 CPU 开销
+DEFAULT_MIN_BYTES = 1024
+
+
+def local_encodings() -> FrozenSet[str]:
+    """本地可用的压缩编码"""
+    encodings = {"gzip"}
+    if zstandard is not None:
+        encodings.add("zstd")
+    return frozenset(encodings)
+
+
+def parse_server_encodings(headers: Any, body: Any) -> FrozenSet[str]:
+    """
+    从健康检查响应中解析服务器支持的编码
+
+    Args:
+        headers: 响应头（支持 .get 的映射）
+        body: 已解析的 JSON 响应体，解析失败时为 None
+
+    Returns:
+        服务器支持的编码集合
+    """
+    encodings = set()
+
+    header = headers.get("Accept-Encoding") if headers is not None else None
+    if header:
+        encodings.update(
+            part.split(";")[0].strip().lower() for part in header.split(",")
+        )
+
+    if isinstance(body, dict):
+        declared = body.get("compression") or body.get("accept_encoding") or []
+        if isinstance(declared, str):
+            declared = [declared]
+        encodings.update(str(item).lower() for item in declared)
+
+    encodings.discard("")
+    return frozenset(encodings)
+
+
+def negotiate(preferred: Optional[str], server_encodings: Iterable[str]) -> Optional[str]:
+    """
+    协商压缩编码
+
+    Args:
+        preferred: 配置的编码 ("gzip" / "zstd" / "auto")，None 表示不压缩
+        server_encodings: 服务器支持的编码
+
+    Returns:
+        选定的编码，无法协商时返回 None
+    """
+    if not preferred:
+        return None
+
+    candidates = local_encodings() & frozenset(server_encodings)
+    if preferred == "auto":
+        for encoding in _PREFERENCE:
+            if encoding in candidates:
+                return encoding
+        return None
+
+    return preferred if preferred in candidates else None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    按指定编码压缩
+
+    Args:
+        data: 原始字节
+        encoding: "gzip" 或 "zstd"
+
+    Returns:
+        压缩后的字节
+    """
+    if encoding == "gzip":
+        # 监控数据对压缩率要求不高，使用较低级别减少 CPU 开销
+        return gzip.compress(data, compresslevel=5)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd 压缩需要安装 zstandard")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+# 压缩文件的扩展名
+FILE_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def compress_file(src: str, dst: str, encoding: str):
+    """
+    流式压缩文件（不把整个文件读入内存）
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+        encoding: "gzip" 或 "zstd"
+    """
+    if encoding == "gzip":
+        with open(src, "rb") as fin, gzip.open(dst, "wb", compresslevel=5) as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        return
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd 压缩需要安装 zstandard")
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            zstandard.ZstdCompressor(level=3).copy_stream(fin, fout)
+        return
+    raise ValueError(f"不支持的压缩编码: {encoding}")
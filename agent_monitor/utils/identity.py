@@ -0,0 +1,149 @@
+"""
+进程身份缓存 - 主机名 / IP 地址 / 进程 ID
+
+事件中的 hostname、ip_address、process_id 原本每个事件都重新获取，
+获取 IP 还要创建一个 UDP socket 并 connect() 到 8.8.8.8。ProcessIdentity 只解析一次：
+- 超过 refresh_interval 后在下一次访问时重新解析
+- 每隔 check_interval 比较一次网络接口列表，变化时立即重新解析
+- fork 之后子进程自动重置（os.register_at_fork），进程 ID 随之更新
+- 没有到探测地址的路由（沙箱、隔离网络）时 IP 为 None，失败结果同样被缓存，
+  不会每个事件都多一次失败的系统调用
+"""
+
+import os
+import socket
+import threading
+import time
+import weakref
+from typing import NamedTuple, Optional, Tuple
+
+
+class Identity(NamedTuple):
+    """一次解析的结果（不可变，解析结果变化时替换为新对象）"""
+    hostname: str
+    ip_address: Optional[str]
+    process_id: int
+
+
+def resolve_local_ip(probe: Tuple[str, int] = ("8.8.8.8", 80)) -> Optional[str]:
+    """
+    获取出口 IP 地址（UDP connect 只查询路由，不发送数据）
+
+    Args:
+        probe: 用于查询路由的地址
+
+    Returns:
+        IP 地址，没有路由时返回 None
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(probe)
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+
+def _interfaces() -> Optional[Tuple[str, ...]]:
+    """网络接口名称列表，平台不支持时返回 None"""
+    try:
+        return tuple(name for _, name in socket.if_nameindex())
+    except (AttributeError, OSError):
+        return None
+
+
+# 所有实例，fork 后在子进程中重置
+_instances: "weakref.WeakSet[ProcessIdentity]" = weakref.WeakSet()
+
+
+class ProcessIdentity:
+    """
+    进程身份缓存（线程安全）
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 300.0,
+        check_interval: float = 10.0,
+        probe: Tuple[str, int] = ("8.8.8.8", 80)
+    ):
+        """
+        初始化缓存（第一次访问时解析）
+
+        Args:
+            refresh_interval: 重新解析的间隔（秒）
+            check_interval: 检查网络接口变化的间隔（秒），0 表示不检查
+            probe: 获取出口 IP 时查询路由的地址
+        """
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self.probe = probe
+
+        self._lock = threading.Lock()
+        self._identity: Optional[Identity] = None
+        self._interfaces: Optional[Tuple[str, ...]] = None
+        self._resolved_at = 0.0
+        self._next_check = 0.0
+        self.refreshes = 0
+        _instances.add(self)
+
+    def get(self) -> Identity:
+        """
+        获取当前身份，到期或检测到网络变化时重新解析
+
+        Returns:
+            Identity: 解析结果不变时返回同一个对象，可用 `is` 判断是否变化
+        """
+        identity = self._identity
+        now = time.monotonic()
+        if identity is not None and now < self._next_check:
+            return identity
+
+        with self._lock:
+            if self._identity is None or now - self._resolved_at >= self.refresh_interval:
+                self._refresh(now)
+            elif now >= self._next_check:
+                if _interfaces() != self._interfaces:
+                    self._refresh(now)
+                else:
+                    self._schedule(now)
+            return self._identity
+
+    def _schedule(self, now: float):
+        """计算下一次检查的时间（调用方持有 _lock）"""
+        deadline = self._resolved_at + self.refresh_interval
+        if self.check_interval:
+            deadline = min(deadline, now + self.check_interval)
+        self._next_check = deadline
+
+    def _refresh(self, now: float):
+        """重新解析（调用方持有 _lock）"""
+        self._interfaces = _interfaces()
+        identity = Identity(
+            hostname=socket.gethostname(),
+            ip_address=resolve_local_ip(self.probe),
+            process_id=os.getpid(),
+        )
+        if identity != self._identity:
+            self._identity = identity
+        self._resolved_at = now
+        self._schedule(now)
+        self.refreshes += 1
+
+    def invalidate(self):
+        """丢弃缓存，下一次访问时重新解析"""
+        with self._lock:
+            self._identity = None
+
+    def _after_fork(self):
+        # 子进程中其他线程已不存在，锁可能处于持有状态，直接重建
+        self._lock = threading.Lock()
+        self._identity = None
+
+
+def _reset_after_fork():
+    for instance in list(_instances):
+        instance._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
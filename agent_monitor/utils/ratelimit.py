@@ -0,0 +1,178 @@
+"""
+按 (agent_id, 事件类型) 限流 - 令牌桶
+
+陷入工具调用循环的 Agent 可能在短时间内产生大量 tool_usage_started / tool_usage_finished
+事件，挤占其他 Agent 的发送带宽。每个 (agent_id, 事件类型) 一个令牌桶：
+- 令牌以 rate 个/秒的速度补充，最多积累 burst 个；每个事件消耗一个令牌
+- 没有令牌时事件被抑制，只累加计数，由调用方定期取出计数并汇总为一条
+  "events_suppressed" 记录发送
+- 高优先级的生命周期事件（agent_error、crew_completed 等）默认不限流
+
+配置格式（AGENT_MONITOR_RATE_LIMIT）: "默认速率[:突发],事件类型=速率[:突发],..."
+例如 "20:100,tool_usage_started=5:20,agent_thinking=off"
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# (速率, 突发容量)，速率为 None 表示不限流
+Limit = Tuple[Optional[float], float]
+
+
+class TokenBucket:
+    """令牌桶（调用方负责加锁）"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        """补充令牌后尝试消耗一个，返回是否成功"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def parse_rate_limits(spec: str) -> Tuple[Optional[Limit], Dict[str, Limit]]:
+    """
+    解析限流配置
+
+    Args:
+        spec: "默认速率[:突发],事件类型=速率[:突发],..."，速率为 "off" 表示不限流
+
+    Returns:
+        (默认限制, 按事件类型覆盖的限制)，未配置默认限制时为 None
+    """
+    default: Optional[Limit] = None
+    overrides: Dict[str, Limit] = {}
+
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        event_type, _, value = part.rpartition("=")
+        rate_text, _, burst_text = value.partition(":")
+        if rate_text.strip().lower() in ("off", "none", ""):
+            limit: Limit = (None, 0.0)
+        else:
+            rate = float(rate_text)
+            if rate < 0:
+                raise ValueError(f"限流速率不能为负数: {part}")
+            burst = float(burst_text) if burst_text else max(rate, 1.0)
+            limit = (rate, burst)
+
+        if event_type:
+            overrides[event_type.strip()] = limit
+        else:
+            default = limit
+
+    return default, overrides
+
+
+class RateLimiter:
+    """
+    按 (agent_id, 事件类型) 的令牌桶限流器（线程安全）
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        overrides: Optional[Dict[str, Limit]] = None,
+        exempt: Iterable[str] = (),
+        max_keys: int = 10000
+    ):
+        """
+        初始化限流器
+
+        Args:
+            rate: 默认速率（事件/秒），None 表示未覆盖的事件类型不限流
+            burst: 默认突发容量，默认为 max(rate, 1)
+            overrides: 事件类型 -> (速率, 突发容量)，速率为 None 表示该类型不限流
+            exempt: 不限流的事件类型（如生命周期事件）
+            max_keys: 令牌桶数量上限，超过后淘汰最久未使用的桶
+        """
+        self.default: Optional[Limit] = None
+        if rate is not None:
+            self.default = (rate, burst if burst is not None else max(rate, 1.0))
+        self.overrides: Dict[str, Limit] = dict(overrides or {})
+        self.exempt = frozenset(exempt)
+        self.max_keys = max_keys
+
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._suppressed: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str, exempt: Iterable[str] = (), **kwargs) -> "RateLimiter":
+        """从配置字符串创建（格式见 parse_rate_limits）"""
+        default, overrides = parse_rate_limits(spec)
+        rate, burst = default if default is not None else (None, None)
+        return cls(rate, burst, overrides, exempt=exempt, **kwargs)
+
+    def _limit_for(self, event_type: str) -> Optional[Limit]:
+        if event_type in self.exempt:
+            return None
+        limit = self.overrides.get(event_type, self.default)
+        if limit is None or limit[0] is None:
+            return None
+        return limit
+
+    def allow(self, agent_id: str, event_type: str) -> bool:
+        """
+        判断事件是否可以发送，被抑制时累加计数
+
+        Args:
+            agent_id: Agent ID
+            event_type: 事件类型
+
+        Returns:
+            bool: 是否可以发送
+        """
+        limit = self._limit_for(event_type)
+        if limit is None:
+            return True
+
+        key = (agent_id, event_type)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(limit[0], limit[1], now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            if bucket.take(now):
+                return True
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+
+    def drain_suppressed(self) -> Dict[Tuple[str, str], int]:
+        """
+        取出并清零被抑制的事件计数
+
+        Returns:
+            (agent_id, 事件类型) -> 被抑制的事件数
+        """
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+        return suppressed
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息"""
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "suppressed_pending": sum(self._suppressed.values()),
+            }
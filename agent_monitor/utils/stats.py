@@ -0,0 +1,232 @@
+"""
+传输器统计 - 按线程分片的计数器和对数分桶直方图
+
+`self.stats["sent"] += 1` 在多个发送线程中并发执行时会丢失更新；
+这里每个线程只写自己的分片（单写者，无需加锁），读取时合并所有分片：
+- 计数器: incr(name, n)
+- 直方图: observe(name, value)，HDR 风格的对数分桶，相对误差约 3%，
+  内存与记录次数无关
+- snapshot(): 合并后的计数器 + 各直方图的 count / mean / min / max / p50 / p95 / p99
+
+DirectTransport.send() 每个事件一个线程，已退出线程的分片在读取时
+（以及分片数量过多时）合并到一个归档分片中，分片数量不会无限增长
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+# 每个 2 的幂区间划分为 2^(_SUB_BITS-1) 个子桶
+_SUB_BITS = 5
+_SUB_HALF = 1 << (_SUB_BITS - 1)
+_LINEAR_MAX = 1 << _SUB_BITS
+
+# 注册新分片时，分片数量超过该值则回收已退出线程的分片
+_MAX_SHARDS = 64
+
+PERCENTILES = (50, 95, 99)
+
+
+def _bucket_index(value: int) -> int:
+    """值 -> 桶序号（小于 2^_SUB_BITS 的值精确记录）"""
+    if value < _LINEAR_MAX:
+        return value
+    shift = value.bit_length() - _SUB_BITS
+    return _SUB_HALF * shift + (value >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """桶序号 -> 桶内代表值（区间中点）"""
+    if index < _LINEAR_MAX:
+        return float(index)
+    shift = index // _SUB_HALF - 1
+    lower = (index - _SUB_HALF * shift) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+class Histogram:
+    """
+    对数分桶直方图（单写者）
+
+    记录整数值；调用方按 scale 把浮点值换算为整数（如毫秒 x1000 = 微秒精度）
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, value: int):
+        if value < 0:
+            value = 0
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram"):
+        """合并另一个直方图（other 可能仍在被写入，只读取一次计数副本）"""
+        counts = other.counts.copy()
+        for index, count in counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += sum(counts.values())
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, q: float) -> float:
+        """第 q 百分位数（0-100），结果限制在 [min, max] 内"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(_bucket_value(index), self.min), self.max)
+        return float(self.max)
+
+    def summary(self, scale: float = 1) -> Dict[str, float]:
+        """汇总: count / mean / min / max / p50 / p95 / p99（按 scale 换算回原单位）"""
+        result = {
+            "count": self.count,
+            "mean": round(self.total / self.count / scale, 3) if self.count else 0.0,
+            "min": round((self.min or 0) / scale, 3),
+            "max": round((self.max or 0) / scale, 3),
+        }
+        for q in PERCENTILES:
+            result[f"p{q}"] = round(self.percentile(q) / scale, 3)
+        return result
+
+
+class _Shard:
+    """单个线程的计数器和直方图"""
+
+    __slots__ = ("thread", "counters", "histograms")
+
+    def __init__(self, thread: Optional[threading.Thread]):
+        self.thread = thread
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def merge_into(self, counters: Dict[str, int], histograms: Dict[str, Histogram]):
+        for name, value in self.counters.copy().items():
+            counters[name] = counters.get(name, 0) + value
+        for name, histogram in self.histograms.copy().items():
+            target = histograms.get(name)
+            if target is None:
+                target = histograms[name] = Histogram()
+            target.merge(histogram)
+
+
+class TransportStats:
+    """
+    线程安全的传输器统计
+
+    写入路径（incr / observe）不加锁；只有线程首次写入时注册分片需要加锁
+    """
+
+    def __init__(
+        self,
+        counters: Iterable[str] = (),
+        histograms: Optional[Dict[str, float]] = None
+    ):
+        """
+        初始化统计
+
+        Args:
+            counters: 预先声明的计数器（快照中总是出现，初始为 0）
+            histograms: 直方图名称 -> scale（记录值 = round(value * scale)），
+                如 {"latency_ms": 1000} 以微秒精度记录毫秒延迟
+        """
+        self._counter_names: List[str] = list(counters)
+        self._scales: Dict[str, float] = dict(histograms or {})
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        # 已退出线程的分片合并到这里
+        self._retired = _Shard(None)
+
+    def declare(self, *names: str):
+        """追加声明计数器（子类在父类基础上扩展时使用）"""
+        for name in names:
+            if name not in self._counter_names:
+                self._counter_names.append(name)
+
+    def declare_histogram(self, name: str, scale: float = 1):
+        """追加声明直方图"""
+        self._scales.setdefault(name, scale)
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+
+        shard = _Shard(threading.current_thread())
+        with self._lock:
+            if len(self._shards) >= _MAX_SHARDS:
+                self._retire_dead()
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def _retire_dead(self):
+        """把已退出线程的分片合并到归档分片（调用方持有 _lock）"""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                shard.merge_into(self._retired.counters, self._retired.histograms)
+        self._shards = alive
+
+    def incr(self, name: str, n: int = 1):
+        """计数器加 n"""
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float):
+        """记录一个直方图样本"""
+        histograms = self._shard().histograms
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        histogram.record(int(round(value * self._scales.get(name, 1))))
+
+    def _merge(self):
+        counters: Dict[str, int] = {name: 0 for name in self._counter_names}
+        histograms: Dict[str, Histogram] = {}
+        with self._lock:
+            self._retire_dead()
+            self._retired.merge_into(counters, histograms)
+            for shard in self._shards:
+                shard.merge_into(counters, histograms)
+        return counters, histograms
+
+    def get(self, name: str) -> int:
+        """读取单个计数器的合并值"""
+        return self._merge()[0].get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        合并所有分片
+
+        Returns:
+            计数器（平铺）+ 每个直方图一个汇总字典
+        """
+        counters, histograms = self._merge()
+        result: Dict[str, Any] = dict(counters)
+        for name, scale in self._scales.items():
+            result[name] = histograms.get(name, Histogram()).summary(scale)
+        return result
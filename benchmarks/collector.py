@@ -0,0 +1,280 @@
+"""
+基准测试用的桩收集端
+
+在当前进程中启动，实现监控服务器的四个接口，只计数不存储：
+- POST /api/events          单个事件
+- POST /api/events/batch    事件列表（支持 gzip / zstd 压缩、字典编码和 v2 线格式）
+- POST /api/schema          v2 编码表
+- GET  /api/health          声明支持的压缩编码、字典编码、整数纳秒时间戳和 v2 线格式
+
+另外提供 TCP 帧接收端和 UDP 数据报接收端，用于 tcp:// / udp:// 传输器。
+处理请求消耗的 CPU 时间单独统计（collector_cpu_seconds），基准结果中从进程 CPU 时间里扣除
+
+单独运行:
+    python benchmarks/collector.py --port 8080
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from agent_monitor.protocol import compact
+from agent_monitor.protocol import dictionary as dict_codec
+from agent_monitor.protocol import datagram
+from agent_monitor.receivers.tcp import FrameReceiver
+from agent_monitor.utils import compression as codec
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+class CollectorStats:
+    """收集端计数（多个处理线程共享，加锁更新）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.events = 0
+            self.requests = 0
+            self.bytes = 0
+            self.errors = 0
+            self.cpu_seconds = 0.0
+
+    def record(self, events: int, size: int, cpu: float, error: bool = False):
+        with self._lock:
+            self.events += events
+            self.requests += 1
+            self.bytes += size
+            self.cpu_seconds += cpu
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "events": self.events,
+                "requests": self.requests,
+                "bytes": self.bytes,
+                "errors": self.errors,
+                "cpu_seconds": round(self.cpu_seconds, 4),
+            }
+
+
+def _decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding:
+        return body
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+class StubCollector:
+    """
+    HTTP 桩收集端
+
+    delay 模拟网络往返时间（每个请求在响应前等待的秒数）
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.stats = CollectorStats()
+        self.schemas: Dict[str, Any] = {}
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes = b""):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path != "/api/health":
+                    self._reply(404)
+                    return
+                self._reply(200, json.dumps({
+                    "status": "ok",
+                    "compression": sorted(codec.local_encodings()),
+                    "features": ["dictionary", "epoch_ns", compact.FEATURE],
+                }).encode("utf-8"))
+
+            def do_POST(self):
+                started = time.thread_time()
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    payload = json.loads(_decompress(body, self.headers.get("Content-Encoding")))
+                    if self.path == "/api/schema":
+                        collector.schemas[self.headers.get(compact.SCHEMA_HEADER)] = payload
+                        self._reply(200)
+                        return
+                    content_type = self.headers.get("Content-Type")
+                    if content_type == compact.CONTENT_TYPE:
+                        if self.headers.get(compact.SCHEMA_HEADER) not in collector.schemas:
+                            raise ValueError("未发布的 v2 编码表")
+                        if isinstance(payload, dict):
+                            payload = compact.decode_event(payload)
+                        else:
+                            payload = compact.decode_events(payload)
+                    if self.path == "/api/events":
+                        count = 1
+                    elif self.path == "/api/events/batch":
+                        if content_type == dict_codec.CONTENT_TYPE:
+                            payload = dict_codec.decode_batch(payload)
+                        count = len(payload)
+                    else:
+                        self._reply(404)
+                        return
+                except ValueError:
+                    collector.stats.record(0, len(body), time.thread_time() - started, error=True)
+                    self._reply(400)
+                    return
+
+                collector.stats.record(count, len(body), time.thread_time() - started)
+                if collector.delay:
+                    time.sleep(collector.delay)
+                self._reply(200)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_port}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="stub-collector",
+            daemon=True
+        )
+
+    def start(self) -> "StubCollector":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TcpSink:
+    """TCP 帧接收端（在独立的事件循环线程中运行）"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.stats = CollectorStats()
+        self.receiver = FrameReceiver(self._handle)
+        self._writers: set = set()
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._serve, host, port)
+        )
+        self.url = f"tcp://{host}:{self._server.sockets[0].getsockname()[1]}"
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="stub-tcp-sink",
+            daemon=True
+        )
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            await self.receiver.handle_connection(reader, writer)
+        finally:
+            self._writers.discard(writer)
+
+    def _handle(self, events: List[Dict[str, Any]]):
+        # 帧解码在接收协程中完成，这里只计数（CPU 时间为近似值）
+        self.stats.record(len(events), 0, 0.0)
+
+    def start(self) -> "TcpSink":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+            # 关闭仍然打开的连接，接收协程读到 EOF 后正常退出
+            for writer in list(self._writers):
+                writer.close()
+            for _ in range(50):
+                if not self._writers:
+                    break
+                await asyncio.sleep(0.01)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class UdpSink:
+    """UDP 数据报接收端，只统计完整事件（count 为 1 的数据报或最后一个分片）"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.stats = CollectorStats()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.2)
+        self.url = f"udp://{host}:{self._sock.getsockname()[1]}"
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stub-udp-sink", daemon=True)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                packet = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            started = time.thread_time()
+            try:
+                _, _, _, _, index, count = datagram.HEADER.unpack_from(packet)
+            except Exception:
+                self.stats.record(0, len(packet), 0.0, error=True)
+                continue
+            complete = 1 if index == count - 1 else 0
+            self.stats.record(complete, len(packet), time.thread_time() - started)
+
+    def start(self) -> "UdpSink":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._sock.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口：启动 HTTP 桩收集端，退出时打印计数"""
+    parser = argparse.ArgumentParser(description="Agent Monitor 基准测试桩收集端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的响应延迟（秒）")
+    args = parser.parse_args(argv)
+
+    collector = StubCollector(args.host, args.port, delay=args.delay).start()
+    print(f"桩收集端已启动: {collector.url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(json.dumps(collector.stats.snapshot()))
+    except KeyboardInterrupt:
+        collector.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+传输器吞吐基准测试
+
+在当前进程中启动桩收集端（见 collector.py），用合成的 MonitorEvent 流驱动各个传输器，
+报告每个传输器的:
+- events_per_sec: 收集端实际收到的事件数 / 总耗时（含关闭时的 flush）
+- enqueue_latency_us: 调用方线程上 transport.send() 的耗时分布（p50 / p99 / max）
+- build_latency_us: 构造事件并转换为字典的耗时分布（--model record 为插件默认的
+  EventRecord，pydantic 为严格模式下的 MonitorEvent）
+- cpu_seconds: 进程 CPU 时间（用户态 + 内核态），已扣除桩收集端处理请求的 CPU 时间
+- rss_mb / peak_rss_mb: 常驻内存
+
+结果写入 JSON 文件，可用 --baseline 与之前的结果对比。
+
+使用:
+    python benchmarks/run.py --transports batching,tcp --events 50000 --rate 0 \\
+        --payload-bytes 256 --output results.json
+    python benchmarks/run.py --baseline results.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_monitor import __version__, create_transport
+from agent_monitor.protocol.record import EventEnvelope
+from agent_monitor.protocol.unified_event import EventMetadata, EventSource, Language, MonitorEvent
+from agent_monitor.transports.memory import get_channel
+from agent_monitor.utils.stats import Histogram
+
+from collector import StubCollector, TcpSink, UdpSink
+
+ALL_TRANSPORTS = ("direct", "batching", "pooled", "async", "tcp", "udp", "file", "memory")
+DEFAULT_TRANSPORTS = ("batching", "pooled", "tcp", "udp", "file", "memory")
+
+# 合成事件流中的事件类型（按顺序循环）
+EVENT_TYPES = (
+    "agent_thinking",
+    "tool_usage_started",
+    "tool_usage_finished",
+    "llm_call_start",
+    "llm_call_end",
+)
+
+
+def _rss_mb() -> float:
+    """当前常驻内存（MB），无法读取时返回 0"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 2)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    """进程生命周期内的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system
+
+
+BENCH_ENVELOPE = EventEnvelope(
+    server_id="bench-server",
+    framework="crewai",
+    language=Language.python,
+    process_id=os.getpid(),
+    hostname="bench-host",
+    ip_address="127.0.0.1",
+)
+
+
+def make_event(
+    index: int, agents: int, payload: str, model: str = "record", deferred: bool = False
+) -> Dict[str, Any]:
+    """构造一个合成事件（与插件相同的路径：EventRecord / MonitorEvent -> to_dict，deferred 见传输器的 deferred_timestamps）"""
+    agent_id = f"agent-{index % agents}"
+    event = {
+        "type": EVENT_TYPES[index % len(EVENT_TYPES)],
+        "data": {"seq": index, "text": payload},
+    }
+    if model == "record":
+        return BENCH_ENVELOPE.record(agent_id, event).to_dict(deferred)
+
+    return MonitorEvent(
+        source=EventSource(
+            server_id="bench-server",
+            agent_id=agent_id,
+            framework="crewai",
+            language=Language.python,
+            process_id=os.getpid(),
+        ),
+        event=event,
+        metadata=EventMetadata(
+            hostname="bench-host",
+            ip_address="127.0.0.1",
+        ),
+    ).to_dict()
+
+
+class Target:
+    """一个被测传输器及其接收端"""
+
+    def __init__(self, name: str, transport: Any, delivered: Callable[[], int],
+                 sink: Any = None, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.name = name
+        self.transport = transport
+        self.delivered = delivered
+        self.sink = sink
+        self.loop = loop
+
+    def close(self, timeout: float) -> int:
+        if self.loop is not None:
+            future = asyncio.run_coroutine_threadsafe(
+                self.transport.aclose(flush=True, timeout=timeout), self.loop
+            )
+            abandoned = future.result(timeout + 5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            return abandoned
+        return self.transport.close(flush=True, timeout=timeout)
+
+
+def build_target(name: str, args: argparse.Namespace, http: StubCollector, workdir: str) -> Target:
+    """创建传输器（通过 create_transport，与插件的配置方式一致）"""
+    options: Dict[str, Any] = {"silent_fail": True}
+    if args.dictionary:
+        options["dictionary"] = True
+    if args.compression:
+        options["compression"] = args.compression
+    if args.wire_version:
+        options["wire_version"] = args.wire_version
+    if args.window:
+        options["max_in_flight_batches"] = args.window
+
+    if name in ("direct", "batching", "pooled"):
+        transport = create_transport(http.url, transport_type=name, **options)
+        return Target(name, transport, lambda: http.stats.snapshot()["events"], http)
+
+    if name == "async":
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="bench-async-loop", daemon=True).start()
+        transport = create_transport(http.url, transport_type="async", **options)
+        asyncio.run_coroutine_threadsafe(transport.start(), loop).result(5)
+        return Target(name, transport, lambda: http.stats.snapshot()["events"], http, loop)
+
+    if name == "tcp":
+        sink = TcpSink().start()
+        transport = create_transport(sink.url, **options)
+        return Target(name, transport, lambda: sink.stats.snapshot()["events"], sink)
+
+    if name == "udp":
+        sink = UdpSink().start()
+        transport = create_transport(sink.url, **options)
+        return Target(name, transport, lambda: sink.stats.snapshot()["events"], sink)
+
+    if name == "file":
+        transport = create_transport(f"file://{os.path.join(workdir, 'events.jsonl')}", **options)
+        return Target(name, transport, lambda: transport.get_stats()["sent"])
+
+    if name == "memory":
+        channel = get_channel("bench", max_events=None)
+        channel.clear()
+        transport = create_transport("memory://bench", **options)
+        return Target(name, transport, lambda: len(channel))
+
+    raise ValueError(f"未知的传输器: {name}（可用: {', '.join(ALL_TRANSPORTS)}）")
+
+
+def drive(target: Target, args: argparse.Namespace) -> Dict[str, Histogram]:
+    """
+    在 args.threads 个调用方线程中发送事件，按 args.rate 限速（0 表示不限速）
+
+    Returns:
+        enqueue / build 耗时直方图（纳秒）
+    """
+    payload = "x" * args.payload_bytes
+    per_thread = args.events // args.threads
+    histograms = [{"enqueue": Histogram(), "build": Histogram()} for _ in range(args.threads)]
+    start_barrier = threading.Barrier(args.threads + 1)
+
+    def worker(offset: int, result: Dict[str, Histogram]):
+        send = target.transport.send
+        deferred = getattr(target.transport, "deferred_timestamps", False)
+        interval = args.threads / args.rate if args.rate else 0.0
+        start_barrier.wait()
+        started = time.perf_counter()
+        for i in range(per_thread):
+            if interval:
+                ahead = started + i * interval - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+            t0 = time.perf_counter_ns()
+            event = make_event(offset + i, args.agents, payload, args.model, deferred)
+            t1 = time.perf_counter_ns()
+            send(event)
+            result["enqueue"].record(time.perf_counter_ns() - t1)
+            result["build"].record(t1 - t0)
+
+    threads = [
+        threading.Thread(target=worker, args=(index * per_thread, histograms[index]), daemon=True)
+        for index in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    merged = {"enqueue": Histogram(), "build": Histogram()}
+    for result in histograms:
+        for key, histogram in result.items():
+            merged[key].merge(histogram)
+    return merged
+
+
+def run_one(name: str, args: argparse.Namespace, http: StubCollector) -> Dict[str, Any]:
+    """运行单个传输器的基准测试"""
+    workdir = tempfile.mkdtemp(prefix="agent-monitor-bench-")
+    http.stats.reset()
+    try:
+        target = build_target(name, args, http, workdir)
+        total = (args.events // args.threads) * args.threads
+
+        rss_before = _rss_mb()
+        cpu_before = _cpu_seconds()
+        sink_cpu_before = target.sink.stats.snapshot()["cpu_seconds"] if target.sink else 0.0
+        started = time.perf_counter()
+
+        histograms = drive(target, args)
+        enqueue_elapsed = time.perf_counter() - started
+        rss_loaded = _rss_mb()
+
+        transport_stats = target.transport.get_stats()
+        abandoned = target.close(args.drain_timeout)
+        # UDP / 异步接收端可能仍在处理最后的数据
+        settle_deadline = time.perf_counter() + 1.0
+        delivered = target.delivered()
+        while delivered < total and time.perf_counter() < settle_deadline:
+            time.sleep(0.02)
+            delivered = target.delivered()
+        elapsed = time.perf_counter() - started
+
+        sink_cpu = (target.sink.stats.snapshot()["cpu_seconds"] if target.sink else 0.0) - sink_cpu_before
+        cpu = max(_cpu_seconds() - cpu_before - sink_cpu, 0.0)
+        if target.sink is not None and target.sink is not http:
+            target.sink.stop()
+
+        return {
+            "transport": name,
+            "events": total,
+            "delivered": delivered,
+            "abandoned": abandoned,
+            "dropped": transport_stats.get("dropped", 0),
+            "elapsed_s": round(elapsed, 4),
+            "events_per_sec": round(delivered / elapsed, 1) if elapsed else 0.0,
+            "enqueue_per_sec": round(total / enqueue_elapsed, 1) if enqueue_elapsed else 0.0,
+            "enqueue_latency_us": histograms["enqueue"].summary(scale=1000),
+            "build_latency_us": histograms["build"].summary(scale=1000),
+            "cpu_seconds": round(cpu, 4),
+            "cpu_us_per_event": round(cpu / total * 1e6, 3) if total else 0.0,
+            "rss_mb": rss_loaded,
+            "rss_delta_mb": round(rss_loaded - rss_before, 2),
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]):
+    """打印与基线结果的对比"""
+    previous = {item["transport"]: item for item in baseline.get("results", [])}
+    print(f"\n{'transport':<10} {'events/s':>12} {'vs base':>8} {'p99 us':>10} {'vs base':>8} {'cpu us/ev':>10} {'vs base':>8}")
+    for item in results:
+        base = previous.get(item["transport"])
+
+        def ratio(value: float, key_value: Optional[float]) -> str:
+            if not key_value:
+                return "-"
+            return f"{value / key_value:.2f}x"
+
+        p99 = item["enqueue_latency_us"]["p99"]
+        print(
+            f"{item['transport']:<10} {item['events_per_sec']:>12.0f} "
+            f"{ratio(item['events_per_sec'], base and base['events_per_sec']):>8} "
+            f"{p99:>10.1f} {ratio(p99, base and base['enqueue_latency_us']['p99']):>8} "
+            f"{item['cpu_us_per_event']:>10.2f} "
+            f"{ratio(item['cpu_us_per_event'], base and base['cpu_us_per_event']):>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="Agent Monitor 传输器吞吐基准测试")
+    parser.add_argument(
+        "--transports", default=",".join(DEFAULT_TRANSPORTS),
+        help=f"逗号分隔的传输器列表，可用: {', '.join(ALL_TRANSPORTS)}"
+    )
+    parser.add_argument("--events", type=int, default=20000, help="每个传输器发送的事件数")
+    parser.add_argument("--rate", type=float, default=0, help="目标发送速率（事件/秒），0 表示不限速")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="每个事件 data.text 的字节数")
+    parser.add_argument("--agents", type=int, default=8, help="合成事件流中的 Agent 数")
+    parser.add_argument("--threads", type=int, default=1, help="调用 send() 的线程数")
+    parser.add_argument("--delay", type=float, default=0.0, help="HTTP 收集端每个请求的响应延迟（秒）")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="关闭传输器时等待 flush 的最长时间（秒）")
+    parser.add_argument(
+        "--model", choices=("record", "pydantic"), default="record",
+        help="事件构造方式：record 为 EventRecord（默认），pydantic 为 MonitorEvent（严格模式）"
+    )
+    parser.add_argument("--dictionary", action="store_true", help="启用字典编码")
+    parser.add_argument("--wire-version", choices=("1.0", "2.0"), default=None, help="线格式版本")
+    parser.add_argument("--compression", default=None, help="批量请求压缩编码 gzip / zstd / auto")
+    parser.add_argument("--window", type=int, default=None, help="max_in_flight_batches")
+    parser.add_argument("--output", default=None, help="结果 JSON 文件路径")
+    parser.add_argument("--baseline", default=None, help="对比的基线结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    if args.threads < 1 or args.events < args.threads:
+        parser.error("--events 必须不小于 --threads，且 --threads 至少为 1")
+
+    names = [name.strip() for name in args.transports.split(",") if name.strip()]
+    http = StubCollector(delay=args.delay).start()
+
+    results = []
+    try:
+        for name in names:
+            try:
+                result = run_one(name, args, http)
+            except ImportError as e:
+                print(f"跳过 {name}: {e}", file=sys.stderr)
+                continue
+            results.append(result)
+            latency = result["enqueue_latency_us"]
+            print(
+                f"{name:<10} {result['events_per_sec']:>10.0f} events/s  "
+                f"build p50={result['build_latency_us']['p50']:.1f}us  "
+                f"enqueue p50={latency['p50']:.1f}us p99={latency['p99']:.1f}us  "
+                f"cpu={result['cpu_us_per_event']:.1f}us/event  "
+                f"delivered={result['delivered']}/{result['events']}  rss={result['rss_mb']}MB"
+            )
+    finally:
+        http.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "agent_monitor_version": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
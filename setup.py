@@ -47,6 +47,18 @@ setup(
             "black>=23.0.0",
             "flake8>=6.0.0",
         ],
+        "async": [
+            "aiohttp>=3.8.0",
+        ],
+        "zstd": [
+            "zstandard>=0.19.0",
+        ],
+        "msgpack": [
+            "msgpack>=1.0.0",
+        ],
+        "orjson": [
+            "orjson>=3.6.0",
+        ],
         "crewai": [
             "crewai>=0.1.0",
         ],
@@ -57,6 +69,7 @@ setup(
     entry_points={
         "console_scripts": [
             "agent-monitor=agent_monitor.cli:main",
+            "agent-monitor-sidecar=agent_monitor.receivers.sidecar:main",
         ],
     },
 )
@@ -0,0 +1,165 @@
+"""AsyncTransport 的同步接口（health_check / close）与压缩协商"""
+
+import asyncio
+import gc
+import gzip
+import json
+import threading
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from agent_monitor.transports.async_transport import AsyncTransport  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body=b""):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(json.dumps({"status": "ok"}).encode("utf-8"))
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._reply()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_health_check_is_sync_from_other_threads(server):
+    # 尚未绑定事件循环：使用临时连接
+    assert AsyncTransport(server).health_check() is True
+    assert AsyncTransport("http://127.0.0.1:1").health_check() is False
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    transport = AsyncTransport(server)
+    try:
+        asyncio.run_coroutine_threadsafe(transport.start(), loop).result(5)
+        assert transport.health_check() is True
+        assert transport.close() == 0
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+def test_health_check_in_loop_requires_await(server):
+    transport = AsyncTransport(server)
+
+    async def main():
+        await transport.start()
+        with pytest.raises(RuntimeError):
+            transport.health_check()
+        assert await transport.ahealth_check() is True
+        await transport.aclose()
+
+    asyncio.run(main())
+
+
+def test_close_after_loop_stopped_releases_session(server):
+    transport = AsyncTransport(server)
+
+    async def main():
+        await transport.start()
+
+    asyncio.run(main())
+    session = transport._session
+
+    assert transport.close() == 0
+    assert session.closed
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        del session
+        gc.collect()
+    assert not [w for w in caught if "Unclosed client session" in str(w.message)]
+
+
+@pytest.fixture
+def collector():
+    """/api/health 声明支持 gzip 的接收端；lying=True 时实际拒绝压缩请求（415）"""
+    state = {"lying": False, "requests": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status=200, body=b""):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(body=json.dumps({"status": "ok", "compression": ["gzip"]}).encode("utf-8"))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            encoding = self.headers.get("Content-Encoding")
+            if encoding and state["lying"]:
+                self._reply(415)
+                return
+            if encoding == "gzip":
+                body = gzip.decompress(body)
+            state["requests"].append((encoding, json.loads(body)))
+            self._reply()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_port}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _events(count):
+    return [{"event": {"type": "agent_working", "data": {"i": i, "text": "x" * 100}}} for i in range(count)]
+
+
+def _send_batches(transport, *batches):
+    async def main():
+        await transport.start()
+        try:
+            return [await transport.send_batch(batch) for batch in batches]
+        finally:
+            await transport.aclose()
+
+    return asyncio.run(main())
+
+
+def test_negotiated_compression(collector):
+    transport = AsyncTransport(collector["url"], compression="gzip", compress_min_bytes=0)
+    assert _send_batches(transport, _events(3)) == [True]
+    assert collector["requests"] == [("gzip", _events(3))]
+    stats = transport.get_stats()
+    assert stats["bytes_sent"] < stats["bytes_raw"]
+
+
+def test_rejected_compression_resends_uncompressed(collector):
+    collector["lying"] = True
+    transport = AsyncTransport(collector["url"], compression="gzip", compress_min_bytes=0)
+    assert _send_batches(transport, _events(3), _events(2)) == [True, True]
+    # 被拒绝的批次不压缩重发，之后的批次不再压缩
+    assert collector["requests"] == [(None, _events(3)), (None, _events(2))]
+    assert transport.get_stats()["sent"] == 5
@@ -0,0 +1,141 @@
+"""BatchingTransport：按批量大小 / linger 发送、队列满时丢弃、关闭时发送剩余事件"""
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent_monitor.transports.batching import BatchingTransport, collect_batch
+
+
+@pytest.fixture
+def collector():
+    """记录每个批量请求的接收端；release 未设置时阻塞请求"""
+    state = {"batches": [], "release": threading.Event()}
+    state["release"].set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body=b""):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(json.dumps({"status": "ok"}).encode("utf-8"))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            state["release"].wait(10)
+            state["batches"].append([event["event"]["data"]["i"] for event in json.loads(body)])
+            self._reply()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_port}"
+    yield state
+    state["release"].set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _event(i, event_type="agent_working"):
+    return {"source": {"agent_id": "a"}, "event": {"type": event_type, "data": {"i": i}}}
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_flush_on_batch_size(collector):
+    """凑满 batch_size 后立即发送，不等待 linger"""
+    transport = BatchingTransport(collector["url"], batch_size=5, linger=30)
+    try:
+        for i in range(10):
+            transport.send(_event(i))
+        _wait_for(lambda: len(collector["batches"]) == 2)
+        assert collector["batches"] == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+        assert transport.get_stats()["batches"] == 2
+    finally:
+        transport.close()
+
+
+def test_flush_on_linger(collector):
+    """未凑满时 linger 到期后发送"""
+    transport = BatchingTransport(collector["url"], batch_size=100, linger=0.1)
+    try:
+        started = time.monotonic()
+        for i in range(3):
+            transport.send(_event(i))
+        _wait_for(lambda: collector["batches"])
+        assert time.monotonic() - started >= 0.1
+        assert collector["batches"] == [[0, 1, 2]]
+    finally:
+        transport.close()
+
+
+def test_full_queue_drops_events(collector):
+    """服务器阻塞时队列写满，按优先级丢弃最旧的事件并计数"""
+    collector["release"].clear()
+    transport = BatchingTransport(
+        collector["url"], batch_size=1, linger=0.01, timeout=5,
+        priority_limits={"high": 1, "normal": 2, "low": 1}
+    )
+    try:
+        transport.send(_event(0))
+        # 第一个事件已被后台线程取出，正阻塞在请求中
+        _wait_for(lambda: transport.get_stats()["queued"] == 0)
+        for i in range(1, 6):
+            assert transport.send(_event(i))
+
+        stats = transport.get_stats()
+        assert stats["dropped"] == 3
+        assert stats["dropped_normal"] == 3
+        assert stats["queued_normal"] == 2
+
+        collector["release"].set()
+        _wait_for(lambda: len(collector["batches"]) == 3)
+        # 保留的是最新的事件
+        assert collector["batches"] == [[0], [4], [5]]
+    finally:
+        collector["release"].set()
+        transport.close()
+
+
+def test_close_flushes_queued_events(collector):
+    """close() 不等待 linger，立即发送队列中剩余的事件"""
+    transport = BatchingTransport(collector["url"], batch_size=100, linger=30)
+    for i in range(7):
+        transport.send(_event(i))
+
+    started = time.monotonic()
+    assert transport.close(timeout=5) == 0
+    assert time.monotonic() - started < 2
+    assert collector["batches"] == [list(range(7))]
+    assert transport.get_stats()["sent"] == 7
+    assert not transport.send(_event(7))
+
+
+def test_collect_batch_returns_early_when_stopped():
+    """stop 被设置后队列一空就返回，不等满 linger"""
+    source = queue.Queue()
+    stop = threading.Event()
+    source.put(1)
+    source.put(2)
+    stop.set()
+
+    started = time.monotonic()
+    assert collect_batch(source, 10, 30, stop) == [1, 2]
+    assert collect_batch(source, 10, 30, stop) == []
+    assert time.monotonic() - started < 1
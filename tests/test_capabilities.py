@@ -0,0 +1,21 @@
+"""服务器能力协商"""
+
+import pytest
+
+from agent_monitor.protocol import compact, timestamps
+from agent_monitor.protocol import dictionary as dict_codec
+from agent_monitor.protocol.capabilities import server_supports
+
+
+@pytest.mark.parametrize("feature", [dict_codec.FEATURE, timestamps.FEATURE, compact.FEATURE])
+def test_features_list(feature):
+    assert server_supports({"features": [feature]}, feature)
+    assert server_supports({"features": feature}, feature)
+    assert server_supports({feature: True}, feature)
+    assert not server_supports({"features": ["other"]}, feature)
+    assert not server_supports({feature: "yes"}, feature)
+
+
+@pytest.mark.parametrize("body", [None, [], "dictionary", {}, {"features": None}])
+def test_malformed_bodies(body):
+    assert not server_supports(body, dict_codec.FEATURE)
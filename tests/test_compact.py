@@ -0,0 +1,70 @@
+"""紧凑线格式 v2 的编码 / 解码"""
+
+import json
+
+import pytest
+
+from agent_monitor.protocol import compact
+from agent_monitor.protocol.record import EventEnvelope, EventRecord
+
+NS = 1_792_209_051_205_731_000
+
+
+def _event(envelope=None, event=None):
+    envelope = envelope or EventEnvelope(
+        "server-1", "crewai", process_id=42, hostname="host-1", ip_address="10.0.0.5"
+    )
+    event = event or {"type": "agent_working", "data": {"text": "你好"}}
+    return EventRecord(envelope, "agent-1", event, NS).to_dict()
+
+
+def test_round_trip():
+    event = _event()
+    encoded = compact.encode_event(event)
+    assert encoded == {
+        "v": "2.0", "ts": NS, "sv": "server-1", "ag": "agent-1", "fw": 1, "lg": 1,
+        "et": 4, "d": {"text": "你好"}, "hn": "host-1", "pid": 42, "ip": "10.0.0.5",
+    }
+    # 经过 JSON 编码后仍然可以还原
+    assert compact.decode_events(json.loads(json.dumps(compact.encode_events([event])))) == [event]
+
+
+def test_optional_fields_are_omitted():
+    envelope = EventEnvelope("server-1", "crewai", hostname="host-1", tags={"env": "prod"})
+    event = _event(envelope, {"type": "agent_working", "data": {}, "trace_id": "t-1"})
+    encoded = compact.encode_event(event)
+    assert "pid" not in encoded and "ip" not in encoded
+    assert encoded["tg"] == {"env": "prod"}
+    assert encoded["x"] == {"trace_id": "t-1"}
+    assert compact.decode_event(encoded) == event
+
+    untagged = compact.encode_event(_event())
+    assert "tg" not in untagged
+    assert compact.decode_event(untagged)["metadata"]["tags"] == {}
+
+
+def test_unknown_values_are_sent_as_strings():
+    event = _event()
+    event["source"].update(framework="my-framework", language="kotlin")
+    event["event"] = {"type": "custom_event", "data": {}}
+    encoded = compact.encode_event(event)
+    assert (encoded["fw"], encoded["lg"], encoded["et"]) == ("my-framework", "kotlin", "custom_event")
+    assert compact.decode_event(encoded) == event
+
+
+def test_decode_errors():
+    encoded = compact.encode_event(_event())
+    with pytest.raises(compact.CompactError):
+        compact.decode_event(dict(encoded, v="1.0"))
+    with pytest.raises(compact.CompactError):
+        compact.decode_event(dict(encoded, et=9999))
+
+
+def test_schema_descriptor_covers_codes():
+    descriptor = compact.schema_descriptor()
+    assert descriptor["codes"]["event_type"] == {
+        str(code): name for name, code in compact.EVENT_TYPE_CODES.items()
+    }
+    assert descriptor["fields"] == compact.FIELDS
+    # 编码表不变时 schema ID 不变
+    assert compact._schema_id() == compact.SCHEMA_ID
@@ -0,0 +1,65 @@
+"""批量请求体压缩与编码协商"""
+
+import gzip
+
+import pytest
+
+from agent_monitor.utils import compression as codec
+
+ENCODINGS = ["gzip", pytest.param("zstd", marks=pytest.mark.skipif(
+    codec.zstandard is None, reason="zstandard 未安装"
+))]
+
+
+def test_parse_server_encodings():
+    headers = {"Accept-Encoding": "gzip;q=1.0, ZSTD , "}
+    assert codec.parse_server_encodings(headers, None) == {"gzip", "zstd"}
+    assert codec.parse_server_encodings({}, {"compression": "gzip"}) == {"gzip"}
+    assert codec.parse_server_encodings(None, {"accept_encoding": ["br"]}) == {"br"}
+    assert codec.parse_server_encodings({}, ["gzip"]) == frozenset()
+
+
+def test_negotiate(monkeypatch):
+    assert codec.negotiate(None, {"gzip"}) is None
+    assert codec.negotiate("gzip", {"gzip", "zstd"}) == "gzip"
+    assert codec.negotiate("gzip", {"zstd"}) is None
+    assert codec.negotiate("auto", {"br"}) is None
+    assert codec.negotiate("auto", {"gzip"}) == "gzip"
+
+    # auto 优先使用 zstd，本地没有 zstandard 时回退到 gzip
+    monkeypatch.setattr(codec, "zstandard", object())
+    assert codec.negotiate("auto", {"gzip", "zstd"}) == "zstd"
+    monkeypatch.setattr(codec, "zstandard", None)
+    assert codec.negotiate("auto", {"gzip", "zstd"}) == "gzip"
+    assert codec.negotiate("zstd", {"zstd"}) is None
+
+
+def _decompress(data, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    return codec.zstandard.ZstdDecompressor().decompress(data)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_compress_round_trip(encoding, tmp_path):
+    data = b'{"event":"agent_working"}' * 200
+    compressed = codec.compress(data, encoding)
+    assert len(compressed) < len(data)
+    assert _decompress(compressed, encoding) == data
+
+    src = tmp_path / "events.jsonl"
+    src.write_bytes(data)
+    dst = tmp_path / ("events.jsonl" + codec.FILE_SUFFIXES[encoding])
+    codec.compress_file(str(src), str(dst), encoding)
+    if encoding == "gzip":
+        assert gzip.decompress(dst.read_bytes()) == data
+    else:
+        with codec.zstandard.ZstdDecompressor().stream_reader(dst.open("rb")) as reader:
+            assert reader.read() == data
+
+
+def test_unknown_encoding(tmp_path):
+    with pytest.raises(ValueError):
+        codec.compress(b"data", "br")
+    with pytest.raises(ValueError):
+        codec.compress_file(str(tmp_path / "a"), str(tmp_path / "b"), "br")
@@ -0,0 +1,145 @@
+"""数据报切片 / 重组与数据报参考接收端"""
+
+import asyncio
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agent_monitor.protocol import datagram, framing
+from agent_monitor.receivers.datagram import DatagramReceiver
+from agent_monitor.transports.datagram import DatagramTransport
+
+CODEC = framing.CODEC_JSON
+
+
+def _event(i, size=0):
+    return {"source": {"agent_id": "a"}, "event": {"type": "llm_stream_chunk", "data": {"i": i, "pad": "x" * size}}}
+
+
+def _datagrams(event, msg_id=1, max_size=256, max_chunks=64):
+    return datagram.encode_datagrams(framing.encode_payload(event, CODEC), msg_id, CODEC, max_size, max_chunks)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(datagram, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_small_event_is_one_datagram():
+    """未超出大小的事件只有一个数据报，直接解码"""
+    packets = _datagrams(_event(0))
+    assert len(packets) == 1
+    assert datagram.Reassembler().feed(packets[0]) == _event(0)
+
+
+def test_oversize_event_is_split_and_reassembled():
+    """超出大小的事件被切片，每个数据报不超过上限，收齐后还原"""
+    event = _event(1, size=2000)
+    packets = _datagrams(event)
+    assert len(packets) > 1
+    assert all(len(packet) <= 256 for packet in packets)
+
+    reassembler = datagram.Reassembler()
+    assert [reassembler.feed(packet) for packet in packets[:-1]] == [None] * (len(packets) - 1)
+    assert reassembler.feed(packets[-1]) == event
+
+
+def test_out_of_order_fragments_are_reassembled():
+    """分片乱序到达、多条消息交错时仍能还原"""
+    first, second = _event(1, size=2000), _event(2, size=1500)
+    packets = _datagrams(first, msg_id=1) + _datagrams(second, msg_id=2)
+    random.Random(7).shuffle(packets)
+
+    reassembler = datagram.Reassembler()
+    completed = [event for event in map(reassembler.feed, packets) if event is not None]
+    assert sorted(completed, key=lambda event: event["event"]["data"]["i"]) == [first, second]
+
+
+def test_same_msg_id_from_different_senders():
+    """不同发送方的相同 msg_id 分别重组"""
+    first, second = _event(1, size=1000), _event(2, size=1000)
+    reassembler = datagram.Reassembler()
+    results = []
+    for a, b in zip(_datagrams(first), _datagrams(second)):
+        results.append(reassembler.feed(a, "sender-a"))
+        results.append(reassembler.feed(b, "sender-b"))
+    assert results[-2:] == [first, second]
+
+
+def test_lost_fragment_drops_event_after_ttl(clock):
+    """任一分片丢失时整条丢弃，超过 ttl 后释放并计数"""
+    reassembler = datagram.Reassembler(ttl=5.0)
+    packets = _datagrams(_event(1, size=2000))
+    for packet in packets[1:]:
+        assert reassembler.feed(packet) is None
+    assert reassembler.expired == 0
+
+    clock[0] += 6.0
+    # 下一条分片消息到达时清理过期的部分消息
+    later = _event(2, size=2000)
+    assert [reassembler.feed(packet) for packet in _datagrams(later, msg_id=2)][-1] == later
+    assert reassembler.expired == 1
+    # 过期后迟到的分片不会拼出残缺的事件
+    assert reassembler.feed(packets[0]) is None
+
+
+def test_too_many_chunks_returns_none():
+    """超出分片上限的事件不切片"""
+    assert _datagrams(_event(1, size=2000), max_chunks=2) is None
+
+
+def test_invalid_datagrams_are_rejected():
+    """无效的头部和分片序号被拒绝"""
+    reassembler = datagram.Reassembler()
+    with pytest.raises(framing.FrameError):
+        reassembler.feed(b"XX" + bytes(datagram.HEADER.size))
+    bad_index = datagram.HEADER.pack(datagram.MAGIC, datagram.VERSION, CODEC, 1, 3, 3) + b"{}"
+    with pytest.raises(framing.FrameError):
+        reassembler.feed(bad_index)
+
+
+class ReceiverThread:
+    """在后台事件循环中运行的 DatagramReceiver（UDP）"""
+
+    def __init__(self):
+        self.events = []
+        self.receiver = DatagramReceiver(self.events.extend)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self.transport = asyncio.run_coroutine_threadsafe(
+            self.receiver.serve_udp("127.0.0.1", 0), self.loop
+        ).result(5)
+        self.address = f"udp://127.0.0.1:{self.transport.get_extra_info('sockname')[1]}"
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.transport.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+        self.loop.close()
+
+
+def test_transport_to_reference_receiver():
+    """DatagramTransport 发出的普通事件和切片事件都被接收端还原"""
+    receiver = ReceiverThread()
+    transport = DatagramTransport(receiver.address, max_datagram_size=512)
+    try:
+        events = [_event(0), _event(1, size=3000), _event(2)]
+        for event in events:
+            assert transport.send(event)
+        assert transport.get_stats()["oversize"] == 1
+
+        deadline = time.monotonic() + 5
+        while len(receiver.events) < len(events) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert receiver.events == events
+        assert receiver.receiver.stats["events"] == 3
+        assert receiver.receiver.stats["datagrams"] == transport.get_stats()["datagrams"]
+    finally:
+        transport.close()
+        receiver.stop()
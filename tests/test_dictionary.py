@@ -0,0 +1,103 @@
+"""字典编码：句柄表与重连时的重置"""
+
+import socket
+import threading
+
+import pytest
+
+from agent_monitor.protocol import dictionary as dict_codec
+from agent_monitor.protocol import framing
+from agent_monitor.transports.tcp import TcpTransport
+
+
+def _event(agent_id, i=0, server_id="server-1"):
+    return {
+        "protocol": "agent-monitor",
+        "version": "1.0",
+        "timestamp": f"2026-10-17T03:50:51.{i:06d}Z",
+        "source": {"server_id": server_id, "agent_id": agent_id, "framework": "crewai"},
+        "event": {"type": "agent_working", "data": {"i": i}},
+        "metadata": {"hostname": "host-1", "tags": {}},
+    }
+
+
+def test_blocks_are_sent_once_per_encoder():
+    encoder = dict_codec.BlockEncoder()
+    decoder = dict_codec.BlockDecoder()
+    first = [_event("a", 0), _event("b", 1)]
+    payload = encoder.encode(first)
+    assert list(payload["blocks"]) == ["1"]
+    assert decoder.decode(payload) == first
+
+    second = [_event("a", 2)]
+    payload = encoder.encode(second)
+    assert payload["blocks"] == {}
+    assert decoder.decode(payload) == second
+
+    # 新连接的解码器没有句柄表：编码器 reset() 后重新发送块
+    with pytest.raises(dict_codec.DictionaryError):
+        dict_codec.BlockDecoder().decode(payload)
+    encoder.reset()
+    payload = encoder.encode(second)
+    assert list(payload["blocks"]) == ["1"]
+    assert dict_codec.BlockDecoder().decode(payload) == second
+
+
+def test_full_table_resets_both_sides():
+    encoder = dict_codec.BlockEncoder(max_blocks=2)
+    decoder = dict_codec.BlockDecoder()
+    for server_id in ("s1", "s2"):
+        decoder.decode(encoder.encode([_event("a", server_id=server_id)]))
+
+    payload = encoder.encode([_event("a", server_id="s3")])
+    assert payload["reset"] is True
+    assert list(payload["blocks"]) == ["1"]
+    assert decoder.decode(payload) == [_event("a", server_id="s3")]
+
+
+@pytest.fixture
+def receiver():
+    """每个连接确认一个字典编码批次后断开的接收端"""
+    listener = socket.create_server(("127.0.0.1", 0))
+    listener.settimeout(0.05)
+    stopped = threading.Event()
+    received = []
+
+    def serve():
+        while not stopped.is_set():
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(5)
+            with conn:
+                decoder = dict_codec.BlockDecoder()
+                try:
+                    frame_type, codec, seq, payload = framing.recv_frame(conn)
+                except OSError:
+                    continue
+                assert frame_type == framing.FRAME_DICT_BATCH
+                received.append(decoder.decode(framing.decode_payload(payload, codec)))
+                conn.sendall(framing.encode_ack(seq))
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield f"tcp://127.0.0.1:{listener.getsockname()[1]}", received
+    stopped.set()
+    thread.join(5)
+    listener.close()
+
+
+def test_reconnect_resets_encoder(receiver):
+    address, received = receiver
+    transport = TcpTransport(address, dictionary=True, backoff_initial=0.01)
+    try:
+        assert transport.send_batch([_event("a", 0)])
+        # 接收端已断开：本批次失败，连接关闭
+        assert not transport.send_batch([_event("a", 1)])
+        # 新连接上重新发送块，接收端可以解码
+        assert transport.send_batch([_event("a", 2)])
+        assert received == [[_event("a", 0)], [_event("a", 2)]]
+        assert transport.get_stats()["reconnects"] == 1
+    finally:
+        transport.close(flush=False)
@@ -0,0 +1,123 @@
+"""一致性哈希分发：路由稳定性、节点摘除与重新加入"""
+
+import pytest
+
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.fanout import FanoutTransport, HashRing
+
+URLS = ["http://collector-a", "http://collector-b", "http://collector-c"]
+AGENTS = [f"agent-{i}" for i in range(300)]
+
+
+class RecordingNode(BaseTransport):
+    """记录收到的事件、健康状态可切换的子传输器"""
+
+    def __init__(self, url):
+        self.url = url
+        self.events = []
+        self.healthy = True
+
+    def send(self, event):
+        self.events.append(event)
+        return True
+
+    def send_batch(self, events):
+        self.events.extend(events)
+        return True
+
+    def health_check(self):
+        return self.healthy
+
+
+def _event(agent_id, i=0):
+    return {"source": {"agent_id": agent_id}, "event": {"type": "agent_working", "data": {"i": i}}}
+
+
+@pytest.fixture
+def fanout():
+    # 健康检查间隔足够长，只通过 check_nodes() 手动检查
+    fanout = FanoutTransport(URLS, transport_factory=RecordingNode, health_interval=60)
+    yield fanout
+    fanout.close()
+
+
+def _routes(fanout):
+    return {agent_id: fanout.node_for(_event(agent_id)).url for agent_id in AGENTS}
+
+
+def test_ring_moves_only_keys_of_removed_node():
+    """移除节点时只有该节点上的 key 迁移，重新加入后恢复原路由"""
+    ring = HashRing(URLS)
+    before = {agent_id: ring.get(agent_id) for agent_id in AGENTS}
+    assert set(before.values()) == set(URLS)
+
+    ring.rebuild(URLS[:2])
+    after = {agent_id: ring.get(agent_id) for agent_id in AGENTS}
+    for agent_id in AGENTS:
+        if before[agent_id] != URLS[2]:
+            assert after[agent_id] == before[agent_id]
+        else:
+            assert after[agent_id] in URLS[:2]
+
+    ring.rebuild(URLS)
+    assert {agent_id: ring.get(agent_id) for agent_id in AGENTS} == before
+    assert HashRing().get("agent-1") is None
+
+
+def test_same_agent_always_routes_to_same_node(fanout):
+    """同一 Agent 的事件总是进入同一个收集端，并保持顺序"""
+    routes = _routes(fanout)
+    for i in range(5):
+        for agent_id in AGENTS[:20]:
+            fanout.send(_event(agent_id, i))
+    fanout.send_batch([_event(agent_id, 5) for agent_id in AGENTS[:20]])
+
+    for node in fanout.nodes.values():
+        for event in node.events:
+            assert routes[event["source"]["agent_id"]] == node.url
+        for agent_id in AGENTS[:20]:
+            sequence = [e["event"]["data"]["i"] for e in node.events if e["source"]["agent_id"] == agent_id]
+            assert sequence in ([], list(range(6)))
+    assert fanout.get_stats()["routed"] == 120
+
+
+def test_failed_node_is_ejected_and_its_keys_move(fanout):
+    """健康检查失败的节点从哈希环摘除，只有它的 Agent 迁移到其他节点"""
+    before = _routes(fanout)
+    failed = fanout.nodes[URLS[1]]
+    failed.healthy = False
+
+    assert fanout.check_nodes() == {URLS[0]: True, URLS[1]: False, URLS[2]: True}
+    after = _routes(fanout)
+    assert URLS[1] not in after.values()
+    for agent_id in AGENTS:
+        if before[agent_id] != URLS[1]:
+            assert after[agent_id] == before[agent_id]
+
+    stats = fanout.get_stats()
+    assert stats["ejections"] == 1
+    assert stats["healthy_nodes"] == 2
+    assert not stats["nodes"][URLS[1]]["healthy"]
+
+
+def test_recovered_node_rejoins(fanout):
+    """恢复的节点重新加入哈希环，原来的 Agent 迁回"""
+    before = _routes(fanout)
+    fanout.nodes[URLS[1]].healthy = False
+    fanout.check_nodes()
+
+    fanout.nodes[URLS[1]].healthy = True
+    fanout.check_nodes()
+    assert _routes(fanout) == before
+    stats = fanout.get_stats()
+    assert stats["rejoins"] == 1
+    assert stats["healthy_nodes"] == 3
+
+
+def test_all_nodes_unhealthy_uses_full_ring(fanout):
+    """所有节点都不健康时按完整哈希环路由"""
+    before = _routes(fanout)
+    for node in fanout.nodes.values():
+        node.healthy = False
+    assert not fanout.health_check()
+    assert _routes(fanout) == before
@@ -0,0 +1,111 @@
+"""JSONL 文件传输器的顺序 / 轮转 / 压缩 / 关闭落盘"""
+
+import glob
+import gzip
+import json
+import os
+
+from agent_monitor.transports.file import FileTransport
+
+
+def _event(i, event_type="agent_working"):
+    return {
+        "timestamp": "2026-01-01T00:00:00.000000Z",
+        "source": {"agent_id": "a"},
+        "event": {"type": event_type, "data": {"i": i, "pad": "x" * 64}},
+    }
+
+
+def _read_lines(data):
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def _segments(path):
+    base, _ = os.path.splitext(path)
+    return sorted(glob.glob(base + ".*.jsonl*"))
+
+
+def test_events_are_written_in_arrival_order(tmp_path):
+    """不同优先级的事件按到达顺序写入"""
+    path = str(tmp_path / "events.jsonl")
+    transport = FileTransport(path, linger=0.01)
+    types = ["agent_online", "agent_thinking", "tool_usage_started", "agent_offline"] * 25
+    for i, event_type in enumerate(types):
+        assert transport.send(_event(i, event_type))
+    assert transport.close() == 0
+
+    with open(path, "rb") as f:
+        written = _read_lines(f.read())
+    assert [event["event"]["data"]["i"] for event in written] == list(range(len(types)))
+    assert [event["event"]["type"] for event in written] == types
+
+
+def test_full_queue_drops_new_events(tmp_path):
+    """队列满时丢弃新事件并计数"""
+    transport = FileTransport(str(tmp_path / "events.jsonl"), max_queue_size=2)
+    # 阻塞后台线程，使事件留在队列中
+    transport._io_lock.acquire()
+    try:
+        transport._queue.put_nowait(_event(0))
+        transport._queue.put_nowait(_event(1))
+        assert not transport.send(_event(2))
+        assert transport.get_stats()["dropped"] == 1
+    finally:
+        transport._io_lock.release()
+    transport.close()
+
+
+def test_close_flushes_queued_events(tmp_path):
+    """close() 写入队列中剩余的事件并落盘"""
+    path = str(tmp_path / "events.jsonl")
+    # linger 和 fsync 间隔都很长，只有 close() 会触发写入
+    transport = FileTransport(path, batch_size=1000, linger=60, fsync_interval=60)
+    for i in range(10):
+        transport.send(_event(i))
+
+    assert transport.close(timeout=5) == 0
+    with open(path, "rb") as f:
+        assert [event["event"]["data"]["i"] for event in _read_lines(f.read())] == list(range(10))
+    stats = transport.get_stats()
+    assert stats["sent"] == 10
+    assert stats["fsyncs"] >= 1
+    assert not transport.send(_event(10))
+
+
+def test_rotation_by_size(tmp_path):
+    """超过大小上限后轮转，分段加当前文件包含全部事件且顺序不变"""
+    path = str(tmp_path / "events.jsonl")
+    transport = FileTransport(path, max_bytes=1024)
+    for i in range(100):
+        assert transport.send_batch([_event(i)])
+    transport.close()
+
+    segments = _segments(path)
+    assert len(segments) == transport.get_stats()["rotations"] > 1
+
+    written = []
+    for segment in segments + [path]:
+        with open(segment, "rb") as f:
+            written.extend(_read_lines(f.read()))
+    assert [event["event"]["data"]["i"] for event in written] == list(range(100))
+
+
+def test_rotated_segments_are_compressed(tmp_path):
+    """已轮转的分段被压缩，原文件被删除"""
+    path = str(tmp_path / "events.jsonl")
+    transport = FileTransport(path, max_bytes=1024, compression="gzip")
+    for i in range(100):
+        transport.send_batch([_event(i)])
+    transport.close()
+
+    segments = _segments(path)
+    assert segments
+    assert all(segment.endswith(".jsonl.gz") for segment in segments)
+
+    written = []
+    for segment in segments:
+        with gzip.open(segment, "rb") as f:
+            written.extend(_read_lines(f.read()))
+    with open(path, "rb") as f:
+        written.extend(_read_lines(f.read()))
+    assert [event["event"]["data"]["i"] for event in written] == list(range(100))
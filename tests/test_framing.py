@@ -0,0 +1,87 @@
+"""二进制帧协议的编码 / 解码"""
+
+import socket
+
+import pytest
+
+from agent_monitor.protocol import framing
+
+EVENTS = [
+    {"timestamp": "2026-10-17T03:50:51.205731Z", "event": {"type": "agent_working", "data": {"text": "你好"}}},
+    {"timestamp": "2026-10-17T03:50:51.205732Z", "event": {"type": "agent_thinking", "data": {}}},
+]
+
+CODECS = [framing.CODEC_JSON, pytest.param(framing.CODEC_MSGPACK, marks=pytest.mark.skipif(
+    framing.msgpack is None, reason="msgpack 未安装"
+))]
+
+
+def _parse(frame):
+    length, frame_type, codec, seq = framing.decode_header(frame[:framing.HEADER.size])
+    payload = frame[framing.HEADER.size:]
+    assert len(payload) == length
+    return frame_type, codec, seq, payload
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_batch_round_trip(codec):
+    frame_type, frame_codec, seq, payload = _parse(framing.encode_batch(EVENTS, 7, codec))
+    assert (frame_type, frame_codec, seq) == (framing.FRAME_BATCH, codec, 7)
+    assert framing.decode_payload(payload, frame_codec) == EVENTS
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_dict_and_v2_batch_round_trip(codec):
+    payload = {"blocks": {"1": {"protocol": "agent-monitor"}}, "events": [{"h": 1, "agent_id": "a"}]}
+    frame_type, _, seq, body = _parse(framing.encode_dict_batch(payload, 8, codec))
+    assert (frame_type, seq) == (framing.FRAME_DICT_BATCH, 8)
+    assert framing.decode_payload(body, codec) == payload
+
+    compact = [{"v": "2.0", "ts": 1_792_209_051_205_731_018, "et": 4, "d": {"text": "你好"}}]
+    frame_type, _, seq, body = _parse(framing.encode_v2_batch(compact, 9, codec))
+    assert (frame_type, seq) == (framing.FRAME_V2_BATCH, 9)
+    assert framing.decode_payload(body, codec) == compact
+
+
+def test_ack_has_empty_payload():
+    frame = framing.encode_ack(0xFFFFFFFF)
+    assert len(frame) == framing.HEADER.size
+    assert _parse(frame) == (framing.FRAME_ACK, framing.CODEC_JSON, 0xFFFFFFFF, b"")
+
+
+def test_oversized_frames(monkeypatch):
+    monkeypatch.setattr(framing, "MAX_PAYLOAD", 16)
+    with pytest.raises(framing.FrameError):
+        framing.encode_frame(framing.FRAME_BATCH, framing.CODEC_JSON, 1, b"x" * 17)
+    with pytest.raises(framing.FrameError):
+        framing.decode_header(framing.HEADER.pack(17, framing.FRAME_BATCH, framing.CODEC_JSON, 1))
+
+
+def test_unknown_codec():
+    with pytest.raises(framing.FrameError):
+        framing.encode_payload(EVENTS, 9)
+    with pytest.raises(framing.FrameError):
+        framing.decode_payload(b"[]", 9)
+
+
+def test_recv_frame_from_partial_reads():
+    sender, receiver = socket.socketpair()
+    try:
+        stream = framing.encode_batch(EVENTS, 1, framing.CODEC_JSON) + framing.encode_ack(1)
+        # 逐字节发送，接收方需要拼接不完整的读取
+        for i in range(len(stream)):
+            sender.sendall(stream[i:i + 1])
+
+        frame_type, codec, seq, payload = framing.recv_frame(receiver)
+        assert (frame_type, seq) == (framing.FRAME_BATCH, 1)
+        assert framing.decode_payload(payload, codec) == EVENTS
+        assert framing.recv_frame(receiver) == (framing.FRAME_ACK, framing.CODEC_JSON, 1, b"")
+
+        # 帧只发送了一半时连接关闭
+        sender.sendall(framing.encode_ack(2)[:5])
+        sender.close()
+        with pytest.raises(ConnectionError):
+            framing.recv_frame(receiver)
+    finally:
+        sender.close()
+        receiver.close()
@@ -0,0 +1,67 @@
+"""进程身份缓存"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from agent_monitor.utils import identity as identity_module
+from agent_monitor.utils.identity import ProcessIdentity
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # 只替换 identity 模块中的 time，不影响其他线程
+    monkeypatch.setattr(identity_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_cached_until_refresh(clock, monkeypatch):
+    cache = ProcessIdentity(refresh_interval=300, check_interval=10)
+    first = cache.get()
+    assert first.process_id == os.getpid()
+    assert cache.get() is first
+
+    # 接口未变化：检查后仍返回同一个对象
+    clock[0] += 10
+    assert cache.get() is first
+    assert cache.refreshes == 1
+
+    # 接口变化：立即重新解析
+    monkeypatch.setattr(identity_module, "_interfaces", lambda: ("lo", "tun0"))
+    clock[0] += 10
+    cache.get()
+    assert cache.refreshes == 2
+
+    clock[0] += 300
+    cache.get()
+    assert cache.refreshes == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+def test_fork_resets_identity():
+    cache = ProcessIdentity()
+    parent = cache.get()
+    # 模拟 fork 时其他线程正持有锁
+    cache._lock.acquire()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            child = cache.get()
+            ok = child.process_id == os.getpid() and child is not parent
+            os.write(write_fd, b"ok" if ok else b"stale")
+        finally:
+            os._exit(0)
+
+    cache._lock.release()
+    os.close(write_fd)
+    try:
+        result = os.read(read_fd, 16)
+    finally:
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+    assert result == b"ok"
+    assert cache.get() is parent
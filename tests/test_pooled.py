@@ -0,0 +1,122 @@
+"""PooledTransport：在途窗口、每个发送线程的统计、关闭超时时写入暂存"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent_monitor.transports.pooled import PooledTransport
+from agent_monitor.transports.spool import EventSpool
+
+
+@pytest.fixture
+def collector():
+    """记录每个事件的接收端；release 未设置时阻塞请求"""
+    state = {"events": [], "release": threading.Event()}
+    state["release"].set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body=b""):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(json.dumps({"status": "ok"}).encode("utf-8"))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            state["release"].wait(10)
+            state["events"].append(json.loads(body)["event"]["data"]["i"])
+            self._reply()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_port}"
+    yield state
+    state["release"].set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _event(i):
+    return {"source": {"agent_id": "a"}, "event": {"type": "agent_working", "data": {"i": i}}}
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_full_window_drops_new_events(collector):
+    """在途窗口已满时丢弃新事件并计数，发送完成后窗口释放"""
+    collector["release"].clear()
+    transport = PooledTransport(collector["url"], timeout=5, workers=1, max_in_flight=3)
+    try:
+        assert [transport.send(_event(i)) for i in range(5)] == [True, True, True, False, False]
+        stats = transport.get_stats()
+        assert stats["dropped"] == 2
+        assert stats["in_flight"] == 3
+
+        collector["release"].set()
+        _wait_for(lambda: transport.get_stats()["in_flight"] == 0)
+        assert sorted(collector["events"]) == [0, 1, 2]
+        assert transport.send(_event(5))
+    finally:
+        collector["release"].set()
+        transport.close()
+
+
+def test_per_worker_stats(collector):
+    """每个发送线程分别统计发送数和忙碌时间，合计等于总发送数"""
+    transport = PooledTransport(collector["url"], workers=3)
+    try:
+        for i in range(30):
+            transport.send(_event(i))
+        _wait_for(lambda: transport.get_stats()["in_flight"] == 0)
+
+        workers = transport.get_stats()["workers"]
+        assert [worker["worker"] for worker in workers] == [0, 1, 2]
+        assert sum(worker["sent"] for worker in workers) == 30
+        assert all(worker["failed"] == 0 for worker in workers)
+        assert all(0 <= worker["utilisation"] <= 1 for worker in workers)
+        assert sum(worker["busy_seconds"] for worker in workers) > 0
+        assert sorted(collector["events"]) == list(range(30))
+    finally:
+        transport.close()
+
+
+def test_close_timeout_spools_queued_events(collector, tmp_path):
+    """关闭超时时队列中尚未发送的事件写入暂存，只有发送中的事件被放弃"""
+    collector["release"].clear()
+    transport = PooledTransport(collector["url"], timeout=5, workers=1, spool_dir=str(tmp_path))
+    for i in range(5):
+        transport.send(_event(i))
+    # 第一个事件正在发送中（服务器阻塞），其余 4 个在队列中
+    _wait_for(lambda: transport._queue.qsize() == 4)
+
+    assert transport.close(timeout=0.3) == 1
+    collector["release"].set()
+
+    spool = EventSpool(str(tmp_path), flush_interval=60)
+    try:
+        spooled = []
+        while True:
+            segment = spool.read_oldest()
+            if segment is None:
+                break
+            spooled.extend(segment[1])
+            spool.commit(segment[0])
+    finally:
+        spool.close()
+    assert [event["event"]["data"]["i"] for event in spooled] == [1, 2, 3, 4]
@@ -0,0 +1,53 @@
+"""分级有界事件队列"""
+
+import queue
+
+import pytest
+
+from agent_monitor.transports.priority import PriorityEventQueue, default_limits
+
+
+def _event(agent_id, event_type):
+    return {"source": {"agent_id": agent_id}, "event": {"type": event_type, "data": {}}}
+
+
+def _drain(events_queue):
+    events = []
+    while not events_queue.empty():
+        events.append(events_queue.get_nowait())
+    return events
+
+
+def test_per_agent_order_is_preserved():
+    events_queue = PriorityEventQueue(default_limits(100))
+    sequence = ["agent_online", "agent_thinking", "tool_usage_started", "agent_offline"]
+    for event_type in sequence:
+        events_queue.put(_event("a", event_type))
+        events_queue.put(_event("b", event_type))
+
+    drained = _drain(events_queue)
+    for agent_id in ("a", "b"):
+        assert [
+            event["event"]["type"] for event in drained if event["source"]["agent_id"] == agent_id
+        ] == sequence
+
+
+def test_full_level_sheds_its_oldest_event():
+    events_queue = PriorityEventQueue({"high": 1, "normal": 2, "low": 1})
+    events_queue.put(_event("a", "agent_thinking"))
+    events_queue.put(_event("a", "agent_online"))
+    assert events_queue.put(_event("a", "llm_stream_chunk")) == "low"
+    assert events_queue.put(_event("a", "tool_usage_started")) is None
+
+    assert [event["event"]["type"] for event in _drain(events_queue)] == [
+        "agent_online", "llm_stream_chunk", "tool_usage_started",
+    ]
+    assert events_queue.dropped == {"high": 0, "normal": 0, "low": 1}
+
+
+def test_get_times_out_when_empty():
+    events_queue = PriorityEventQueue(default_limits(10))
+    with pytest.raises(queue.Empty):
+        events_queue.get(timeout=0.01)
+    with pytest.raises(queue.Empty):
+        events_queue.get_nowait()
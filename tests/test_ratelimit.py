@@ -0,0 +1,89 @@
+"""令牌桶限流"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from agent_monitor.plugins.crewai_plugin import CrewAIPlugin
+from agent_monitor.transports.memory import MemoryTransport
+from agent_monitor.utils import ratelimit
+from agent_monitor.utils.ratelimit import RateLimiter, TokenBucket, parse_rate_limits
+
+
+def test_bucket_refill():
+    bucket = TokenBucket(rate=2.0, burst=3.0, now=0.0)
+    assert [bucket.take(0.0) for _ in range(4)] == [True, True, True, False]
+
+    # 0.5 秒补充 1 个令牌
+    assert bucket.take(0.5)
+    assert not bucket.take(0.5)
+
+    # 长时间空闲后最多积累 burst 个
+    assert [bucket.take(100.0) for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_partial_tokens_accumulate():
+    bucket = TokenBucket(rate=1.0, burst=1.0, now=0.0)
+    assert bucket.take(0.0)
+    assert not bucket.take(0.4)
+    assert not bucket.take(0.8)
+    assert bucket.take(1.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # 只替换 ratelimit 模块中的 time，不影响其他线程
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_limiter_refills_per_key(clock):
+    limiter = RateLimiter(rate=1.0, burst=2.0, exempt=("agent_error",))
+    assert [limiter.allow("a", "tool_usage_started") for _ in range(3)] == [True, True, False]
+    # 其他 Agent、其他事件类型和豁免的类型各自独立
+    assert limiter.allow("b", "tool_usage_started")
+    assert limiter.allow("a", "agent_working")
+    assert all(limiter.allow("a", "agent_error") for _ in range(10))
+
+    clock[0] += 1.0
+    assert limiter.allow("a", "tool_usage_started")
+    assert not limiter.allow("a", "tool_usage_started")
+    assert limiter.drain_suppressed() == {("a", "tool_usage_started"): 2}
+    assert limiter.drain_suppressed() == {}
+
+
+def test_limiter_overrides(clock):
+    limiter = RateLimiter.from_spec("1:1,tool_usage_started=0:2,agent_thinking=off")
+    assert [limiter.allow("a", "tool_usage_started") for _ in range(3)] == [True, True, False]
+    # 速率为 0：不再补充
+    clock[0] += 60
+    assert not limiter.allow("a", "tool_usage_started")
+    assert all(limiter.allow("a", "agent_thinking") for _ in range(10))
+
+
+
+@pytest.mark.parametrize("rate_limit", ["0:1", RateLimiter(rate=0.0, burst=1.0)], ids=["spec", "instance"])
+def test_plugin_never_throttles_lifecycle_events(rate_limit, clock, monkeypatch):
+    """配置字符串和 RateLimiter 实例都豁免生命周期事件"""
+    monkeypatch.delenv("AGENT_MONITOR_STRICT", raising=False)
+    transport = MemoryTransport("memory://ratelimit-lifecycle")
+    transport.events.clear()
+    plugin = CrewAIPlugin(transport=transport, rate_limit=rate_limit)
+    try:
+        sent = [
+            plugin._send(plugin._build_event("agent-1", {"type": event_type, "data": {}}))
+            for event_type in ["agent_working", "agent_working", "agent_error", "agent_error"]
+        ]
+    finally:
+        plugin.shutdown()
+    assert sent == [True, False, True, True]
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("20:100, tool_usage_started=5 ,agent_thinking=off") == (
+        (20.0, 100.0), {"tool_usage_started": (5.0, 5.0), "agent_thinking": (None, 0.0)}
+    )
+    assert parse_rate_limits("") == (None, {})
+    with pytest.raises(ValueError):
+        parse_rate_limits("-1")
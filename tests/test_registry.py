@@ -0,0 +1,109 @@
+"""传输器注册表：按 scheme 选择传输器和选项传递"""
+
+import pytest
+
+from agent_monitor.transports import registry
+from agent_monitor.transports.base import BaseTransport
+from agent_monitor.transports.fanout import FanoutTransport
+from agent_monitor.transports.file import FileTransport
+from agent_monitor.transports.memory import MemoryTransport
+from agent_monitor.transports.pooled import PooledTransport
+from agent_monitor.transports.registry import create_transport, register_transport
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in (
+        "AGENT_MONITOR_URL", "AGENT_MONITOR_TRANSPORT", "AGENT_MONITOR_SPOOL_DIR",
+        "AGENT_MONITOR_COMPRESSION", "AGENT_MONITOR_DICTIONARY", "AGENT_MONITOR_EPOCH_NS",
+        "AGENT_MONITOR_WIRE_VERSION",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+
+class PlainTransport(BaseTransport):
+    """只接受 url 的第三方传输器类"""
+
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, event):
+        return True
+
+
+@pytest.fixture
+def plain_http():
+    original = registry._registry["http"]
+    register_transport("http", PlainTransport, replace=True)
+    yield
+    register_transport("http", original, replace=True)
+
+
+def test_plain_class_receives_only_set_options(plain_http):
+    transport = create_transport("http://a")
+    assert isinstance(transport, PlainTransport)
+
+    fanout = create_transport("http://a,http://b")
+    try:
+        assert isinstance(fanout, FanoutTransport)
+        assert sorted(node.url for node in fanout.nodes.values()) == ["http://a", "http://b"]
+    finally:
+        fanout.close(flush=False)
+
+
+def test_fanout_nodes_get_separate_spool_dirs(tmp_path):
+    fanout = create_transport("http://127.0.0.1:1,http://127.0.0.1:2", spool_dir=str(tmp_path))
+    try:
+        spools = sorted(node.spool.directory for node in fanout.nodes.values())
+        assert spools == [str(tmp_path / "0"), str(tmp_path / "1")]
+    finally:
+        fanout.close(flush=False)
+
+
+def test_pooled_receives_http_options(monkeypatch):
+    monkeypatch.setenv("AGENT_MONITOR_COMPRESSION", "gzip")
+    monkeypatch.setenv("AGENT_MONITOR_WIRE_VERSION", "2.0")
+    transport = create_transport(
+        "http://monitor", transport_type="pooled", dictionary=True, epoch_ns=True
+    )
+    try:
+        assert isinstance(transport, PooledTransport)
+        assert transport.compression == "gzip"
+        assert transport.dictionary is True
+        assert transport.epoch_ns is True
+        assert transport.wire_version == "2.0"
+    finally:
+        transport.close(flush=False)
+
+
+@pytest.mark.parametrize("url, channel", [
+    ("memory://", "default"), ("memory:///", "default"), ("memory://test/", "test"),
+])
+def test_memory_urls(url, channel):
+    transport = create_transport(url)
+    try:
+        assert isinstance(transport, MemoryTransport)
+        assert transport.name == channel
+    finally:
+        transport.close()
+
+
+def test_file_url(tmp_path):
+    path = tmp_path / "events.jsonl"
+    transport = create_transport(f"file://{path}")
+    try:
+        assert isinstance(transport, FileTransport)
+        assert transport.send({"event": {"type": "agent_working", "data": {}}})
+    finally:
+        transport.close()
+    assert path.read_text().count("\n") == 1
+
+
+def test_http_url_trailing_slash(plain_http):
+    assert create_transport(" http://a/ ").url == "http://a"
+    assert create_transport("a:8080/").url == "a:8080"
+
+
+def test_unknown_scheme():
+    with pytest.raises(ValueError):
+        create_transport("nope://somewhere")
@@ -0,0 +1,139 @@
+"""熔断器状态机与 DirectTransport / PooledTransport 的熔断恢复"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.pooled import PooledTransport
+from agent_monitor.transports.resilience import CircuitBreaker, decorrelated_jitter
+
+
+class FakeSession:
+    """替代 requests.Session：up 为 False 时连接失败，否则返回 status"""
+
+    def __init__(self):
+        self.up = True
+        self.status = 200
+        self.posts = 0
+
+    def post(self, url, data=None, **kwargs):
+        self.posts += 1
+        if not self.up:
+            raise requests.exceptions.ConnectionError("down")
+        return SimpleNamespace(status_code=self.status, text="", request=SimpleNamespace(body=data))
+
+    def get(self, url, **kwargs):
+        return self.post(url)
+
+    def close(self):
+        pass
+
+
+def test_breaker_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    # 冷却结束：只放行一个试探请求
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # 试探失败重新熔断
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+    stats = breaker.get_stats()
+    assert stats["opens"] == 1
+    assert stats["rejected"] == 3
+    assert stats["consecutive_failures"] == 0
+
+
+def test_decorrelated_jitter_bounds():
+    delay = 0.1
+    for _ in range(100):
+        delay = decorrelated_jitter(0.1, 2.0, delay)
+        assert 0.1 <= delay <= 2.0
+
+
+def _fail_until_open(transport, session):
+    session.up = False
+    for _ in range(transport.breaker.failure_threshold):
+        assert not transport.send_sync({"event": {"type": "agent_working"}})
+    assert transport.breaker.state == CircuitBreaker.OPEN
+
+
+def test_direct_transport_recovers_after_cooldown():
+    transport = DirectTransport("http://monitor", failure_threshold=2, reset_timeout=0.05, max_retries=0)
+    session = transport.session = FakeSession()
+    try:
+        _fail_until_open(transport, session)
+
+        # 熔断期间 send() 在调用线程快速失败
+        posts = session.posts
+        assert not transport.send({"event": {"type": "agent_working"}})
+        assert session.posts == posts
+
+        session.up = True
+        time.sleep(0.06)
+        # 冷却结束后 send() 取得试探名额，由发送线程完成试探
+        assert transport.send({"event": {"type": "agent_working"}})
+        assert transport._wait_idle(time.monotonic() + 2) == 0
+        assert transport.breaker.state == CircuitBreaker.CLOSED
+
+        assert transport.send_sync({"event": {"type": "agent_working"}})
+        assert transport.get_stats()["sent"] == 2
+    finally:
+        transport.close(flush=False)
+
+
+def test_pooled_transport_recovers_after_cooldown():
+    transport = PooledTransport("http://monitor", workers=2)
+    transport.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    transport.max_retries = 0
+    session = transport.session = FakeSession()
+    for worker in transport._workers:
+        worker.session = session
+    try:
+        _fail_until_open(transport, session)
+
+        session.up = True
+        time.sleep(0.06)
+        for _ in range(5):
+            assert transport.send({"event": {"type": "agent_working"}})
+        assert transport._wait_idle(time.monotonic() + 2) == 0
+        assert transport.breaker.state == CircuitBreaker.CLOSED
+
+        # 试探期间被拒绝的事件之后的事件全部送达
+        assert transport.send_sync({"event": {"type": "agent_working"}})
+        assert transport.get_stats()["sent"] >= 2
+    finally:
+        transport.close(flush=False)
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_client_errors_do_not_open_breaker(status):
+    transport = DirectTransport("http://monitor", failure_threshold=1, max_retries=0)
+    session = transport.session = FakeSession()
+    session.status = status
+    try:
+        assert not transport.send_sync({"event": {"type": "agent_working"}})
+        assert transport.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        transport.close(flush=False)
@@ -0,0 +1,172 @@
+"""EventRecord / 序列化器 / 时间戳"""
+
+import json
+import threading
+
+import pytest
+
+from agent_monitor.plugins.crewai_plugin import CrewAIPlugin
+from agent_monitor.protocol import dictionary as dict_codec
+from agent_monitor.protocol import framing, serializer, timestamps
+from agent_monitor.protocol.record import EventEnvelope, EventRecord
+from agent_monitor.transports.base import BaseTransport
+
+
+@pytest.fixture
+def envelope():
+    return EventEnvelope("server-1", "crewai", process_id=42, hostname="host-1", ip_address="10.0.0.5")
+
+
+@pytest.fixture(params=["orjson", "fragments"])
+def backend(request, monkeypatch):
+    """orjson 整体编码，或标准库拼接预渲染片段"""
+    if request.param == "orjson":
+        if serializer.orjson is None:
+            pytest.skip("orjson 未安装")
+    else:
+        monkeypatch.setattr(serializer, "orjson", None)
+        monkeypatch.setattr(serializer, "dumps", serializer._json_dumps)
+    return request.param
+
+
+def _at(envelope, ns):
+    return EventRecord(envelope, "agent-1", {"type": "agent_working", "data": {"text": "你好"}}, ns)
+
+
+def test_to_dict_is_json_native(envelope):
+    event = _at(envelope, 1_792_209_051_205_731_018).to_dict()
+    assert event["timestamp"] == "2026-10-17T03:50:51.205731Z"
+    # 第三方传输器直接 json.dumps 事件字典
+    assert json.loads(json.dumps(event)) == event
+    assert list(event) == ["protocol", "version", "timestamp", "source", "event", "metadata"]
+
+
+def test_tags_default_to_empty_object(envelope):
+    event = _at(envelope, 1).to_dict()
+    assert event["metadata"]["tags"] == {}
+    # 每个事件的 tags 是独立的副本
+    event["metadata"]["tags"]["k"] = "v"
+    assert _at(envelope, 2).to_dict()["metadata"]["tags"] == {}
+
+    tagged = EventEnvelope("server-1", "crewai", tags={"env": "prod"})
+    assert _at(tagged, 1).to_dict()["metadata"]["tags"] == {"env": "prod"}
+
+
+def test_to_dict_matches_model(envelope):
+    record = _at(envelope, 1_792_209_051_205_731_018)
+    assert record.to_dict() == record.to_model().to_dict()
+
+
+def test_encode_event_matches_json(envelope, backend):
+    event = _at(envelope, 1_792_209_051_205_731_018).to_dict()
+    assert json.loads(serializer.encode_event(event)) == event
+    # 复制后的普通字典按完整字典编码
+    assert json.loads(serializer.encode_event(dict(event))) == event
+
+
+def test_epoch_ns_only_changes_output(envelope, backend):
+    ns = 1_792_209_051_205_731_018
+    event = _at(envelope, ns).to_dict()
+    encoded = json.loads(serializer.encode_event(event, epoch_ns=True))
+    assert encoded["timestamp"] == ns
+    assert event["timestamp"] == "2026-10-17T03:50:51.205731Z"
+
+    # 没有 ns 的事件从字符串解析（精确到微秒）
+    copied = json.loads(serializer.encode_event(dict(event), epoch_ns=True))
+    assert copied["timestamp"] == ns // 1000 * 1000
+
+    lines, written, failed = serializer.encode_lines([event, event], epoch_ns=True)
+    assert (written, failed) == (2, 0)
+    assert [json.loads(line)["timestamp"] for line in lines.splitlines()] == [ns, ns]
+
+
+def test_dictionary_batch_with_epoch_ns(envelope):
+    ns = 1_792_209_051_205_731_018
+    events = [_at(envelope, ns + i).to_dict() for i in range(3)]
+    payload = json.loads(serializer.dumps(dict_codec.encode_batch(events, serializer.epoch_timestamp)))
+    assert [event["timestamp"] for event in dict_codec.decode_batch(payload)] == [ns, ns + 1, ns + 2]
+    assert events[0]["timestamp"] == timestamps.format_ns(ns)
+
+
+def test_format_and_parse_ns():
+    assert timestamps.format_ns(0) == "1970-01-01T00:00:00Z"
+    assert timestamps.format_ns(1_500_000_000) == "1970-01-01T00:00:01.500000Z"
+    ns = 1_792_209_051_205_731_000
+    assert timestamps.parse_ns(timestamps.format_ns(ns)) == ns
+    assert timestamps.parse_ns("2026-10-17T03:50:51.205731+00:00") == ns
+    assert timestamps.parse_ns(ns) == ns
+    assert timestamps.parse_ns("not a time") is None
+    assert timestamps.to_datetime(ns).isoformat() == "2026-10-17T03:50:51.205731+00:00"
+
+
+def test_clock_is_strictly_increasing():
+    clock = timestamps.MonotonicClock()
+    results = []
+
+    def worker():
+        results.extend(clock.now_ns() for _ in range(2000))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == len(results)
+
+    # 系统时钟回拨：继续在上一个值上加 1
+    future = results[-1] + 10**18
+    clock._last = future
+    assert clock.now_ns() == future + 1
+
+
+def test_deferred_timestamp_is_formatted_by_serializer(envelope, backend):
+    ns = 1_792_209_051_205_731_018
+    eager = _at(envelope, ns).to_dict()
+    deferred = _at(envelope, ns).to_dict(deferred=True)
+    assert deferred["timestamp"] is None
+    assert list(deferred) == list(eager)
+
+    assert json.loads(serializer.encode_event(deferred)) == eager
+    assert json.loads(serializer.encode_event(deferred, epoch_ns=True))["timestamp"] == ns
+    lines, written, _ = serializer.encode_lines([deferred])
+    assert written == 1 and json.loads(lines) == eager
+    # 编码不修改事件
+    assert deferred["timestamp"] is None
+
+
+def test_deferred_timestamp_in_other_encoders(envelope):
+    ns = 1_792_209_051_205_731_018
+    eager = _at(envelope, ns).to_dict()
+    deferred = _at(envelope, ns).to_dict(deferred=True)
+
+    payload = json.loads(serializer.dumps(dict_codec.encode_batch([deferred], serializer.iso_timestamp)))
+    assert dict_codec.decode_batch(payload) == [eager]
+    assert serializer.resolve(deferred) == eager
+    assert serializer.resolve(eager) is eager
+
+    if framing.msgpack is not None:
+        packed = framing.encode_payload([deferred], framing.CODEC_MSGPACK)
+        assert framing.decode_payload(packed, framing.CODEC_MSGPACK) == [eager]
+
+
+def test_plugin_defers_only_for_declaring_transports(monkeypatch):
+    monkeypatch.delenv("AGENT_MONITOR_RATE_LIMIT", raising=False)
+    monkeypatch.delenv("AGENT_MONITOR_STRICT", raising=False)
+    sent = []
+
+    class Recording(BaseTransport):
+        def send(self, event):
+            sent.append(event)
+            return True
+
+    class Deferring(Recording):
+        deferred_timestamps = True
+
+    for transport_class, deferred in ((Recording, False), (Deferring, True)):
+        plugin = CrewAIPlugin(transport=transport_class())
+        try:
+            plugin._send(plugin._build_event("agent-1", {"type": "agent_working", "data": {}}))
+        finally:
+            plugin.shutdown()
+        assert (sent[-1]["timestamp"] is None) is deferred
+        assert serializer.iso_timestamp(sent[-1]).endswith("Z")
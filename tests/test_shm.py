@@ -0,0 +1,148 @@
+"""共享内存环形缓冲区与转发器"""
+
+import json
+import time
+
+import pytest
+
+from agent_monitor.receivers.shm_forwarder import ShmForwarder
+from agent_monitor.transports.shm import ShmRingBuffer
+from agent_monitor.transports.spool import BatchRejected
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRingBuffer.create(capacity=64)
+    yield ring
+    ring.close()
+
+
+def test_wrap_around(ring):
+    # 每条记录占 16 字节（4 字节长度 + 5 字节数据，对齐到 8）
+    for i in range(3):
+        assert ring.write(b"rec-%d" % i)
+    assert ring.read(2) == [b"rec-0", b"rec-1"]
+
+    # 写偏移在 48，放不下 24 字节的记录：写入回绕标记，从开头继续
+    assert ring.write(b"x" * 20)
+    assert ring.used() == 16 + 16 + 24
+    assert ring.read() == [b"rec-2", b"x" * 20]
+    assert ring.used() == 0
+
+    # 多次回绕后读写偏移仍然一致
+    for i in range(20):
+        assert ring.write(b"rec-%d" % i)
+        assert ring.read() == [b"rec-%d" % i]
+
+
+def test_full_buffer_rejects_writes(ring):
+    for i in range(4):
+        assert ring.write(b"rec-%d" % i)
+    assert not ring.write(b"rec-4")
+    assert not ring.write(b"x" * 64)
+
+    assert ring.read(1) == [b"rec-0"]
+    assert ring.write(b"rec-4")
+
+
+def test_peek_keeps_records_until_advance(ring):
+    ring.write(b"rec-0")
+    ring.write(b"rec-1")
+    records, head = ring.peek()
+    assert records == [b"rec-0", b"rec-1"]
+    assert ring.peek() == (records, head)
+
+    ring.advance(head)
+    assert ring.peek() == ([], head)
+
+
+class StubTransport:
+    """按 outcome 返回发送结果的 DirectTransport 替身"""
+
+    timeout = 1.0
+
+    def __init__(self, spool=None):
+        self.outcome = False
+        self.spool = spool
+        self.sent = []
+        self.spooled = []
+
+    def _send_batch(self, events, spool):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        if self.outcome:
+            self.sent.extend(events)
+        return self.outcome
+
+    def _spool_events(self, events):
+        self.spooled.extend(events)
+
+    def get_stats(self):
+        return {}
+
+    def close(self, flush=True, timeout=None):
+        return 0
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def large_ring():
+    ring = ShmRingBuffer.create(capacity=4096)
+    yield ring
+    ring.close()
+
+
+def _write_events(ring, count):
+    for i in range(count):
+        assert ring.write(json.dumps({"i": i}).encode("utf-8"))
+
+
+def test_failed_forward_keeps_events(large_ring):
+    transport = StubTransport()
+    forwarder = ShmForwarder(large_ring, transport, poll_interval=0.01)
+    try:
+        _write_events(large_ring, 3)
+        large_ring.write(b"not json")
+        _wait_for(lambda: forwarder.stats["retries"] >= 2)
+        assert large_ring.used() > 0
+        assert forwarder.stats["forwarded"] == 0
+
+        # 服务器恢复后转发保留的事件
+        transport.outcome = True
+        _wait_for(lambda: large_ring.used() == 0)
+        assert transport.sent == [{"i": i} for i in range(3)]
+        assert forwarder.stats["forwarded"] == 3
+        assert forwarder.stats["invalid"] == 1
+    finally:
+        forwarder.close()
+
+
+def test_failed_forward_goes_to_spool(large_ring):
+    transport = StubTransport(spool=object())
+    forwarder = ShmForwarder(large_ring, transport, poll_interval=0.01)
+    try:
+        _write_events(large_ring, 3)
+        _wait_for(lambda: large_ring.used() == 0)
+        assert transport.spooled == [{"i": i} for i in range(3)]
+        assert forwarder.stats["spooled"] == 3
+    finally:
+        forwarder.close()
+
+
+def test_rejected_batch_is_dropped(large_ring):
+    transport = StubTransport()
+    transport.outcome = BatchRejected(400)
+    forwarder = ShmForwarder(large_ring, transport, poll_interval=0.01)
+    try:
+        _write_events(large_ring, 3)
+        _wait_for(lambda: large_ring.used() == 0)
+        assert forwarder.stats["rejected"] == 3
+        assert forwarder.stats["retries"] == 0
+    finally:
+        forwarder.close()
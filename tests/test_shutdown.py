@@ -0,0 +1,66 @@
+"""CrewAIPlugin.shutdown() 与 SIGTERM"""
+
+import signal
+import threading
+
+from agent_monitor.plugins.crewai_plugin import CrewAIPlugin
+from agent_monitor.transports.base import BaseTransport
+
+
+class RecordingTransport(BaseTransport):
+    def __init__(self, on_close=None):
+        self.on_close = on_close
+        self.closes = 0
+
+    def send(self, event):
+        return True
+
+    def close(self, flush=True, timeout=None):
+        self.closes += 1
+        if self.on_close is not None:
+            self.on_close()
+        return 0
+
+
+def _plugin(transport, monkeypatch):
+    monkeypatch.delenv("AGENT_MONITOR_RATE_LIMIT", raising=False)
+    plugin = CrewAIPlugin(transport=transport)
+    terminated = []
+    monkeypatch.setattr(plugin, "_terminate", lambda: terminated.append(True))
+    return plugin, terminated
+
+
+def _run_with_deadline(target, timeout=5.0):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "shutdown deadlocked"
+
+
+def test_shutdown_is_idempotent(monkeypatch):
+    transport = RecordingTransport()
+    plugin, terminated = _plugin(transport, monkeypatch)
+    assert plugin.shutdown() == 0
+    assert plugin.shutdown() == 0
+    assert transport.closes == 1
+    assert not terminated
+
+
+def test_sigterm_during_shutdown_does_not_deadlock(monkeypatch):
+    transport = RecordingTransport()
+    plugin, terminated = _plugin(transport, monkeypatch)
+    # 模拟 SIGTERM 在同一线程的 shutdown()（如 atexit）执行期间到达
+    transport.on_close = lambda: plugin._on_sigterm(signal.SIGTERM, None)
+
+    _run_with_deadline(plugin.shutdown)
+    assert transport.closes == 1
+    # 正在进行的 shutdown 完成后才终止进程
+    assert terminated == [True]
+
+
+def test_sigterm_flushes_then_terminates(monkeypatch):
+    transport = RecordingTransport()
+    plugin, terminated = _plugin(transport, monkeypatch)
+    _run_with_deadline(lambda: plugin._on_sigterm(signal.SIGTERM, None))
+    assert transport.closes == 1
+    assert terminated == [True]
@@ -0,0 +1,107 @@
+"""Sidecar 端到端：UnixSocketTransport -> sidecar -> HTTP 批量接口"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent_monitor.receivers.sidecar import Sidecar
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.unix import UnixSocketTransport
+
+
+@pytest.fixture
+def collector():
+    """记录 /api/events/batch 收到的事件的桩监控服务器"""
+    state = {"batches": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body=b""):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(json.dumps({"status": "ok"}).encode("utf-8"))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path == "/api/events/batch":
+                state["batches"].append(json.loads(body))
+            self._reply()
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_port}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _event(agent_id, i):
+    return {
+        "timestamp": "2026-01-01T00:00:00.000000Z",
+        "source": {"agent_id": agent_id},
+        "event": {"type": "agent_working", "data": {"i": i}},
+    }
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_events_reach_monitor_through_sidecar(collector, tmp_path):
+    """多个 Agent 进程经 Unix 套接字发给 sidecar 的事件全部转发到监控服务器，每个 Agent 内顺序不变"""
+    socket_path = str(tmp_path / "sidecar.sock")
+    sidecar = Sidecar(socket_path, DirectTransport(collector["url"]), batch_size=50, linger=0.05)
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(sidecar.start(), loop).result(5)
+
+    # 两个 "Agent 进程"，各自一个连接
+    agents = {
+        agent_id: UnixSocketTransport(f"unix://{socket_path}", batch_size=20, linger=0.01)
+        for agent_id in ("agent-a", "agent-b")
+    }
+    try:
+        for i in range(100):
+            for agent_id, transport in agents.items():
+                assert transport.send(_event(agent_id, i))
+        for transport in agents.values():
+            assert transport.close(timeout=5) == 0
+
+        # 桩服务器记录批次后 send_batch 才返回，两者都完成后再检查
+        _wait_for(lambda: sidecar.get_stats()["transport"]["sent"] == 200)
+        assert sum(len(batch) for batch in collector["batches"]) == 200
+        received = [event for batch in collector["batches"] for event in batch]
+        for agent_id in agents:
+            assert [
+                event["event"]["data"]["i"] for event in received if event["source"]["agent_id"] == agent_id
+            ] == list(range(100))
+        assert all(event["timestamp"] == "2026-01-01T00:00:00.000000Z" for event in received)
+
+        stats = sidecar.get_stats()
+        assert stats["received"] == 200
+        assert stats["dropped"] == 0
+        assert sidecar.receiver.stats["connections"] == 2
+    finally:
+        for transport in agents.values():
+            transport.close(timeout=0)
+        asyncio.run_coroutine_threadsafe(sidecar.stop(timeout=5), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
@@ -0,0 +1,193 @@
+"""磁盘暂存的写入 / 回放 / 提交"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from agent_monitor.transports.direct import DirectTransport
+from agent_monitor.transports.spool import BatchRejected, EventSpool, SpoolReplayer, fcntl
+
+
+def _events(count, start=0):
+    return [{"event": {"type": "agent_working", "data": {"i": i}}} for i in range(start, start + count)]
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = EventSpool(str(tmp_path), segment_size=4096, flush_interval=60)
+    yield spool
+    spool.close()
+
+
+def _replayer(spool, send_batch, batch_size=500):
+    # interval 足够长，只通过 replay() 手动回放
+    return SpoolReplayer(spool, send_batch, health_check=lambda: True, interval=60, batch_size=batch_size)
+
+
+def _read_all(spool):
+    events = []
+    while True:
+        segment = spool.read_oldest()
+        if segment is None:
+            return events
+        events.extend(segment[1])
+        spool.commit(segment[0])
+
+
+def test_write_read_commit(spool):
+    assert not spool.has_pending()
+    assert spool.append(_events(3)) == 3
+    assert spool.has_pending()
+
+    seq, events = spool.read_oldest()
+    assert events == _events(3)
+    assert spool.get_stats()["pending"] == 3
+
+    spool.commit(seq)
+    assert not spool.has_pending()
+    assert spool.read_oldest() is None
+    assert not os.listdir(spool.segment_dir)
+
+
+def test_segments_rotate_and_recover(tmp_path):
+    spool = EventSpool(str(tmp_path), segment_size=512, flush_interval=60)
+    spool.append(_events(20))
+    spool.close()
+    assert len(os.listdir(spool.segment_dir)) > 1
+
+    # 新进程从目录恢复遗留的分段，按从旧到新的顺序读取
+    recovered = EventSpool(str(tmp_path), segment_size=512, flush_interval=60)
+    try:
+        assert _read_all(recovered) == _events(20)
+    finally:
+        recovered.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="需要 fcntl")
+def test_processes_share_spool_directory(tmp_path):
+    first = EventSpool(str(tmp_path), flush_interval=60)
+    second = EventSpool(str(tmp_path), flush_interval=60)
+    try:
+        first.append(_events(5))
+        first._write_pending()
+        second.append(_events(3, start=100))
+        second._write_pending()
+        assert first.segment_dir != second.segment_dir
+
+        # 存活的暂存不会被其他暂存覆盖或接管
+        third = EventSpool(str(tmp_path), flush_interval=60)
+        assert not third.has_pending()
+        third.close()
+
+        first.close()
+        # 第一个暂存退出后，剩余分段只被一个新暂存接管
+        adopter = EventSpool(str(tmp_path), flush_interval=60)
+        other = EventSpool(str(tmp_path), flush_interval=60)
+        try:
+            assert _read_all(adopter) == _events(5)
+            assert not other.has_pending()
+            assert not os.path.exists(first.segment_dir)
+        finally:
+            adopter.close()
+            other.close()
+        assert _read_all(second) == _events(3, start=100)
+    finally:
+        first.close()
+        second.close()
+
+    # 所有暂存都已清空并退出，只剩接管锁
+    assert os.listdir(str(tmp_path)) == [".adopt.lock"]
+
+
+def test_capacity_drops_oldest_segments(tmp_path):
+    spool = EventSpool(str(tmp_path), segment_size=512, max_bytes=1024, flush_interval=60)
+    try:
+        spool.append(_events(40))
+        spool.read_oldest()
+        stats = spool.get_stats()
+        assert stats["segments_dropped"] > 0
+        assert stats["pending"] + stats["dropped"] == 40
+    finally:
+        spool.close()
+
+
+def test_replay_commits_segments(spool):
+    spool.append(_events(5))
+    sent = []
+    replayer = _replayer(spool, lambda batch: sent.extend(batch) or True, batch_size=2)
+    try:
+        assert replayer.replay() == 5
+        assert sent == _events(5)
+        assert not spool.has_pending()
+    finally:
+        replayer.close()
+
+
+def test_replay_stops_on_failure_and_retries(spool):
+    spool.append(_events(3))
+    up = False
+    sent = []
+
+    def send_batch(batch):
+        if not up:
+            return False
+        sent.extend(batch)
+        return True
+
+    replayer = _replayer(spool, send_batch)
+    try:
+        assert replayer.replay() == 0
+        assert spool.has_pending()
+
+        up = True
+        assert replayer.replay() == 3
+        assert sent == _events(3)
+        assert not spool.has_pending()
+    finally:
+        replayer.close()
+
+
+def test_poison_batch_does_not_block_spool(spool):
+    spool.append(_events(6))
+
+    def send_batch(batch):
+        if any(event["event"]["data"]["i"] == 2 for event in batch):
+            raise BatchRejected(400)
+        return True
+
+    replayer = _replayer(spool, send_batch, batch_size=2)
+    try:
+        # 被拒绝的批次跳过，其余批次照常发送，分段被删除
+        assert replayer.replay() == 4
+        assert replayer.stats == {"replayed": 4, "rejected": 2}
+        assert not spool.has_pending()
+    finally:
+        replayer.close()
+
+
+class _StatusSession:
+    def __init__(self, status):
+        self.status = status
+
+    def post(self, url, data=None, **kwargs):
+        return SimpleNamespace(status_code=self.status, text="", request=SimpleNamespace(body=data))
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("status, rejected", [(400, True), (422, True), (429, False), (503, False)])
+def test_direct_replay_classifies_status(tmp_path, status, rejected):
+    transport = DirectTransport("http://monitor", spool_dir=str(tmp_path), max_retries=0)
+    transport.session = _StatusSession(status)
+    try:
+        if rejected:
+            with pytest.raises(BatchRejected):
+                transport._send_batch(_events(1), spool=False)
+        else:
+            assert not transport._send_batch(_events(1), spool=False)
+        # 正常发送路径不抛出异常
+        assert not transport.send_batch(_events(1))
+    finally:
+        transport.close(flush=False)
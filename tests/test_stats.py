@@ -0,0 +1,89 @@
+"""按线程分片的计数器与对数分桶直方图"""
+
+import math
+import random
+import threading
+
+from agent_monitor.utils import stats as stats_module
+from agent_monitor.utils.stats import Histogram, TransportStats, _bucket_index, _bucket_value
+
+# 桶内代表值为区间中点，相对误差不超过半个子桶（1 / 2^_SUB_BITS）
+PRECISION = 1 / (1 << stats_module._SUB_BITS)
+
+
+def test_bucket_value_within_precision():
+    """每个值落入的桶的代表值在精度范围内，小值精确记录"""
+    previous = -1
+    for value in list(range(5000)) + [random.Random(1).randrange(1 << 40) for _ in range(2000)]:
+        index = _bucket_index(value)
+        represented = _bucket_value(index)
+        if value < stats_module._LINEAR_MAX:
+            assert represented == value
+        assert abs(represented - value) <= value * PRECISION
+        if value < 5000:
+            # 桶序号随值单调不减
+            assert index >= previous
+            previous = index
+
+
+def test_percentile_error_within_bucket_precision():
+    """百分位数与精确值的相对误差不超过桶精度"""
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(10, 2)) for _ in range(20000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+
+    ordered = sorted(values)
+    for q in (1, 10, 50, 90, 95, 99, 99.9):
+        exact = ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+        assert abs(histogram.percentile(q) - exact) <= exact * PRECISION
+    assert histogram.percentile(0) >= histogram.min
+    assert histogram.percentile(100) == histogram.max
+
+
+def test_concurrent_counts_add_up_exactly():
+    """多个线程并发写入各自的分片，合并后的计数和样本数准确"""
+    stats = TransportStats(("sent",), histograms={"latency_ms": 1000})
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        for i in range(10000):
+            stats.incr("sent")
+            stats.observe("latency_ms", i % 100)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # 写入期间读取不影响结果
+    while any(thread.is_alive() for thread in threads):
+        stats.snapshot()
+    for thread in threads:
+        thread.join()
+
+    snapshot = stats.snapshot()
+    assert snapshot["sent"] == 80000
+    assert snapshot["latency_ms"]["count"] == 80000
+    assert snapshot["latency_ms"]["max"] == 99.0
+
+
+def test_dead_thread_shards_are_merged_not_lost():
+    """已退出线程的分片被合并到归档分片，分片数量有上限且计数不丢失"""
+    stats = TransportStats(("sent",), histograms={"batch_size": 1})
+    threads = stats_module._MAX_SHARDS * 3
+
+    for i in range(threads):
+        thread = threading.Thread(target=lambda i=i: (stats.incr("sent", 2), stats.observe("batch_size", i)))
+        thread.start()
+        thread.join()
+        assert len(stats._shards) <= stats_module._MAX_SHARDS
+
+    snapshot = stats.snapshot()
+    assert snapshot["sent"] == threads * 2
+    assert snapshot["batch_size"]["count"] == threads
+    assert snapshot["batch_size"]["min"] == 0
+    assert snapshot["batch_size"]["max"] == threads - 1
+    # 读取时所有已退出线程的分片都已归档
+    assert stats._shards == []
+    assert stats.get("sent") == threads * 2
@@ -0,0 +1,192 @@
+"""TcpTransport 与 TCP 参考接收端"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent_monitor.protocol import framing
+from agent_monitor.receivers.tcp import FrameReceiver
+from agent_monitor.transports.tcp import TcpTransport
+
+
+def _event(i, agent_id="agent-1"):
+    return {"source": {"agent_id": agent_id}, "event": {"type": "agent_working", "data": {"i": i}}}
+
+
+class ReceiverThread:
+    """在后台事件循环中运行的接收端（FrameReceiver 或其他提供 serve_tcp 的接收端）"""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self.server = self.call(self.receiver.serve_tcp("127.0.0.1", 0))
+        self.address = f"tcp://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    def call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(5)
+
+    def stop(self):
+        self.call(self._shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+        self.loop.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def silent_receiver():
+    """接收批次但从不回复 ACK 的接收端"""
+    never = asyncio.Event()
+
+    async def handler(events):
+        await never.wait()
+
+    receiver = ReceiverThread(FrameReceiver(handler))
+    yield receiver
+    receiver.stop()
+
+
+def test_close_gives_up_on_receiver_that_never_acks(silent_receiver):
+    transport = TcpTransport(silent_receiver.address, timeout=0.2, linger=0.01, backoff_initial=0.01)
+    transport.send(_event(0))
+    _wait_for(lambda: silent_receiver.receiver.stats["connections"] >= 1)
+
+    assert transport.close(timeout=0.3) == 1
+    # 截止时间后后台线程退出，不再重连
+    transport._worker.join(2)
+    assert not transport._worker.is_alive()
+    connections = silent_receiver.receiver.stats["connections"]
+    time.sleep(0.5)
+    assert silent_receiver.receiver.stats["connections"] == connections
+    assert transport.get_stats()["connected"] == 0
+
+
+class ReversingReceiver:
+    """每读到 window 个批次帧后按相反顺序回复 ACK 的接收端"""
+
+    def __init__(self, window):
+        self.window = window
+        self.events = []
+        self.stats = {"connections": 0}
+
+    async def handle_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                seqs = []
+                for _ in range(self.window):
+                    length, _, codec, seq = framing.decode_header(await reader.readexactly(framing.HEADER.size))
+                    self.events.extend(framing.decode_payload(await reader.readexactly(length), codec))
+                    seqs.append(seq)
+                for seq in reversed(seqs):
+                    writer.write(framing.encode_ack(seq))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host, port):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def _data(events):
+    return [event["event"]["data"]["i"] for event in events]
+
+
+def test_window_keeps_several_batches_in_flight():
+    """接收端处理变慢时最多 max_in_flight_batches 个批次同时等待 ACK，恢复后按顺序送达"""
+    received = []
+    release = threading.Event()
+
+    async def handler(events):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        received.extend(events)
+
+    receiver = ReceiverThread(FrameReceiver(handler))
+    transport = TcpTransport(receiver.address, timeout=5, batch_size=1, linger=0.01, max_in_flight_batches=3)
+    try:
+        for i in range(6):
+            transport.send(_event(i))
+        _wait_for(lambda: transport.get_stats()["in_flight_batches"] == 3)
+        time.sleep(0.2)
+        assert transport.get_stats()["in_flight_batches"] == 3
+
+        release.set()
+        _wait_for(lambda: transport.get_stats()["sent"] == 6)
+        assert _data(received) == list(range(6))
+        assert transport.get_stats()["retries"] == 0
+    finally:
+        assert transport.close() == 0
+        receiver.stop()
+
+
+def test_out_of_order_acks_are_matched_by_seq():
+    """ACK 乱序到达时按 seq 确认对应批次，不重发"""
+    receiver = ReceiverThread(ReversingReceiver(window=3))
+    transport = TcpTransport(receiver.address, timeout=5, batch_size=1, linger=0.01, max_in_flight_batches=3)
+    try:
+        for i in range(6):
+            transport.send(_event(i))
+        _wait_for(lambda: transport.get_stats()["sent"] == 6)
+
+        stats = transport.get_stats()
+        assert stats["batches"] == 6
+        assert stats["in_flight_batches"] == 0
+        assert stats["retries"] == 0
+        assert _data(receiver.receiver.events) == list(range(6))
+        assert receiver.receiver.stats["connections"] == 1
+    finally:
+        assert transport.close() == 0
+        receiver.stop()
+
+
+def test_unacked_batches_are_resent_in_order_after_disconnect():
+    """接收端断开连接后，未确认的批次在重连后按原顺序重发"""
+    received = []
+    calls = []
+
+    def handler(events):
+        calls.append(len(events))
+        if len(calls) == 1:
+            # 第一个批次处理失败：不回复 ACK 直接断开
+            raise RuntimeError("boom")
+        received.extend(events)
+
+    receiver = ReceiverThread(FrameReceiver(handler))
+    transport = TcpTransport(
+        receiver.address, timeout=5, batch_size=1, linger=0.01,
+        max_in_flight_batches=4, backoff_initial=0.01
+    )
+    try:
+        for i in range(4):
+            transport.send(_event(i))
+        _wait_for(lambda: transport.get_stats()["sent"] == 4)
+
+        assert _data(received) == list(range(4))
+        assert receiver.receiver.stats["errors"] == 1
+        assert receiver.receiver.stats["connections"] == 2
+        stats = transport.get_stats()
+        assert stats["retries"] >= 1
+        assert stats["failed"] == 0
+    finally:
+        assert transport.close() == 0
+        receiver.stop()